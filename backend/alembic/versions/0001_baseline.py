@@ -0,0 +1,718 @@
+"""Baseline: bestehendes Schema + bisherige Startup-/Seed-DDL
+
+Ersetzt create_all und die ALTER-Statements aus init_db sowie die
+Skripte app/seeds/migrate_*.py. Läuft gegen leere UND bestehende
+Datenbanken (alles idempotent), bestehende Railway-DBs werden damit
+ohne Sonderbehandlung auf den Alembic-Stand gebracht.
+
+Das Schema ist hier eingefroren (DDL zum Zeitpunkt der Baseline) und
+hängt bewusst NICHT von app.models ab: spätere Modelländerungen kommen
+ausschließlich über eigene Revisionen, sonst legt die Baseline Spalten
+und Indizes an, die erst eine spätere Revision (mit Extension/Funktion)
+anlegen darf.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# =========================================
+# Schema zum Zeitpunkt der Baseline (wie create_all damals)
+# =========================================
+ENUMS = {
+    "weekday": ('MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY', 'EVERYDAY'),
+    "ramadanmode": ('ONLY', 'EXCLUDE', 'BOTH'),
+    "userrole": ('STUDENT', 'TEACHER', 'ADMIN'),
+    "pricetype": ('ONE_TIME', 'SUBSCRIPTION', 'BOTH'),
+    "coursetype": ('COURSE', 'SEMINAR'),
+    "coursecategory": ('ARABIC', 'ISLAMIC'),
+    "courselevel": ('BEGINNER', 'INTERMEDIATE', 'ADVANCED'),
+    "emailtype": ('WELCOME', 'EMAIL_VERIFICATION', 'PASSWORD_RESET', 'PURCHASE_CONFIRMATION', 'PAYMENT_REMINDER', 'SESSION_REMINDER', 'EXAM_REMINDER', 'EXAM_RESULT', 'CERTIFICATE', 'INVOICE', 'CLASS_CANCELLED', 'GENERAL'),
+    "emailstatus": ('SENT', 'FAILED', 'BOUNCED'),
+    "enrollmenttype": ('ONE_TIME', 'SUBSCRIPTION'),
+    "enrollmentstatus": ('ACTIVE', 'CANCELLED', 'EXPIRED'),
+    "sessiontype": ('ONLINE', 'ONSITE', 'HYBRID'),
+    "paymentmethod": ('STRIPE', 'PAYPAL', 'BANK_TRANSFER'),
+    "paymentstatus": ('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED'),
+    "subscriptionstatus": ('ACTIVE', 'CANCELLED', 'PAST_DUE'),
+    "attendancestatus": ('PRESENT', 'ABSENT_EXCUSED', 'ABSENT_UNEXCUSED'),
+    "checkinmethod": ('ZOOM_AUTO', 'MANUAL', 'SELF_CONFIRMED'),
+    "exambookingstatus": ('SCHEDULED', 'COMPLETED', 'CANCELLED', 'NO_SHOW'),
+    "examresult": ('PASSED', 'FAILED'),
+}
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS announcements (
+        id UUID NOT NULL,
+        text VARCHAR(500) NOT NULL,
+        link_url VARCHAR(500),
+        link_text VARCHAR(100),
+        start_date TIMESTAMP WITHOUT TIME ZONE,
+        end_date TIMESTAMP WITHOUT TIME ZONE,
+        is_active BOOLEAN,
+        priority INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_guidances (
+        id UUID NOT NULL,
+        title VARCHAR(120),
+        text TEXT NOT NULL,
+        link_url VARCHAR(500),
+        link_text VARCHAR(80),
+        weekday weekday NOT NULL,
+        ramadan_mode ramadanmode NOT NULL,
+        start_date TIMESTAMP WITHOUT TIME ZONE,
+        end_date TIMESTAMP WITHOUT TIME ZONE,
+        is_active BOOLEAN,
+        priority INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS faqs (
+        id UUID NOT NULL,
+        question VARCHAR(500) NOT NULL,
+        answer TEXT NOT NULL,
+        category VARCHAR(100),
+        "order" INTEGER,
+        is_published BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS locations (
+        id UUID NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        slug VARCHAR(255) NOT NULL,
+        description TEXT,
+        street VARCHAR(255),
+        zip_code VARCHAR(20),
+        city VARCHAR(100),
+        country VARCHAR(100),
+        latitude NUMERIC(10, 8),
+        longitude NUMERIC(11, 8),
+        logo_url VARCHAR(500),
+        image_url VARCHAR(500),
+        phone VARCHAR(50),
+        email VARCHAR(255),
+        website VARCHAR(500),
+        parking_info TEXT,
+        public_transport TEXT,
+        accessibility TEXT,
+        is_active BOOLEAN,
+        is_online BOOLEAN,
+        "order" INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id UUID NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        first_name VARCHAR(100) NOT NULL,
+        last_name VARCHAR(100) NOT NULL,
+        phone VARCHAR(50),
+        address_street VARCHAR(255),
+        address_city VARCHAR(100),
+        address_zip VARCHAR(20),
+        address_country VARCHAR(100),
+        date_of_birth DATE,
+        newsletter_opt_in BOOLEAN NOT NULL,
+        whatsapp_opt_in BOOLEAN NOT NULL,
+        whatsapp_channel_opt_in BOOLEAN NOT NULL,
+        onboarding_completed BOOLEAN NOT NULL,
+        role userrole NOT NULL,
+        is_active BOOLEAN,
+        email_verified BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS courses (
+        id UUID NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        slug VARCHAR(255) NOT NULL,
+        description TEXT,
+        short_description VARCHAR(500),
+        thumbnail_url VARCHAR(500),
+        preview_video_url VARCHAR(500),
+        price NUMERIC(10, 2),
+        price_type pricetype,
+        subscription_price NUMERIC(10, 2),
+        course_type coursetype,
+        category coursecategory NOT NULL,
+        level courselevel,
+        book_affiliate_link VARCHAR(500),
+        book_pdf_url VARCHAR(500),
+        default_location_id UUID,
+        session_type VARCHAR(20),
+        duration_weeks INTEGER,
+        max_students INTEGER,
+        "order" INTEGER,
+        is_active BOOLEAN,
+        is_featured BOOLEAN,
+        is_published BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        published_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(default_location_id) REFERENCES locations (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS email_logs (
+        id UUID NOT NULL,
+        user_id UUID,
+        email_type emailtype NOT NULL,
+        recipient_email VARCHAR(255) NOT NULL,
+        subject VARCHAR(255) NOT NULL,
+        status emailstatus,
+        error_message TEXT,
+        sent_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS teacher_profiles (
+        id UUID NOT NULL,
+        user_id UUID,
+        name VARCHAR(255) NOT NULL,
+        slug VARCHAR(255) NOT NULL,
+        bio TEXT,
+        qualifications TEXT,
+        email VARCHAR(255),
+        photo_url VARCHAR(500),
+        "order" INTEGER,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        UNIQUE (user_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS classes (
+        id UUID NOT NULL,
+        course_id UUID NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        description VARCHAR(1000),
+        start_date DATE NOT NULL,
+        end_date DATE,
+        max_students INTEGER,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS course_teachers (
+        course_id UUID NOT NULL,
+        teacher_profile_id UUID NOT NULL,
+        PRIMARY KEY (course_id, teacher_profile_id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE,
+        FOREIGN KEY(teacher_profile_id) REFERENCES teacher_profiles (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS enrollments (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        course_id UUID NOT NULL,
+        enrollment_type enrollmenttype NOT NULL,
+        status enrollmentstatus,
+        started_at TIMESTAMP WITHOUT TIME ZONE,
+        expires_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS lessons (
+        id UUID NOT NULL,
+        course_id UUID NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        slug VARCHAR(255) NOT NULL,
+        description TEXT,
+        section_title VARCHAR(255),
+        "order" INTEGER NOT NULL,
+        content_type VARCHAR(20) NOT NULL,
+        vimeo_video_id VARCHAR(100),
+        vimeo_video_url VARCHAR(500),
+        duration_minutes INTEGER,
+        text_content TEXT,
+        pdf_url VARCHAR(500),
+        pdf_name VARCHAR(255),
+        materials JSONB,
+        has_quiz BOOLEAN,
+        quiz_title VARCHAR(255),
+        quiz_passing_score INTEGER,
+        quiz_questions JSONB,
+        is_free_preview BOOLEAN,
+        is_published BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS testimonials (
+        id UUID NOT NULL,
+        course_id UUID,
+        user_id UUID,
+        name VARCHAR(255) NOT NULL,
+        content TEXT NOT NULL,
+        rating INTEGER,
+        photo_url VARCHAR(500),
+        is_featured BOOLEAN,
+        is_published BOOLEAN,
+        "order" INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE SET NULL,
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS class_courses (
+        class_id UUID NOT NULL,
+        course_id UUID NOT NULL,
+        PRIMARY KEY (class_id, course_id),
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE,
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS class_enrollments (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        class_id UUID NOT NULL,
+        enrollment_type VARCHAR(20) NOT NULL,
+        status enrollmentstatus,
+        started_at TIMESTAMP WITHOUT TIME ZONE,
+        expires_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_user_class UNIQUE (user_id, class_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS class_schedules (
+        id UUID NOT NULL,
+        class_id UUID NOT NULL,
+        day_of_week INTEGER NOT NULL,
+        start_time TIME WITHOUT TIME ZONE NOT NULL,
+        end_time TIME WITHOUT TIME ZONE NOT NULL,
+        session_type sessiontype,
+        location VARCHAR(255),
+        location_id UUID,
+        frequency INTEGER,
+        zoom_meeting_id VARCHAR(100),
+        zoom_join_url VARCHAR(500),
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE,
+        FOREIGN KEY(location_id) REFERENCES locations (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS class_teachers (
+        id UUID NOT NULL,
+        class_id UUID NOT NULL,
+        teacher_id UUID NOT NULL,
+        is_primary BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_class_teacher UNIQUE (class_id, teacher_id),
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE,
+        FOREIGN KEY(teacher_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS course_progress (
+        user_id UUID NOT NULL,
+        course_id UUID NOT NULL,
+        completed_count INTEGER NOT NULL,
+        total_count INTEGER NOT NULL,
+        last_lesson_id UUID,
+        next_lesson_id UUID,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (user_id, course_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE,
+        FOREIGN KEY(last_lesson_id) REFERENCES lessons (id) ON DELETE SET NULL,
+        FOREIGN KEY(next_lesson_id) REFERENCES lessons (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS exam_slots (
+        id UUID NOT NULL,
+        class_id UUID NOT NULL,
+        examiner_id UUID,
+        course_id UUID NOT NULL,
+        scheduled_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        duration_minutes INTEGER,
+        zoom_meeting_id VARCHAR(100),
+        zoom_join_url VARCHAR(500),
+        is_booked BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE,
+        FOREIGN KEY(examiner_id) REFERENCES users (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS holidays (
+        id UUID NOT NULL,
+        class_id UUID,
+        name VARCHAR(255) NOT NULL,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        applies_to_all BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS homework (
+        id UUID NOT NULL,
+        lesson_id UUID NOT NULL,
+        content_type VARCHAR(20) NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        deadline TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        max_points INTEGER,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(lesson_id) REFERENCES lessons (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS lesson_progress (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        lesson_id UUID NOT NULL,
+        watched_seconds INTEGER,
+        completed BOOLEAN,
+        completed_at TIMESTAMP WITHOUT TIME ZONE,
+        quiz_score INTEGER,
+        quiz_passed BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_user_lesson UNIQUE (user_id, lesson_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(lesson_id) REFERENCES lessons (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS live_sessions (
+        id UUID NOT NULL,
+        class_id UUID NOT NULL,
+        created_by UUID,
+        course_id UUID,
+        lesson_id UUID,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        session_type sessiontype,
+        location VARCHAR(255),
+        scheduled_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        duration_minutes INTEGER,
+        zoom_meeting_id VARCHAR(100),
+        zoom_join_url VARCHAR(500),
+        zoom_password VARCHAR(50),
+        vimeo_video_id VARCHAR(100),
+        vimeo_video_url VARCHAR(500),
+        is_cancelled BOOLEAN,
+        cancel_reason VARCHAR(255),
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(class_id) REFERENCES classes (id) ON DELETE CASCADE,
+        FOREIGN KEY(created_by) REFERENCES users (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE SET NULL,
+        FOREIGN KEY(lesson_id) REFERENCES lessons (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS payments (
+        id UUID NOT NULL,
+        user_id UUID,
+        enrollment_id UUID,
+        amount NUMERIC(10, 2) NOT NULL,
+        currency VARCHAR(3),
+        payment_method paymentmethod NOT NULL,
+        payment_status paymentstatus,
+        stripe_payment_id VARCHAR(255),
+        paypal_order_id VARCHAR(255),
+        bank_transfer_reference VARCHAR(100),
+        paid_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE SET NULL,
+        FOREIGN KEY(enrollment_id) REFERENCES enrollments (id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS subscriptions (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        enrollment_id UUID NOT NULL,
+        stripe_subscription_id VARCHAR(255),
+        paypal_subscription_id VARCHAR(255),
+        status subscriptionstatus,
+        current_period_start TIMESTAMP WITHOUT TIME ZONE,
+        current_period_end TIMESTAMP WITHOUT TIME ZONE,
+        cancel_at_period_end BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(enrollment_id) REFERENCES enrollments (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS attendance (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        live_session_id UUID NOT NULL,
+        attendance_type sessiontype NOT NULL,
+        status attendancestatus,
+        checked_in_at TIMESTAMP WITHOUT TIME ZONE,
+        checked_in_by checkinmethod,
+        notes TEXT,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_user_session_attendance UNIQUE (user_id, live_session_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(live_session_id) REFERENCES live_sessions (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS attendance_confirmations (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        live_session_id UUID NOT NULL,
+        will_attend BOOLEAN NOT NULL,
+        absence_reason TEXT,
+        confirmed_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_user_session_confirmation UNIQUE (user_id, live_session_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(live_session_id) REFERENCES live_sessions (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS exam_bookings (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        exam_slot_id UUID NOT NULL,
+        status exambookingstatus,
+        pvl_fulfilled BOOLEAN,
+        result examresult,
+        grade NUMERIC(2, 1),
+        examiner_notes TEXT,
+        examined_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_exam_slot_booking UNIQUE (exam_slot_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(exam_slot_id) REFERENCES exam_slots (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS homework_submissions (
+        id UUID NOT NULL,
+        homework_id UUID NOT NULL,
+        student_id UUID NOT NULL,
+        file_url VARCHAR(500) NOT NULL,
+        file_name VARCHAR(255),
+        file_type VARCHAR(100),
+        file_size INTEGER,
+        notes TEXT,
+        submitted_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        CONSTRAINT uq_homework_student UNIQUE (homework_id, student_id),
+        FOREIGN KEY(homework_id) REFERENCES homework (id) ON DELETE CASCADE,
+        FOREIGN KEY(student_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS invoices (
+        id UUID NOT NULL,
+        user_id UUID,
+        payment_id UUID,
+        invoice_number VARCHAR(50) NOT NULL,
+        amount NUMERIC(10, 2) NOT NULL,
+        tax_amount NUMERIC(10, 2),
+        total_amount NUMERIC(10, 2) NOT NULL,
+        pdf_path VARCHAR(500),
+        issued_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE SET NULL,
+        FOREIGN KEY(payment_id) REFERENCES payments (id) ON DELETE SET NULL,
+        UNIQUE (invoice_number)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS certificates (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        exam_booking_id UUID,
+        course_id UUID,
+        certificate_number VARCHAR(50) NOT NULL,
+        pdf_path VARCHAR(500),
+        issued_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(exam_booking_id) REFERENCES exam_bookings (id),
+        FOREIGN KEY(course_id) REFERENCES courses (id) ON DELETE SET NULL,
+        UNIQUE (certificate_number)
+    )
+    """,
+]
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_locations_slug ON locations (slug)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_courses_slug ON courses (slug)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_teacher_profiles_slug ON teacher_profiles (slug)",
+    "CREATE INDEX IF NOT EXISTS ix_classes_course_id ON classes (course_id)",
+    "CREATE INDEX IF NOT EXISTS ix_enrollments_course_id ON enrollments (course_id)",
+    "CREATE INDEX IF NOT EXISTS ix_enrollments_user_id ON enrollments (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_lessons_course_id ON lessons (course_id)",
+    "CREATE INDEX IF NOT EXISTS ix_lessons_slug ON lessons (slug)",
+    "CREATE INDEX IF NOT EXISTS ix_testimonials_course_id ON testimonials (course_id)",
+    "CREATE INDEX IF NOT EXISTS ix_class_enrollments_class_id ON class_enrollments (class_id)",
+    "CREATE INDEX IF NOT EXISTS ix_class_enrollments_user_id ON class_enrollments (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_class_schedules_class_id ON class_schedules (class_id)",
+    "CREATE INDEX IF NOT EXISTS ix_course_progress_course_id ON course_progress (course_id)",
+    "CREATE INDEX IF NOT EXISTS ix_exam_slots_class_id ON exam_slots (class_id)",
+    "CREATE INDEX IF NOT EXISTS ix_exam_slots_scheduled_at ON exam_slots (scheduled_at)",
+    "CREATE INDEX IF NOT EXISTS ix_holidays_class_id ON holidays (class_id)",
+    "CREATE INDEX IF NOT EXISTS ix_holidays_start_date ON holidays (start_date)",
+    "CREATE INDEX IF NOT EXISTS ix_homework_lesson_id ON homework (lesson_id)",
+    "CREATE INDEX IF NOT EXISTS ix_lesson_progress_lesson_id ON lesson_progress (lesson_id)",
+    "CREATE INDEX IF NOT EXISTS ix_lesson_progress_user_id ON lesson_progress (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_live_sessions_class_id ON live_sessions (class_id)",
+    "CREATE INDEX IF NOT EXISTS ix_live_sessions_course_id ON live_sessions (course_id)",
+    "CREATE INDEX IF NOT EXISTS ix_live_sessions_scheduled_at ON live_sessions (scheduled_at)",
+    "CREATE INDEX IF NOT EXISTS ix_payments_payment_status ON payments (payment_status)",
+    "CREATE INDEX IF NOT EXISTS ix_payments_user_id ON payments (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_subscriptions_user_id ON subscriptions (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_attendance_live_session_id ON attendance (live_session_id)",
+    "CREATE INDEX IF NOT EXISTS ix_attendance_user_id ON attendance (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_attendance_confirmations_live_session_id ON attendance_confirmations (live_session_id)",
+    "CREATE INDEX IF NOT EXISTS ix_attendance_confirmations_user_id ON attendance_confirmations (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_exam_bookings_user_id ON exam_bookings (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_homework_submissions_homework_id ON homework_submissions (homework_id)",
+    "CREATE INDEX IF NOT EXISTS ix_homework_submissions_student_id ON homework_submissions (student_id)",
+    "CREATE INDEX IF NOT EXISTS ix_certificates_user_id ON certificates (user_id)",
+]
+
+# Früher bei jedem Start (init_db) bzw. per Seed-Skript ausgeführt
+LEGACY_DDL = [
+    # init_db / migrate_add_user_profile_fields
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS date_of_birth date",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS newsletter_opt_in boolean NOT NULL DEFAULT false",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS whatsapp_opt_in boolean NOT NULL DEFAULT false",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS whatsapp_channel_opt_in boolean NOT NULL DEFAULT false",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS onboarding_completed boolean NOT NULL DEFAULT false",
+    "ALTER TABLE lessons ADD COLUMN IF NOT EXISTS section_title varchar(255)",
+    # migrate_add_class_courses
+    "CREATE INDEX IF NOT EXISTS idx_class_courses_class_id ON class_courses(class_id)",
+    "CREATE INDEX IF NOT EXISTS idx_class_courses_course_id ON class_courses(course_id)",
+    # migrate_add_class_schedule_fields
+    "ALTER TABLE class_schedules ADD COLUMN IF NOT EXISTS frequency integer NOT NULL DEFAULT 1",
+    "ALTER TABLE class_schedules ADD COLUMN IF NOT EXISTS location_id uuid",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'class_schedules'::regclass
+              AND contype = 'f'
+              AND conkey = ARRAY[(
+                  SELECT attnum FROM pg_attribute
+                  WHERE attrelid = 'class_schedules'::regclass AND attname = 'location_id'
+              )]
+        ) THEN
+            ALTER TABLE class_schedules
+                ADD CONSTRAINT fk_class_schedules_location_id
+                FOREIGN KEY (location_id) REFERENCES locations(id) ON DELETE SET NULL;
+        END IF;
+    END $$;
+    """,
+    # Upserts auf lesson_progress brauchen (user_id, lesson_id) UNIQUE.
+    # Ältere DBs: Duplikate entfernen (abgeschlossene/neueste Zeile bleibt)
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_user_lesson') THEN
+            DELETE FROM lesson_progress a
+            USING lesson_progress b
+            WHERE a.user_id = b.user_id
+              AND a.lesson_id = b.lesson_id
+              AND (COALESCE(a.completed, false), COALESCE(a.updated_at, 'epoch'), a.id)
+                < (COALESCE(b.completed, false), COALESCE(b.updated_at, 'epoch'), b.id);
+            ALTER TABLE lesson_progress
+                ADD CONSTRAINT uq_user_lesson UNIQUE (user_id, lesson_id);
+        END IF;
+    END $$;
+    """,
+]
+
+
+def upgrade() -> None:
+    # CREATE TYPE kennt kein IF NOT EXISTS
+    for name, values in ENUMS.items():
+        labels = ", ".join(f"'{value}'" for value in values)
+        op.execute(
+            "DO $$ BEGIN "
+            f"IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = '{name}') THEN "
+            f"CREATE TYPE {name} AS ENUM ({labels}); "
+            "END IF; END $$"
+        )
+    for statement in TABLES + INDEXES + LEGACY_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    # Die Baseline wird nicht zurückgerollt (würde alle Daten löschen)
+    pass
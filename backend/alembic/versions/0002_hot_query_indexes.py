@@ -0,0 +1,53 @@
+"""Indizes für die häufigsten Abfragen
+
+Composite- und Partial-Indizes für Dashboard, Kalender, Anwesenheit,
+Zugriffsprüfung und Umsatz-Statistiken. Werden CONCURRENTLY angelegt,
+damit users/lessons/live_sessions während des Deploys beschreibbar
+bleiben.
+
+Bereits abgedeckt (kein neuer Index nötig):
+- lesson_progress (user_id, lesson_id): uq_user_lesson
+- attendance_confirmations (user_id, live_session_id): uq_user_session_confirmation
+- class_enrollments ohne Status-Filter: ix_class_enrollments_class_id,
+  ix_class_enrollments_user_id (Basis-Schema) und uq_user_class; die
+  beiden Partial-Indizes hier gelten nur für status = 'ACTIVE'
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    "ix_live_sessions_class_scheduled_active":
+        "ON live_sessions (class_id, scheduled_at) WHERE is_cancelled = false",
+    "ix_attendance_session_user":
+        "ON attendance (live_session_id, user_id)",
+    "ix_class_enrollments_user_active":
+        "ON class_enrollments (user_id, class_id) WHERE status = 'ACTIVE'",
+    "ix_class_enrollments_class_active":
+        "ON class_enrollments (class_id, user_id) WHERE status = 'ACTIVE'",
+    "ix_payments_status_paid_at":
+        "ON payments (payment_status, paid_at)",
+    "ix_lessons_course_order":
+        'ON lessons (course_id, "order")',
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY geht nicht innerhalb einer Transaktion
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
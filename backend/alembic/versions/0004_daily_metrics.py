@@ -0,0 +1,42 @@
+"""Tabelle daily_metrics (Tages-Kennzahlen für Admin-Trends)
+
+Wird vom Hintergrund-Task in app/services/daily_metrics.py befüllt;
+beim ersten Lauf wird ab dem ersten User nachgerechnet.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_metrics",
+        sa.Column("day", sa.Date(), primary_key=True, comment="Tag (UTC)"),
+        sa.Column("revenue", sa.Numeric(12, 2), nullable=False, server_default="0",
+                  comment="Umsatz abgeschlossener Zahlungen (nach paid_at)"),
+        sa.Column("new_students", sa.Integer(), nullable=False, server_default="0",
+                  comment="Neue Studenten (nach created_at)"),
+        sa.Column("verified_users", sa.Integer(), nullable=False, server_default="0",
+                  comment="Davon mit bestätigter E-Mail"),
+        sa.Column("sessions_held", sa.Integer(), nullable=False, server_default="0",
+                  comment="Nicht abgesagte, bereits begonnene Live-Sessions"),
+        sa.Column("attendance_records", sa.Integer(), nullable=False, server_default="0",
+                  comment="Erfasste Anwesenheiten in Sessions des Tages"),
+        sa.Column("attendance_present", sa.Integer(), nullable=False, server_default="0",
+                  comment="Davon anwesend"),
+        sa.Column("lessons_completed", sa.Integer(), nullable=False, server_default="0",
+                  comment="Abgeschlossene Lektionen (nach completed_at)"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True, comment="Zuletzt neu berechnet"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_metrics")
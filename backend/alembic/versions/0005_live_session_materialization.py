@@ -0,0 +1,43 @@
+"""Live-Sessions aus dem Stundenplan materialisieren
+
+live_sessions.class_schedule_id merkt sich den Stundenplan-Eintrag, aus
+dem eine Session erzeugt wurde. Der partielle Unique-Index auf
+(class_id, scheduled_at) gilt nur für diese Sessions, bereits vorhandene
+manuelle Sessions (auch doppelte) bleiben unberührt.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: Datenbanken, deren Basis-Schema noch aus den aktuellen
+    # Modellen erzeugt wurde, haben die Spalte schon
+    op.execute(
+        "ALTER TABLE live_sessions ADD COLUMN IF NOT EXISTS class_schedule_id uuid "
+        "REFERENCES class_schedules (id) ON DELETE SET NULL"
+    )
+    op.execute(
+        "COMMENT ON COLUMN live_sessions.class_schedule_id IS "
+        "'Aus diesem Stundenplan-Eintrag erzeugt (null = manuell)'"
+    )
+
+    # CREATE INDEX CONCURRENTLY geht nicht innerhalb einer Transaktion
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_live_sessions_class_scheduled "
+            "ON live_sessions (class_id, scheduled_at) WHERE class_schedule_id IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_live_sessions_class_scheduled")
+    op.drop_column("live_sessions", "class_schedule_id")
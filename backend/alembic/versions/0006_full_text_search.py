@@ -0,0 +1,115 @@
+"""Volltextsuche für Kurse und Lektionen, Trigramm-Suche für Benutzer
+
+- warizmy_normalize_arabic(text): entfernt Tashkeel (Harakat, Tanwin,
+  Shadda, Sukun, hochgestelltes Alif) und Tatweel, vereinheitlicht
+  أ إ آ ٱ zu ا
+- warizmy_search_vector(text, gewicht): HTML-Tags entfernen, deutsch
+  gestemmt + arabisch gestemmt (normalisiert), gewichtet
+- warizmy_search_query(text): Suchbegriff (websearch-Syntax) für beide
+  Sprachen
+- courses.search_vector / lessons.search_vector: generierte Spalten
+  (STORED) mit GIN-Index
+- pg_trgm-GIN-Indizes auf users (email, first_name, last_name) für die
+  ILIKE-Suche und die Tippfehler-tolerante Schnellsuche im Admin
+
+Die generierten Spalten schreiben courses und lessons einmal neu (kurze
+exklusive Sperre, beide Tabellen sind klein). Wird eine der Funktionen
+geändert, müssen die Spalten neu erzeugt werden (DROP + ADD COLUMN).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+# Tashkeel U+064B-U+065F, hochgestelltes Alif U+0670, Tatweel U+0640
+# werden entfernt (kein Gegenstück in translate), Alif-Formen -> ا
+ARABIC_STRIP = "".join(chr(c) for c in range(0x064B, 0x0660)) + "ٰـ"
+ARABIC_ALEF = "أإآٱ"
+
+# Einzelne Statements: asyncpg führt pro execute() nur eines aus
+FUNCTIONS = (
+    f"""
+CREATE OR REPLACE FUNCTION warizmy_normalize_arabic(value text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(coalesce(value, ''), '{ARABIC_ALEF}{ARABIC_STRIP}', '{"ا" * len(ARABIC_ALEF)}')
+$$
+""",
+    """
+CREATE OR REPLACE FUNCTION warizmy_search_vector(value text, weight "char") RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT setweight(
+        to_tsvector('german', doc) || to_tsvector('arabic', warizmy_normalize_arabic(doc)),
+        weight
+    )
+    FROM (SELECT regexp_replace(coalesce(value, ''), '<[^>]+>', ' ', 'g') AS doc) AS plain
+$$
+""",
+    """
+CREATE OR REPLACE FUNCTION warizmy_search_query(value text) RETURNS tsquery
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT websearch_to_tsquery('german', value)
+        || websearch_to_tsquery('arabic', warizmy_normalize_arabic(value))
+$$
+""",
+)
+
+COURSE_VECTOR = (
+    "warizmy_search_vector(title, 'A') || "
+    "warizmy_search_vector(short_description, 'B') || "
+    "warizmy_search_vector(description, 'C')"
+)
+
+LESSON_VECTOR = (
+    "warizmy_search_vector(title, 'A') || "
+    "warizmy_search_vector(section_title, 'B') || "
+    "warizmy_search_vector(description, 'B') || "
+    "warizmy_search_vector(text_content, 'C')"
+)
+
+INDEXES = {
+    "ix_courses_search_vector": "ON courses USING gin (search_vector)",
+    "ix_lessons_search_vector": "ON lessons USING gin (search_vector)",
+    "ix_users_email_trgm": "ON users USING gin (email gin_trgm_ops)",
+    "ix_users_first_name_trgm": "ON users USING gin (first_name gin_trgm_ops)",
+    "ix_users_last_name_trgm": "ON users USING gin (last_name gin_trgm_ops)",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for statement in FUNCTIONS:
+        op.execute(statement)
+    # IF NOT EXISTS: Datenbanken, deren Basis-Schema noch aus den aktuellen
+    # Modellen erzeugt wurde, haben die Spalten schon
+    op.execute(
+        "ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({COURSE_VECTOR}) STORED"
+    )
+    op.execute(
+        "ALTER TABLE lessons ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({LESSON_VECTOR}) STORED"
+    )
+
+    # CREATE INDEX CONCURRENTLY geht nicht innerhalb einer Transaktion
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute("ALTER TABLE lessons DROP COLUMN IF EXISTS search_vector")
+    op.execute("ALTER TABLE courses DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS warizmy_search_query(text)")
+    op.execute("DROP FUNCTION IF EXISTS warizmy_search_vector(text, \"char\")")
+    op.execute("DROP FUNCTION IF EXISTS warizmy_normalize_arabic(text)")
+    # pg_trgm bleibt installiert (kann von anderen Objekten genutzt werden)
@@ -0,0 +1,82 @@
+"""live_sessions.is_generated: erzeugte Sessions unabhängig vom Eintrag
+
+Bisher galt class_schedule_id IS NOT NULL als "aus dem Stundenplan
+erzeugt". Wird ein Eintrag gelöscht, setzt der Fremdschlüssel die Spalte
+auf NULL – die abgesagten Sessions galten danach als manuell und
+blockierten den Termin für einen neu angelegten Eintrag.
+
+- is_generated (NOT NULL, Standard false), nachgetragen für alle
+  Sessions mit class_schedule_id und für verwaiste, vom Stundenplan
+  abgesagte Sessions (sofern der Termin nicht schon belegt ist)
+- Unique-Index auf (class_id, scheduled_at) jetzt WHERE is_generated
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Wie SCHEDULE_CHANGED_REASON in app/services/schedule_recurrence.py
+SCHEDULE_CHANGED_REASON = "Stundenplan geändert"
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE live_sessions ADD COLUMN IF NOT EXISTS is_generated boolean "
+        "NOT NULL DEFAULT false"
+    )
+    op.execute(
+        "COMMENT ON COLUMN live_sessions.is_generated IS "
+        "'Aus dem Stundenplan erzeugt (bleibt gesetzt, wenn der Eintrag gelöscht wird)'"
+    )
+    op.execute(
+        "UPDATE live_sessions SET is_generated = true "
+        "WHERE class_schedule_id IS NOT NULL AND NOT is_generated"
+    )
+    op.execute(
+        f"""
+UPDATE live_sessions AS s SET is_generated = true
+WHERE s.class_schedule_id IS NULL
+  AND NOT s.is_generated
+  AND s.is_cancelled
+  AND s.cancel_reason = '{SCHEDULE_CHANGED_REASON}'
+  AND NOT EXISTS (
+      SELECT 1 FROM live_sessions AS o
+      WHERE o.class_id = s.class_id
+        AND o.scheduled_at = s.scheduled_at
+        AND o.id <> s.id
+        AND (o.is_generated OR o.class_schedule_id IS NOT NULL OR o.id < s.id)
+  )
+"""
+    )
+    op.execute(
+        "COMMENT ON COLUMN live_sessions.class_schedule_id IS "
+        "'Stundenplan-Eintrag der Session (null = manuell oder Eintrag gelöscht)'"
+    )
+
+    # CREATE INDEX CONCURRENTLY geht nicht innerhalb einer Transaktion
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_live_sessions_class_generated "
+            "ON live_sessions (class_id, scheduled_at) WHERE is_generated"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_live_sessions_class_scheduled")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_live_sessions_class_scheduled "
+            "ON live_sessions (class_id, scheduled_at) WHERE class_schedule_id IS NOT NULL"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_live_sessions_class_generated")
+    op.execute(
+        "COMMENT ON COLUMN live_sessions.class_schedule_id IS "
+        "'Aus diesem Stundenplan-Eintrag erzeugt (null = manuell)'"
+    )
+    op.drop_column("live_sessions", "is_generated")
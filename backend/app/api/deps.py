@@ -5,18 +5,17 @@
 # (Authentifizierung, Datenbankzugriff, etc.)
 
 from typing import Optional, List
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, READ_METHODS
 from app.core.security import decode_token
 from app.models.user import User, UserRole
-from app.models.class_.class_model import Class, ClassEnrollment, class_courses
-from app.models.enrollment.enrollment import Enrollment, EnrollmentStatus
-from app.models.course.course import Course
+from app.services.auth_context import accessible_course_ids_query
+from app.services.principal_cache import get_principal
 
 # =========================================
 # Security Schema (Bearer Token)
@@ -28,11 +27,14 @@ security = HTTPBearer(auto_error=False)
 # Aktuellen Benutzer abrufen
 # =========================================
 async def get_current_user(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ) -> User:
     """
     Extrahiert und validiert den aktuellen Benutzer aus dem JWT Token.
+    Bei GET-Requests über die Read-Only Session, sonst über get_db.
     
     Verwendung:
         @router.get("/me")
@@ -77,9 +79,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Benutzer aus Datenbank laden
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalar_one_or_none()
+    # Benutzer aus Cache oder Datenbank laden
+    if request.method in READ_METHODS:
+        user = await get_principal(read_db, user_id)
+    else:
+        user = await get_principal(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -101,8 +105,10 @@ async def get_current_user(
 # Optionaler Benutzer (für öffentliche Routen)
 # =========================================
 async def get_current_user_optional(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
 ) -> Optional[User]:
     """
     Wie get_current_user, aber gibt None zurück statt Exception.
@@ -112,7 +118,7 @@ async def get_current_user_optional(
         return None
     
     try:
-        return await get_current_user(credentials, db)
+        return await get_current_user(request, credentials, db, read_db)
     except HTTPException:
         return None
 
@@ -188,43 +194,18 @@ async def check_course_access(
        - Über course_id (Legacy)
        - Über class_courses Many-to-Many
     
+    In Routen mit AuthContext stattdessen auth.can_access_course verwenden.
+    
     Returns:
         True wenn Zugriff erlaubt, False sonst
     """
-    # 1. Direkte Kurs-Einschreibung prüfen
-    direct_enrollment = await db.execute(
-        select(Enrollment)
-        .where(Enrollment.user_id == user_id)
-        .where(Enrollment.course_id == course_id)
-        .where(Enrollment.status == EnrollmentStatus.ACTIVE)
-    )
-    if direct_enrollment.scalar_one_or_none():
-        return True
-    
-    # 2. Klassen-Einschreibung prüfen (Legacy: course_id)
-    class_enrollment_legacy = await db.execute(
-        select(ClassEnrollment)
-        .join(Class, ClassEnrollment.class_id == Class.id)
-        .where(ClassEnrollment.user_id == user_id)
-        .where(Class.course_id == course_id)
-        .where(ClassEnrollment.status == "active")
+    courses = accessible_course_ids_query(user_id)
+    result = await db.execute(
+        select(courses.c.course_id)
+        .where(courses.c.course_id == course_id)
+        .limit(1)
     )
-    if class_enrollment_legacy.scalar_one_or_none():
-        return True
-    
-    # 3. Klassen-Einschreibung prüfen (Many-to-Many: class_courses)
-    class_enrollment_m2m = await db.execute(
-        select(ClassEnrollment)
-        .join(Class, ClassEnrollment.class_id == Class.id)
-        .join(class_courses, Class.id == class_courses.c.class_id)
-        .where(ClassEnrollment.user_id == user_id)
-        .where(class_courses.c.course_id == course_id)
-        .where(ClassEnrollment.status == "active")
-    )
-    if class_enrollment_m2m.scalar_one_or_none():
-        return True
-    
-    return False
+    return result.first() is not None
 
 
 async def get_user_courses(
@@ -234,44 +215,11 @@ async def get_user_courses(
     """
     Gibt alle Kurs-IDs zurück, auf die ein User Zugriff hat.
     
-    Kombiniert:
+    Kombiniert (in einer Abfrage):
     - Direkte Einschreibungen (Enrollments)
     - Klassen-Einschreibungen (Legacy course_id)
     - Klassen-Einschreibungen (Many-to-Many class_courses)
     """
-    course_ids = set()
-    
-    # 1. Direkte Einschreibungen
-    direct_result = await db.execute(
-        select(Enrollment.course_id)
-        .where(Enrollment.user_id == user_id)
-        .where(Enrollment.status == EnrollmentStatus.ACTIVE)
-    )
-    for row in direct_result:
-        course_ids.add(str(row[0]))
-    
-    # 2. Klassen mit Legacy course_id
-    class_legacy_result = await db.execute(
-        select(Class.course_id)
-        .join(ClassEnrollment, Class.id == ClassEnrollment.class_id)
-        .where(ClassEnrollment.user_id == user_id)
-        .where(ClassEnrollment.status == "active")
-        .where(Class.course_id.isnot(None))
-    )
-    for row in class_legacy_result:
-        if row[0]:
-            course_ids.add(str(row[0]))
-    
-    # 3. Klassen mit Many-to-Many courses
-    class_m2m_result = await db.execute(
-        select(class_courses.c.course_id)
-        .join(Class, class_courses.c.class_id == Class.id)
-        .join(ClassEnrollment, Class.id == ClassEnrollment.class_id)
-        .where(ClassEnrollment.user_id == user_id)
-        .where(ClassEnrollment.status == "active")
-    )
-    for row in class_m2m_result:
-        course_ids.add(str(row[0]))
-    
-    return list(course_ids)
-
+    courses = accessible_course_ids_query(user_id)
+    result = await db.execute(select(courses.c.course_id))
+    return [str(row[0]) for row in result.all() if row[0]]
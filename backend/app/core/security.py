@@ -3,8 +3,12 @@
 # ===========================================
 # JWT-Handling, Passwort-Hashing und Auth-Hilfsfunktionen
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -16,13 +20,23 @@ settings = get_settings()
 # =========================================
 # Passwort-Hashing mit bcrypt
 # =========================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Kosten (rounds) kommen aus der Config; Hashes mit anderer Kostenstufe
+# gelten als veraltet und werden beim Login transparent neu gehasht.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Überprüft ein Klartext-Passwort gegen einen Hash.
     
+    Blockiert ca. 250 ms - in async Routen verify_password_async verwenden.
+    
     Args:
         plain_password: Das eingegebene Passwort
         hashed_password: Der gespeicherte Hash
@@ -37,6 +51,8 @@ def get_password_hash(password: str) -> str:
     """
     Erstellt einen bcrypt-Hash für ein Passwort.
     
+    Blockiert ca. 250 ms - in async Routen hash_password_async verwenden.
+    
     Args:
         password: Das zu hashende Passwort
         
@@ -46,6 +62,133 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# =========================================
+# bcrypt außerhalb des Event-Loops
+# =========================================
+class PasswordHasher:
+    """
+    Führt bcrypt in einem begrenzten Thread-Pool aus (bcrypt gibt die GIL
+    frei, Threads reichen daher). Sind bereits max_pending Aufrufe in
+    Arbeit oder in der Warteschlange, wird sofort mit 429 + Retry-After
+    abgelehnt, statt den Worker mit einem Login-Ansturm zu blockieren.
+    
+    Massen-Hashing (Import) läuft im selben Pool, belegt aber höchstens
+    bulk_workers Threads gleichzeitig; der Rest bleibt für Logins frei.
+    """
+    
+    def __init__(self, workers: int, max_pending: int, retry_after: int, bulk_workers: int = 1):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.bulk_workers = max(1, min(bulk_workers, workers - 1 if workers > 1 else 1))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._bulk_slots: Optional[asyncio.Semaphore] = None
+        # Metriken
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+    
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Zu viele gleichzeitige Anfragen, bitte gleich erneut versuchen",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        
+        return await self._execute(fn, *args)
+    
+    async def _execute(self, fn, *args):
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += time.perf_counter() - started
+    
+    async def run_bulk(self, fn, items: List) -> List:
+        """
+        fn für viele Werte ausführen, höchstens bulk_workers gleichzeitig.
+        
+        Wartet statt abzulehnen; zählt mit (höchstens bulk_workers) gegen
+        max_pending, Logins sehen also nur einen kleineren Pool.
+        """
+        if self._bulk_slots is None:
+            self._bulk_slots = asyncio.Semaphore(self.bulk_workers)
+        
+        async def one(item):
+            async with self._bulk_slots:
+                return await self._execute(fn, item)
+        
+        return await asyncio.gather(*[one(item) for item in items])
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "bulk_workers": self.bulk_workers,
+            "max_pending": self.max_pending,
+            "in_flight": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+    bulk_workers=settings.PASSWORD_HASH_BULK_WORKERS,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    bcrypt-Hash erstellen, ohne den Event-Loop zu blockieren.
+    
+    Raises:
+        HTTPException 429: Wenn der Hash-Pool ausgelastet ist
+    """
+    return await password_hasher.run(pwd_context.hash, password)
+
+
+async def hash_passwords_bulk(passwords: List[str]) -> List[str]:
+    """
+    Viele bcrypt-Hashes erstellen (z.B. Benutzer-Import).
+    
+    Läuft im Login-Pool auf höchstens PASSWORD_HASH_BULK_WORKERS Threads,
+    Logins behalten die übrigen.
+    
+    Returns:
+        Hashes in der Reihenfolge der Passwörter
+    """
+    return await password_hasher.run_bulk(pwd_context.hash, passwords)
+
+
+async def verify_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Passwort prüfen, ohne den Event-Loop zu blockieren.
+    
+    Returns:
+        (gültig, neuer_hash) - neuer_hash ist gesetzt, wenn der gespeicherte
+        Hash nicht der konfigurierten Kostenstufe entspricht und ersetzt
+        werden sollte
+    
+    Raises:
+        HTTPException 429: Wenn der Hash-Pool ausgelastet ist
+    """
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 # =========================================
 # JWT Token Handling
 # =========================================
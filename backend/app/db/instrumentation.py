@@ -0,0 +1,247 @@
+# ===========================================
+# WARIZMY EDUCATION - SQL Instrumentation
+# ===========================================
+# Zählt pro Request alle SQL-Statements, die DB-Zeit und die Wartezeit
+# auf eine Pool-Verbindung (SQLAlchemy Engine-Events + ContextVar).
+#
+# - Die Middleware in main.py startet/beendet die Messung pro Request
+#   und setzt den Server-Timing Header
+# - Werte pro Route landen im Metrik-Sink (GET /admin/system/metrics)
+# - N+1-Warnung: mehr als SQL_QUERY_WARN_THRESHOLD Statements oder
+#   dieselbe Statement-Form öfter als SQL_REPEATED_STATEMENT_THRESHOLD mal
+# - Query-Budgets: @query_budget(n) direkt am Router-Handler, wird zur
+#   Laufzeit geloggt und von tests/test_query_budgets.py geprüft
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("sql_query_stats", default=None)
+
+# Platzhalter ($1, $2::UUID, :name, Literale) für die Statement-Form
+_PARAM_RE = re.compile(r"\$\d+(::\w+(\[\])?)?|:\w+|'[^']*'|\b\d+\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement ohne Parameter und mit zusammengefassten IN-Listen"""
+    shape = _PARAM_RE.sub("?", statement)
+    shape = _IN_LIST_RE.sub("(?...)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+# =========================================
+# Messwerte eines Requests
+# =========================================
+class QueryStats:
+    """SQL-Messwerte eines einzelnen Requests"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def most_repeated(self):
+        """(Statement-Form, Anzahl) der häufigsten Form oder None"""
+        top = self.shapes.most_common(1)
+        return top[0] if top else None
+
+    def server_timing(self, total_seconds: Optional[float] = None) -> str:
+        """Wert für den Server-Timing Header"""
+        parts = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries"',
+            f"db-pool;dur={self.pool_wait_seconds * 1000:.1f}",
+        ]
+        if total_seconds is not None:
+            parts.append(f"app;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def start_request_stats() -> tuple:
+    """Messung für den aktuellen Request starten (Token für reset)"""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def stop_request_stats(token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# =========================================
+# Engine-Events
+# =========================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if started:
+        stats.db_seconds += time.perf_counter() - started.pop()
+    stats.query_count += 1
+    stats.shapes[statement_shape(statement)] += 1
+
+
+def instrument_engine(async_engine) -> None:
+    """Statement-Zähler an eine (Async-)Engine hängen"""
+    sync_engine = async_engine.sync_engine
+    if getattr(sync_engine, "_query_stats_instrumented", False):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    sync_engine._query_stats_instrumented = True
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool, der die Wartezeit beim Auschecken einer Verbindung misst"""
+
+    def _do_get(self):
+        stats = _current.get()
+        if stats is None:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats.pool_wait_seconds += time.perf_counter() - started
+
+
+# =========================================
+# Query-Budgets
+# =========================================
+def query_budget(max_queries: int):
+    """
+    Maximale Anzahl SQL-Statements für einen Endpoint festlegen
+    (bei warmem Principal-Cache, unabhängig von der Datenmenge).
+
+    Verwendung:
+        @router.get("/me/enrollments")
+        @query_budget(4)
+        async def get_my_enrollments(...):
+            ...
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+def endpoint_budget(request) -> Optional[int]:
+    """Query-Budget des aufgerufenen Endpoints (oder None)"""
+    endpoint = request.scope.get("endpoint")
+    return getattr(endpoint, "__query_budget__", None)
+
+
+# =========================================
+# Metrik-Sink (pro Route, prozesslokal)
+# =========================================
+class QueryMetrics:
+    """Aggregierte SQL-Werte pro Route"""
+
+    def __init__(self):
+        self._routes: Dict[str, dict] = {}
+        self.warnings = 0
+        self.budget_violations = 0
+        # Zusätzliche Empfänger (route, stats), z.B. der Budget-Check
+        self.listeners: List[Callable[[str, QueryStats], None]] = []
+
+    def record(self, route: str, stats: QueryStats, total_seconds: float) -> None:
+        for listener in self.listeners:
+            listener(route, stats)
+        entry = self._routes.get(route)
+        if entry is None:
+            entry = self._routes[route] = {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_seconds": 0.0,
+                "pool_wait_seconds": 0.0,
+                "total_seconds": 0.0,
+            }
+        entry["requests"] += 1
+        entry["queries"] += stats.query_count
+        entry["max_queries"] = max(entry["max_queries"], stats.query_count)
+        entry["db_seconds"] += stats.db_seconds
+        entry["pool_wait_seconds"] += stats.pool_wait_seconds
+        entry["total_seconds"] += total_seconds
+
+    def check(
+        self,
+        route: str,
+        stats: QueryStats,
+        max_queries: int,
+        max_repeated: int,
+    ) -> bool:
+        """N+1-Verdacht loggen, True wenn eine Schwelle überschritten wurde"""
+        repeated = stats.most_repeated()
+        too_many = max_queries > 0 and stats.query_count > max_queries
+        too_repeated = max_repeated > 0 and repeated and repeated[1] > max_repeated
+        if not (too_many or too_repeated):
+            return False
+
+        self.warnings += 1
+        print(
+            f"[SQL] {route}: {stats.query_count} Abfragen, "
+            f"{stats.db_seconds * 1000:.1f} ms DB, "
+            f"{stats.pool_wait_seconds * 1000:.1f} ms Pool-Wartezeit"
+        )
+        if repeated and repeated[1] > 1:
+            print(f"[SQL]   {repeated[1]}x {repeated[0][:300]}")
+        return True
+
+    def check_budget(self, route: str, stats: QueryStats, budget: Optional[int]) -> bool:
+        """Überschreitung des deklarierten Query-Budgets loggen"""
+        if budget is None or stats.query_count <= budget:
+            return False
+        self.budget_violations += 1
+        print(f"[SQL] {route}: Query-Budget überschritten ({stats.query_count} > {budget})")
+        return True
+
+    def stats(self, limit: int = 20) -> dict:
+        """Routen mit den meisten Abfragen pro Request zuerst"""
+        routes = []
+        for route, entry in self._routes.items():
+            requests = entry["requests"]
+            routes.append({
+                "route": route,
+                "requests": requests,
+                "avg_queries": round(entry["queries"] / requests, 1),
+                "max_queries": entry["max_queries"],
+                "avg_db_ms": round(entry["db_seconds"] / requests * 1000, 1),
+                "avg_pool_wait_ms": round(entry["pool_wait_seconds"] / requests * 1000, 1),
+                "avg_total_ms": round(entry["total_seconds"] / requests * 1000, 1),
+            })
+        routes.sort(key=lambda r: r["avg_queries"], reverse=True)
+        return {
+            "warnings": self.warnings,
+            "budget_violations": self.budget_violations,
+            "routes": routes[:limit],
+        }
+
+
+query_metrics = QueryMetrics()
+
+
+def route_name(request) -> str:
+    """'GET /api/courses/{slug}' statt der konkreten URL"""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        endpoint = request.scope.get("endpoint")
+        path = getattr(endpoint, "__name__", None) or request.url.path
+    return f"{request.method} {path}"
@@ -0,0 +1,260 @@
+# ===========================================
+# WARIZMY EDUCATION - Read-Replica Routing
+# ===========================================
+# Verteilt Read-Only Sessions (get_read_db) auf Lese-Replikate.
+#
+# - DATABASE_REPLICA_URLS: kommaseparierte Replikat-URLs (leer = aus)
+# - Auswahl reihum (Round-Robin) über alle gesunden Replikate
+# - Health-Check im Hintergrund (SELECT 1), fehlerhafte Replikate
+#   werden übersprungen, bis sie wieder antworten
+# - Read-your-writes: nach einem eigenen Schreibzugriff liest ein User
+#   für REPLICA_STICKY_SECONDS vom Primary (Replikations-Verzögerung).
+#   Die Liste liegt pro Worker im Speicher; get_db verteilt Schreibzugriffe
+#   per NOTIFY an alle Worker (cache_invalidation, Art "sticky")
+# - Kein gesundes Replikat: automatisch Primary
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import text, exc
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.core.security import decode_token
+from app.db.instrumentation import TimedQueuePool
+
+# Max. gemerkte User für Read-your-writes
+_STICKY_MAX_ENTRIES = 50000
+
+
+def to_async_url(url: str) -> str:
+    """postgresql:// zu postgresql+asyncpg:// konvertieren"""
+    return url.strip().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+def request_user_key(request) -> Optional[str]:
+    """
+    User-ID aus dem Bearer-Token des Requests (ohne Datenbank).
+    Wird pro Request in request.state gemerkt.
+    """
+    if request is None:
+        return None
+    if hasattr(request.state, "user_key"):
+        return request.state.user_key
+
+    user_key = None
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        payload = decode_token(auth[7:].strip())
+        if payload and payload.get("type") == "access":
+            user_key = payload.get("sub")
+    request.state.user_key = user_key
+    return user_key
+
+
+class Replica:
+    """Ein Lese-Replikat mit eigener Engine und Session Factory"""
+
+    def __init__(self, url: str, pool_size: int, max_overflow: int):
+        self.url = url
+        self.engine = create_async_engine(
+            to_async_url(url),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=30,
+            pool_recycle=1800,
+            pool_pre_ping=True,
+            poolclass=TimedQueuePool,
+        ).execution_options(postgresql_readonly=True)
+        self.session_factory = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+            info={"read_only": True, "replica": True},
+        )
+        self.healthy = True
+        self.failures = 0
+        self.sessions = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        # Host/Port/DB ohne Zugangsdaten
+        return self.url.rsplit("@", 1)[-1]
+
+
+class ReplicaRouter:
+    """
+    Wählt für lesende Requests eine Session Factory aus:
+    Replikat (reihum, nur gesunde) oder Primary.
+    """
+
+    def __init__(
+        self,
+        primary_factory,
+        replica_urls: List[str],
+        sticky_seconds: int = 5,
+        health_check_timeout: float = 2.0,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+    ):
+        self.primary_factory = primary_factory
+        self.replicas = [
+            Replica(url, pool_size, max_overflow) for url in replica_urls if url.strip()
+        ]
+        self.sticky_seconds = sticky_seconds
+        self.health_check_timeout = health_check_timeout
+        self._next = 0
+        self._sticky: "OrderedDict[str, float]" = OrderedDict()
+        # Metriken
+        self.primary_sessions = 0
+        self.sticky_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # -----------------------------------------
+    # Read-your-writes
+    # -----------------------------------------
+    def mark_write(self, user_key: Optional[str]) -> None:
+        """User hat geschrieben: für sticky_seconds vom Primary lesen"""
+        if not self.enabled or not user_key or self.sticky_seconds <= 0:
+            return
+        self._sticky[user_key] = time.monotonic() + self.sticky_seconds
+        self._sticky.move_to_end(user_key)
+        while len(self._sticky) > _STICKY_MAX_ENTRIES:
+            self._sticky.popitem(last=False)
+
+    def is_sticky(self, user_key: Optional[str]) -> bool:
+        if not user_key:
+            return False
+        until = self._sticky.get(user_key)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            self._sticky.pop(user_key, None)
+            return False
+        return True
+
+    # -----------------------------------------
+    # Auswahl
+    # -----------------------------------------
+    def choose(self, user_key: Optional[str] = None) -> Optional[Replica]:
+        """
+        Nächstes gesundes Replikat (Round-Robin) oder None für Primary.
+        """
+        if not self.enabled:
+            return None
+        if self.is_sticky(user_key):
+            self.sticky_reads += 1
+            return None
+
+        count = len(self.replicas)
+        for offset in range(count):
+            replica = self.replicas[(self._next + offset) % count]
+            if replica.healthy:
+                self._next = (self._next + offset + 1) % count
+                return replica
+        return None
+
+    def session(self, user_key: Optional[str] = None) -> AsyncSession:
+        """Neue Read-Only Session (Replikat oder Primary)"""
+        replica = self.choose(user_key)
+        if replica is None:
+            self.primary_sessions += 1
+            return self.primary_factory()
+        replica.sessions += 1
+        session = replica.session_factory()
+        session.info["replica_name"] = replica.name
+        return session
+
+    def report_failure(self, session: AsyncSession, error: Exception) -> None:
+        """
+        Verbindungsfehler während eines Requests: Replikat bis zum
+        nächsten erfolgreichen Health-Check aus der Rotation nehmen.
+        """
+        name = session.info.get("replica_name")
+        if not name or not is_connection_error(error):
+            return
+        for replica in self.replicas:
+            if replica.name == name:
+                self._mark_unhealthy(replica, error)
+
+    # -----------------------------------------
+    # Health-Checks
+    # -----------------------------------------
+    def _mark_unhealthy(self, replica: Replica, error: Exception) -> None:
+        if replica.healthy:
+            print(f"[ReplicaRouter] Replikat {replica.name} nicht erreichbar: {error}")
+        replica.healthy = False
+        replica.failures += 1
+        replica.last_error = str(error)[:200]
+
+    async def check_replica(self, replica: Replica) -> bool:
+        try:
+            async def ping():
+                async with replica.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+
+            await asyncio.wait_for(ping(), timeout=self.health_check_timeout)
+        except Exception as e:
+            self._mark_unhealthy(replica, e)
+            return False
+
+        if not replica.healthy:
+            print(f"[ReplicaRouter] Replikat {replica.name} wieder verfügbar")
+        replica.healthy = True
+        replica.last_error = None
+        return True
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check_replica(r) for r in self.replicas))
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "primary_sessions": self.primary_sessions,
+            "sticky_reads": self.sticky_reads,
+            "sticky_users": len(self._sticky),
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "sessions": r.sessions,
+                    "failures": r.failures,
+                    "last_error": r.last_error,
+                }
+                for r in self.replicas
+            ],
+        }
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Verbindungs- statt Abfragefehler (Replikat down, Netzwerk)?"""
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, exc.DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (exc.InterfaceError, exc.OperationalError))
+
+
+async def run_replica_health_checks(
+    router: ReplicaRouter,
+    stop_event: asyncio.Event,
+    interval: int,
+) -> None:
+    """Hintergrund-Task: Replikate periodisch prüfen"""
+    while not stop_event.is_set():
+        await router.check_all()
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
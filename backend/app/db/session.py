@@ -4,11 +4,18 @@
 # Asynchrone Datenbankverbindung mit SQLAlchemy 2.0
 # Verwendet asyncpg für PostgreSQL
 
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from pathlib import Path
 from typing import AsyncGenerator
 
 from app.core.config import get_settings
-from app.db.base import Base
+from app.db.replicas import ReplicaRouter, request_user_key
+from app.db.instrumentation import TimedQueuePool, instrument_engine
+from app.services.cache_invalidation import publish_invalidation, register_invalidation_handler
 from sqlalchemy import text
 
 # Settings laden
@@ -30,10 +37,16 @@ engine = create_async_engine(
     max_overflow=10,       # Maximale zusätzliche Verbindungen
     pool_timeout=30,       # Timeout beim Warten auf Verbindung
     pool_recycle=1800,     # Verbindungen nach 30 Min recyceln
+    # Misst die Wartezeit auf freie Verbindungen (Server-Timing)
+    poolclass=TimedQueuePool,
     # Nur in Debug-Modus SQL loggen
     echo=settings.DEBUG,
 )
 
+# Abfragen pro Request zählen (siehe app.db.instrumentation)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_engine(engine)
+
 # =========================================
 # Session Factory erstellen
 # =========================================
@@ -46,14 +59,75 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# =========================================
+# Read-Only Session Factory
+# =========================================
+# Teilt den Pool mit der Haupt-Engine, startet aber READ ONLY
+# Transaktionen (asyncpg: BEGIN READ ONLY).
+read_engine = engine.execution_options(postgresql_readonly=True)
+
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+    info={"read_only": True},
+)
+
+# HTTP-Methoden ohne Schreibzugriff
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Lese-Replikate (optional, DATABASE_REPLICA_URLS)
+replica_router = ReplicaRouter(
+    ReadSessionLocal,
+    settings.DATABASE_REPLICA_URLS.split(","),
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    for replica in replica_router.replicas:
+        instrument_engine(replica.engine)
+
+# Read-your-writes gilt in allen Workern: der schreibende Worker meldet
+# den User per NOTIFY cache_invalidated (mit dem Commit zugestellt)
+STICKY_KIND = "sticky"
+register_invalidation_handler(STICKY_KIND, replica_router.mark_write, lambda: None)
+
+
+# =========================================
+# Schreibzugriffe erkennen (Read-your-writes)
+# =========================================
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    # select(...).from_statement(insert(...).returning(...)) meldet
+    # is_insert False, die DML steckt in statement.element
+    statement = orm_execute_state.statement
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+        or isinstance(getattr(statement, "element", None), UpdateBase)
+    ):
+        orm_execute_state.session.info["wrote"] = True
+
+
 # =========================================
 # Dependency für FastAPI
 # =========================================
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency für FastAPI Routen.
     Erstellt eine neue Datenbanksession für jeden Request.
     
+    Hat der Request geschrieben, liest der User danach für kurze Zeit
+    vom Primary statt von einem Replikat (Read-your-writes). Die anderen
+    Worker erfahren das per NOTIFY (Zustellung wenige ms nach dem Commit).
+    
     Verwendung:
         @router.get("/users")
         async def get_users(db: AsyncSession = Depends(get_db)):
@@ -62,8 +136,12 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
+            user_key = request_user_key(request) if session.info.get("wrote") else None
+            if user_key and replica_router.enabled:
+                await publish_invalidation(STICKY_KIND, user_key, db=session)
             # Bei erfolgreicher Ausführung committen
             await session.commit()
+            replica_router.mark_write(user_key)
         except Exception:
             # Bei Fehler zurückrollen
             await session.rollback()
@@ -73,31 +151,93 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency für lesende Routen (GET).
+    
+    Öffnet eine READ ONLY Transaktion und spart den Commit am Ende:
+    die Transaktion wird beim Schließen nur zurückgerollt, die
+    Verbindung geht sofort zurück in den Pool.
+    
+    Sind Replikate konfiguriert, kommt die Session reihum von einem
+    gesunden Replikat (Fallback: Primary).
+    
+    Verwendung:
+        @router.get("/courses")
+        async def list_courses(db: AsyncSession = Depends(get_read_db)):
+            ...
+    """
+    async with replica_router.session(request_user_key(request)) as session:
+        try:
+            yield session
+        except Exception as e:
+            replica_router.report_failure(session, e)
+            raise
+        finally:
+            # Kein Commit nötig, Verbindung freigeben
+            await session.close()
+
+
 # =========================================
 # Initialisierung (für Startup)
 # =========================================
+# Schema-Änderungen laufen als Alembic-Migrationen VOR dem Deploy
+# (alembic upgrade head). Beim Start wird nur die Version verglichen.
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+def expected_schema_heads() -> set:
+    """Head-Revision(en) der mitgelieferten Migrationen"""
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory(str(ALEMBIC_DIR)).get_heads())
+
+
+async def current_schema_revisions() -> set:
+    """Angewendete Revision(en) laut alembic_version (leer = keine)"""
+    async with engine.connect() as conn:
+        exists = (await conn.execute(text("SELECT to_regclass('alembic_version')"))).scalar()
+        if exists is None:
+            return set()
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        return {row[0] for row in result}
+
+
 async def init_db():
     """
-    Datenbank initialisieren.
-    Erstellt alle Tabellen basierend auf den Modellen.
+    Datenbank beim Start prüfen (eine Verbindung, keine DDL).
     
-    HINWEIS: In Produktion Alembic für Migrationen verwenden!
+    Vergleicht die angewendete Alembic-Revision mit der des Codes.
+    DB_SCHEMA_CHECK: 'off', 'warn' (nur loggen) oder 'strict'
+    (Start abbrechen, wenn Migrationen fehlen).
+    
+    Raises:
+        RuntimeError: Bei 'strict' und veraltetem Schema
     """
-    async with engine.begin() as conn:
-        # Alle Tabellen erstellen (nur wenn nicht vorhanden)
-        await conn.run_sync(Base.metadata.create_all)
-
-        # -------------------------------------------------------------------
-        # Minimal "auto migrations" (idempotent)
-        # Since this repo currently doesn't ship Alembic migrations, we apply
-        # additive schema changes here so existing Railway DBs get new columns.
-        # -------------------------------------------------------------------
-        await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS date_of_birth date"))
-        await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS newsletter_opt_in boolean NOT NULL DEFAULT false"))
-        await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS whatsapp_opt_in boolean NOT NULL DEFAULT false"))
-        await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS whatsapp_channel_opt_in boolean NOT NULL DEFAULT false"))
-        await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS onboarding_completed boolean NOT NULL DEFAULT false"))
-        await conn.execute(text("ALTER TABLE lessons ADD COLUMN IF NOT EXISTS section_title varchar(255)"))
+    if settings.DB_SCHEMA_CHECK == "off":
+        return
+    
+    expected = expected_schema_heads()
+    current = await current_schema_revisions()
+    
+    if current == expected:
+        print(f"✅ Datenbankschema aktuell (Revision {', '.join(sorted(current))})")
+        return
+    
+    from alembic.script import ScriptDirectory
+    known = {rev.revision for rev in ScriptDirectory(str(ALEMBIC_DIR)).walk_revisions()}
+    if current and not current <= known:
+        # Rolling Deploy: die DB ist bereits auf einem neueren Stand
+        print(f"ℹ️  Datenbankschema neuer als der Code ({', '.join(sorted(current))})")
+        return
+    
+    message = (
+        f"Datenbankschema veraltet: {', '.join(sorted(current)) or 'keine Revision'} "
+        f"statt {', '.join(sorted(expected))} - 'alembic upgrade head' ausführen"
+    )
+    if settings.DB_SCHEMA_CHECK == "strict":
+        raise RuntimeError(message)
+    print(f"⚠️  {message}")
 
 
 async def close_db():
@@ -105,5 +245,6 @@ async def close_db():
     Datenbankverbindung schließen.
     Wird beim Herunterfahren der Anwendung aufgerufen.
     """
+    await replica_router.dispose()
     await engine.dispose()
 
@@ -4,8 +4,10 @@
 # Einstiegspunkt für die Backend-API
 # Konfiguriert CORS, Router und Lifecycle-Events
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
@@ -13,11 +15,30 @@ from fastapi.responses import JSONResponse
 from app.core.config import get_settings
 
 # DB: Datenbankverbindung
-from app.db.session import init_db, close_db
+from app.db.session import init_db, close_db, replica_router
+from app.db.replicas import run_replica_health_checks
+from app.db.instrumentation import (
+    endpoint_budget,
+    query_metrics,
+    route_name,
+    start_request_stats,
+    stop_request_stats,
+)
+
+# Services: HTTP-Caching öffentlicher Endpunkte
+from app.services.http_cache import apply_cache_policy
 
 # API: Router importieren (neu strukturiert)
 from app.api.v1 import api_router
 
+# Services: Hintergrund-Flush für Video-Heartbeats, Tages-Kennzahlen,
+# Stundenplan-Sessions, CMS-Snapshot, Cache-Invalidierung
+from app.services.progress_buffer import run_progress_flusher
+from app.services.daily_metrics import run_daily_metrics_rollup
+from app.services.schedule_recurrence import run_schedule_materializer
+from app.services.content_snapshot import run_content_listener
+from app.services.cache_invalidation import run_invalidation_listener
+
 # Settings laden
 settings = get_settings()
 
@@ -29,8 +50,10 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     """
     Anwendungs-Lifecycle verwalten.
-    - Startup: Datenbank initialisieren
-    - Shutdown: Verbindungen schließen
+    - Startup: Datenbank initialisieren, Heartbeat-Flusher,
+      Kennzahlen-Rollup, Stundenplan-Sessions, CMS-Snapshot,
+      Cache-Invalidierung und Replikat-Health-Checks starten
+    - Shutdown: Heartbeats flushen, Verbindungen schließen
     """
     # === STARTUP ===
     print("🚀 WARIZMY Education Backend startet...")
@@ -39,11 +62,60 @@ async def lifespan(app: FastAPI):
     await init_db()
     print("✅ Datenbankverbindung hergestellt")
     
+    # Heartbeat-Puffer periodisch in die Datenbank schreiben
+    flusher_stop = asyncio.Event()
+    flusher_task = asyncio.create_task(run_progress_flusher(flusher_stop))
+    
+    # Tages-Kennzahlen (daily_metrics) für Admin-Trends nachführen
+    rollup_stop = asyncio.Event()
+    rollup_task = asyncio.create_task(run_daily_metrics_rollup(rollup_stop))
+    
+    # LiveSessions aus dem Stundenplan für die nächsten Wochen anlegen
+    schedule_stop = asyncio.Event()
+    schedule_task = asyncio.create_task(run_schedule_materializer(schedule_stop))
+    
+    # CMS-Inhalte im Speicher halten, auf NOTIFY content_changed neu laden
+    content_stop = asyncio.Event()
+    content_task = asyncio.create_task(run_content_listener(content_stop))
+    
+    # Prozesslokale Caches aller Worker über NOTIFY cache_invalidated leeren
+    invalidation_stop = asyncio.Event()
+    invalidation_task = asyncio.create_task(run_invalidation_listener(invalidation_stop))
+    
+    # Lese-Replikate überwachen (nur wenn konfiguriert)
+    replica_stop = asyncio.Event()
+    replica_task = None
+    if replica_router.enabled:
+        replica_task = asyncio.create_task(run_replica_health_checks(
+            replica_router, replica_stop, settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS
+        ))
+        print(f"✅ {len(replica_router.replicas)} Lese-Replikat(e) konfiguriert")
+    
     yield  # Anwendung läuft
     
     # === SHUTDOWN ===
     print("🛑 WARIZMY Education Backend wird heruntergefahren...")
     
+    # Letzte gepufferte Heartbeats schreiben
+    flusher_stop.set()
+    await flusher_task
+    
+    rollup_stop.set()
+    await rollup_task
+    
+    schedule_stop.set()
+    await schedule_task
+    
+    content_stop.set()
+    await content_task
+    
+    invalidation_stop.set()
+    await invalidation_task
+    
+    replica_stop.set()
+    if replica_task:
+        await replica_task
+    
     # Datenbankverbindung schließen
     await close_db()
     print("✅ Datenbankverbindung geschlossen")
@@ -81,6 +153,46 @@ app.add_middleware(
 )
 
 
+# =========================================
+# SQL-Instrumentierung (Server-Timing + N+1-Warnung)
+# =========================================
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    @app.middleware("http")
+    async def sql_instrumentation(request: Request, call_next):
+        """Abfragen, DB-Zeit und Pool-Wartezeit pro Request messen"""
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            stop_request_stats(token)
+        total = time.perf_counter() - started
+        
+        response.headers["Server-Timing"] = stats.server_timing(total)
+        if stats.query_count:
+            route = route_name(request)
+            query_metrics.record(route, stats, total)
+            query_metrics.check(
+                route,
+                stats,
+                settings.SQL_QUERY_WARN_THRESHOLD,
+                settings.SQL_REPEATED_STATEMENT_THRESHOLD,
+            )
+            query_metrics.check_budget(route, stats, endpoint_budget(request))
+        return response
+
+
+# =========================================
+# HTTP-Caching (ETag/304, Cache-Control, Surrogate-Key)
+# =========================================
+if settings.HTTP_CACHE_ENABLED:
+    @app.middleware("http")
+    async def http_cache(request: Request, call_next):
+        """Antworten von Endpunkten mit @cache_policy cachebar machen"""
+        response = await call_next(request)
+        return await apply_cache_policy(request, response)
+
+
 # =========================================
 # API Router einbinden (vereinfacht!)
 # =========================================
@@ -11,7 +11,7 @@
 # ├── class_/           → Klassen-Modelle  
 # │   └── class_model.py → Class, ClassTeacher, ClassSchedule, ClassEnrollment
 # ├── enrollment/       → Einschreibungs-Modelle
-# │   └── enrollment.py → Enrollment, LessonProgress
+# │   └── enrollment.py → Enrollment, LessonProgress, CourseProgress
 # ├── payment/          → Zahlungs-Modelle
 # │   └── payment.py    → Payment, Subscription, Invoice
 # ├── session/          → Session-Modelle
@@ -28,7 +28,8 @@
 # │   └── daily_guidance.py → DailyGuidance
 # └── system/           → System-Modelle
 #     ├── holiday.py    → Holiday
-#     └── email_log.py  → EmailLog
+#     ├── email_log.py  → EmailLog
+#     └── daily_metrics.py → DailyMetrics
 
 # User (bleibt im Root-Verzeichnis)
 from app.models.user import User, UserRole
@@ -44,6 +45,7 @@ from app.models.course import (
     Lesson,
     ContentType,
     QuestionType,
+    LESSON_CONTENT_GROUP,
     Homework,
     HomeworkSubmission,
 )
@@ -62,6 +64,7 @@ from app.models.class_ import (
 from app.models.enrollment import (
     Enrollment,
     LessonProgress,
+    CourseProgress,
     EnrollmentType,
     EnrollmentStatus,
 )
@@ -115,6 +118,7 @@ from app.models.system import (
     EmailLog,
     EmailType,
     EmailStatus,
+    DailyMetrics,
 )
 
 # Alle Modelle für Alembic-Migrationen verfügbar machen
@@ -137,6 +141,7 @@ __all__ = [
     "Lesson",
     "ContentType",
     "QuestionType",
+    "LESSON_CONTENT_GROUP",
     "Homework",
     "HomeworkSubmission",
     
@@ -155,6 +160,7 @@ __all__ = [
     # =========================================
     "Enrollment",
     "LessonProgress",
+    "CourseProgress",
     "EnrollmentType",
     "EnrollmentStatus",
     
@@ -204,10 +210,11 @@ __all__ = [
     "Location",
     
     # =========================================
-    # System (Feiertage, E-Mail-Logs)
+    # System (Feiertage, E-Mail-Logs, Tages-Kennzahlen)
     # =========================================
     "Holiday",
     "EmailLog",
     "EmailType",
     "EmailStatus",
+    "DailyMetrics",
 ]
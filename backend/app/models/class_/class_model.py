@@ -5,7 +5,7 @@
 
 import uuid
 from datetime import datetime, date, time
-from sqlalchemy import Column, String, Boolean, DateTime, Date, Time, Integer, ForeignKey, Enum, UniqueConstraint, Table
+from sqlalchemy import Column, String, Boolean, DateTime, Date, Time, Integer, ForeignKey, Enum, UniqueConstraint, Table, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -450,6 +450,21 @@ class ClassEnrollment(Base):
     __table_args__ = (
         # Ein Student kann nur einmal in einer Klasse sein
         UniqueConstraint('user_id', 'class_id', name='uq_user_class'),
+        # Aktive Klassen eines Users / aktive Studenten einer Klasse.
+        # Abfragen ohne Status-Filter (alle Studenten einer Klasse,
+        # Einschreibung eines Users in einer Klasse) nutzen die
+        # vollständigen Indizes ix_class_enrollments_class_id/_user_id
+        # (index=True) und uq_user_class.
+        Index(
+            'ix_class_enrollments_user_active',
+            'user_id', 'class_id',
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+        Index(
+            'ix_class_enrollments_class_active',
+            'class_id', 'user_id',
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
     )
     
     # =========================================
@@ -15,6 +15,7 @@ from app.models.course.lesson import (
     Lesson,
     ContentType,
     QuestionType,
+    LESSON_CONTENT_GROUP,
 )
 from app.models.course.homework import (
     Homework,
@@ -32,6 +33,7 @@ __all__ = [
     "Lesson",
     "ContentType",
     "QuestionType",
+    "LESSON_CONTENT_GROUP",
     # Homework
     "Homework",
     "HomeworkSubmission",
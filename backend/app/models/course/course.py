@@ -5,9 +5,9 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, Numeric, Enum, Table, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, Numeric, Enum, Table, ForeignKey, Computed, Index, literal
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, query_expression, deferred
 import enum
 
 from app.db.base import Base
@@ -231,6 +231,27 @@ class Course(Base):
         comment="Veröffentlicht am"
     )
     
+    # =========================================
+    # Volltextsuche (Migration 0006, app/services/search.py)
+    # =========================================
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "warizmy_search_vector(title, 'A') || "
+            "warizmy_search_vector(short_description, 'B') || "
+            "warizmy_search_vector(description, 'C')",
+            persisted=True,
+        ),
+        comment="Suchindex: Titel, Kurzbeschreibung, Beschreibung (deutsch + arabisch)"
+    ))
+    
+    # =========================================
+    # Indizes
+    # =========================================
+    __table_args__ = (
+        Index('ix_courses_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+    
     # =========================================
     # Relationships
     # =========================================
@@ -272,19 +293,15 @@ class Course(Base):
     )
     
     # =========================================
-    # Properties
+    # Lektions-Kennzahlen (Projektion)
     # =========================================
-    @property
-    def lesson_count(self) -> int:
-        """Anzahl der Lektionen"""
-        return len(self.lessons) if self.lessons else 0
-    
-    @property
-    def total_duration_minutes(self) -> int:
-        """Gesamtdauer aller Lektionen in Minuten"""
-        if not self.lessons:
-            return 0
-        return sum(l.duration_minutes or 0 for l in self.lessons)
+    # Werden in der Abfrage per with_expression() berechnet, ohne die
+    # Lektionen zu laden (siehe with_lesson_stats in routers/courses.py).
+    # Ohne with_expression() sind beide 0.
+    lesson_count = query_expression(literal(0))
+    total_duration_minutes = query_expression(literal(0))
+    # Hervorgehobener Ausschnitt bei einer Suche (sonst None)
+    search_headline = query_expression()
     
     def __repr__(self) -> str:
         return f"<Course {self.title}>"
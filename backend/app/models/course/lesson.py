@@ -5,9 +5,9 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, ForeignKey, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, ForeignKey, Index, Computed, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 import enum
 
 from app.db.base import Base
@@ -27,6 +27,13 @@ class ContentType(str, enum.Enum):
     MIXED = "mixed"           # Kombination aus mehreren
 
 
+# Große Inhaltsspalten (Beschreibung, Text, Materialien, Quiz) werden nur
+# geladen, wenn sie gebraucht werden: Kurslisten und Gliederungen lesen
+# nur die kleinen Spalten. Detail-Abfragen laden sie mit
+# .options(undefer_group(LESSON_CONTENT_GROUP)).
+LESSON_CONTENT_GROUP = "content"
+
+
 class Lesson(Base):
     """
     Lektion-Modell.
@@ -70,11 +77,11 @@ class Lesson(Base):
         index=True,
         comment="URL-Slug"
     )
-    description = Column(
+    description = deferred(Column(
         Text, 
         nullable=True,
         comment="Beschreibung (HTML/Markdown)"
-    )
+    ), group=LESSON_CONTENT_GROUP)
     section_title = Column(
         String(255),
         nullable=True,
@@ -119,11 +126,11 @@ class Lesson(Base):
     # =========================================
     # Text-Inhalt (Rich Text / HTML)
     # =========================================
-    text_content = Column(
+    text_content = deferred(Column(
         Text,
         nullable=True,
         comment="Formatierter Text-Inhalt (HTML)"
-    )
+    ), group=LESSON_CONTENT_GROUP)
     
     # =========================================
     # PDF
@@ -142,12 +149,12 @@ class Lesson(Base):
     # =========================================
     # Materialien (als JSON Array)
     # =========================================
-    materials = Column(
+    materials = deferred(Column(
         JSONB, 
         nullable=True,
         default=list,
         comment="Materialien [{name, url, type}]"
-    )
+    ), group=LESSON_CONTENT_GROUP)
     
     # =========================================
     # Quiz (eingebettet als JSON)
@@ -167,12 +174,12 @@ class Lesson(Base):
         default=70,
         comment="Bestehensgrenze in %"
     )
-    quiz_questions = Column(
+    quiz_questions = deferred(Column(
         JSONB, 
         nullable=True,
         default=list,
         comment="Quiz-Fragen [{question_text, question_type, options, correct_answer, explanation}]"
-    )
+    ), group=LESSON_CONTENT_GROUP)
     
     # =========================================
     # Einstellungen
@@ -203,6 +210,30 @@ class Lesson(Base):
         comment="Zuletzt aktualisiert"
     )
     
+    # =========================================
+    # Volltextsuche (Migration 0006, app/services/search.py)
+    # =========================================
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "warizmy_search_vector(title, 'A') || "
+            "warizmy_search_vector(section_title, 'B') || "
+            "warizmy_search_vector(description, 'B') || "
+            "warizmy_search_vector(text_content, 'C')",
+            persisted=True,
+        ),
+        comment="Suchindex: Titel, Sektion, Beschreibung, Text (deutsch + arabisch)"
+    ))
+    
+    # =========================================
+    # Indizes
+    # =========================================
+    __table_args__ = (
+        # Lektionen eines Kurses in Reihenfolge
+        Index('ix_lessons_course_order', 'course_id', 'order'),
+        Index('ix_lessons_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+    
     # =========================================
     # Relationships
     # =========================================
@@ -6,6 +6,7 @@
 from app.models.enrollment.enrollment import (
     Enrollment,
     LessonProgress,
+    CourseProgress,
     EnrollmentType,
     EnrollmentStatus,
 )
@@ -13,6 +14,7 @@ from app.models.enrollment.enrollment import (
 __all__ = [
     "Enrollment",
     "LessonProgress",
+    "CourseProgress",
     "EnrollmentType",
     "EnrollmentStatus",
 ]
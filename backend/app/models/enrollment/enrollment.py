@@ -1,7 +1,7 @@
 # ===========================================
 # WARIZMY EDUCATION - Enrollment Models
 # ===========================================
-# Modelle für Seminar-Einschreibungen und Lektions-Fortschritt
+# Modelle für Seminar-Einschreibungen, Lektions- und Kursfortschritt
 
 import uuid
 from datetime import datetime
@@ -238,3 +238,87 @@ class LessonProgress(Base):
     def __repr__(self) -> str:
         return f"<LessonProgress user={self.user_id} lesson={self.lesson_id}>"
 
+
+
+class CourseProgress(Base):
+    """
+    Kurs-Fortschritt (denormalisiert).
+    
+    Eine Zeile pro (User, Kurs) mit vorberechneten Zählern, damit
+    Dashboards den Fortschritt per Primärschlüssel lesen können statt
+    LessonProgress bei jedem Aufruf neu zu aggregieren.
+    Wird von app.services.progress transaktional gepflegt.
+    """
+    __tablename__ = "course_progress"
+    
+    # =========================================
+    # Primärschlüssel (User + Kurs)
+    # =========================================
+    user_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("users.id", ondelete="CASCADE"), 
+        primary_key=True,
+        comment="Benutzer-ID"
+    )
+    course_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("courses.id", ondelete="CASCADE"), 
+        primary_key=True,
+        index=True,
+        comment="Kurs-ID"
+    )
+    
+    # =========================================
+    # Zähler
+    # =========================================
+    completed_count = Column(
+        Integer, 
+        default=0,
+        nullable=False,
+        comment="Abgeschlossene Lektionen"
+    )
+    total_count = Column(
+        Integer, 
+        default=0,
+        nullable=False,
+        comment="Lektionen im Kurs (alle, auch unveröffentlichte)"
+    )
+    
+    # =========================================
+    # Navigation
+    # =========================================
+    last_lesson_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("lessons.id", ondelete="SET NULL"), 
+        nullable=True,
+        comment="Zuletzt abgeschlossene Lektion"
+    )
+    next_lesson_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("lessons.id", ondelete="SET NULL"), 
+        nullable=True,
+        comment="Nächste offene Lektion (nach Lesson.order)"
+    )
+    
+    # =========================================
+    # Timestamps
+    # =========================================
+    updated_at = Column(
+        DateTime, 
+        default=datetime.utcnow, 
+        onupdate=datetime.utcnow,
+        comment="Zuletzt neu berechnet"
+    )
+    
+    # =========================================
+    # Properties
+    # =========================================
+    @property
+    def percentage(self) -> int:
+        """Fortschritt in Prozent"""
+        if not self.total_count:
+            return 0
+        return int((self.completed_count / self.total_count) * 100)
+    
+    def __repr__(self) -> str:
+        return f"<CourseProgress user={self.user_id} course={self.course_id} {self.completed_count}/{self.total_count}>"
@@ -6,7 +6,7 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, String, Boolean, DateTime, Numeric, ForeignKey, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Numeric, ForeignKey, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -133,6 +133,14 @@ class Payment(Base):
         comment="Erstellt am"
     )
     
+    # =========================================
+    # Indizes
+    # =========================================
+    __table_args__ = (
+        # Umsatz-Auswertungen (Status + Zeitraum)
+        Index('ix_payments_status_paid_at', 'payment_status', 'paid_at'),
+    )
+    
     # =========================================
     # Relationships
     # =========================================
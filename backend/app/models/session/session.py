@@ -5,7 +5,7 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Enum, UniqueConstraint, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Enum, UniqueConstraint, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -82,6 +82,19 @@ class LiveSession(Base):
         nullable=True,
         comment="Lektion-ID (optional)"
     )
+    class_schedule_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("class_schedules.id", ondelete="SET NULL"), 
+        nullable=True,
+        comment="Stundenplan-Eintrag der Session (null = manuell oder Eintrag gelöscht)"
+    )
+    is_generated = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        server_default=text('false'),
+        comment="Aus dem Stundenplan erzeugt (bleibt gesetzt, wenn der Eintrag gelöscht wird)"
+    )
     
     # =========================================
     # Session-Details
@@ -182,6 +195,26 @@ class LiveSession(Base):
         comment="Erstellt am"
     )
     
+    # =========================================
+    # Indizes
+    # =========================================
+    __table_args__ = (
+        # Kommende Sessions einer Klasse (Dashboard, Kalender)
+        Index(
+            'ix_live_sessions_class_scheduled_active',
+            'class_id', 'scheduled_at',
+            postgresql_where=text('is_cancelled = false'),
+        ),
+        # Aus dem Stundenplan erzeugte Sessions: ein Termin pro Klasse und
+        # Zeitpunkt (macht das Materialisieren idempotent)
+        Index(
+            'uq_live_sessions_class_generated',
+            'class_id', 'scheduled_at',
+            unique=True,
+            postgresql_where=text('is_generated'),
+        ),
+    )
+    
     # =========================================
     # Relationships
     # =========================================
@@ -398,6 +431,8 @@ class Attendance(Base):
     __table_args__ = (
         # Ein User kann nur eine Anwesenheit pro Session haben
         UniqueConstraint('user_id', 'live_session_id', name='uq_user_session_attendance'),
+        # Anwesenheitsliste einer Session
+        Index('ix_attendance_session_user', 'live_session_id', 'user_id'),
     )
     
     # =========================================
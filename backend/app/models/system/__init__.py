@@ -1,7 +1,7 @@
 # ===========================================
 # WARIZMY EDUCATION - System Models Package
 # ===========================================
-# System-bezogene Modelle (Feiertage, E-Mail-Logs)
+# System-bezogene Modelle (Feiertage, E-Mail-Logs, Tages-Kennzahlen)
 
 from app.models.system.holiday import Holiday
 from app.models.system.email_log import (
@@ -9,11 +9,13 @@ from app.models.system.email_log import (
     EmailType,
     EmailStatus,
 )
+from app.models.system.daily_metrics import DailyMetrics
 
 __all__ = [
     "Holiday",
     "EmailLog",
     "EmailType",
     "EmailStatus",
+    "DailyMetrics",
 ]
 
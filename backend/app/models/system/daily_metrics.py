@@ -0,0 +1,103 @@
+# ===========================================
+# WARIZMY EDUCATION - Daily Metrics Model
+# ===========================================
+# Tägliche Kennzahlen (Rollup) für Trends im Admin-Dashboard.
+# Wird von app/services/daily_metrics.py inkrementell gepflegt,
+# nicht direkt beschreiben.
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, Date, DateTime, Numeric
+
+from app.db.base import Base
+
+
+class DailyMetrics(Base):
+    """
+    Kennzahlen eines Tages (UTC).
+
+    Eine Zeile pro Tag, aggregiert aus Zahlungen, Benutzern,
+    Live-Sessions, Anwesenheit und Lektions-Fortschritt.
+    """
+    __tablename__ = "daily_metrics"
+
+    # =========================================
+    # Primärschlüssel
+    # =========================================
+    day = Column(
+        Date,
+        primary_key=True,
+        comment="Tag (UTC)"
+    )
+
+    # =========================================
+    # Umsatz & Benutzer
+    # =========================================
+    revenue = Column(
+        Numeric(12, 2),
+        nullable=False,
+        default=0,
+        comment="Umsatz abgeschlossener Zahlungen (nach paid_at)"
+    )
+    new_students = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Neue Studenten (nach created_at)"
+    )
+    verified_users = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Davon mit bestätigter E-Mail"
+    )
+
+    # =========================================
+    # Unterricht
+    # =========================================
+    sessions_held = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Nicht abgesagte, bereits begonnene Live-Sessions"
+    )
+    attendance_records = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Erfasste Anwesenheiten in Sessions des Tages"
+    )
+    attendance_present = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Davon anwesend"
+    )
+    lessons_completed = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Abgeschlossene Lektionen (nach completed_at)"
+    )
+
+    # =========================================
+    # Timestamps
+    # =========================================
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        comment="Zuletzt neu berechnet"
+    )
+
+    # =========================================
+    # Properties
+    # =========================================
+    @property
+    def attendance_rate(self) -> float:
+        """Anteil anwesend an allen erfassten Anwesenheiten (0.0 - 1.0)"""
+        if not self.attendance_records:
+            return 0.0
+        return round(self.attendance_present / self.attendance_records, 3)
+
+    def __repr__(self) -> str:
+        return f"<DailyMetrics {self.day} revenue={self.revenue}>"
@@ -5,7 +5,7 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Date
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Date, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -166,6 +166,18 @@ class User(Base):
         comment="Zuletzt aktualisiert"
     )
     
+    # =========================================
+    # Indizes
+    # =========================================
+    __table_args__ = (
+        # Keyset-Pagination der Admin-Benutzerliste (neueste zuerst)
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+        # Trigramme (pg_trgm) für ILIKE-Suche und Schnellsuche im Admin
+        Index('ix_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+        Index('ix_users_first_name_trgm', 'first_name', postgresql_using='gin', postgresql_ops={'first_name': 'gin_trgm_ops'}),
+        Index('ix_users_last_name_trgm', 'last_name', postgresql_using='gin', postgresql_ops={'last_name': 'gin_trgm_ops'}),
+    )
+    
     # =========================================
     # Relationships
     # =========================================
@@ -5,15 +5,18 @@
 
 from typing import List, Optional
 from datetime import datetime, date, time
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, union
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel, EmailStr
 import uuid
 import os
 
-from app.db.session import get_db
+from app.core.config import get_settings
+from app.db.session import get_db, get_read_db, replica_router
+from app.db.instrumentation import query_budget, query_metrics
 from app.models import (
     User,
     UserRole,
@@ -34,10 +37,30 @@ from app.models import (
     Certificate,
     Holiday,
     Course,
+    EnrollmentType,
 )
 from app.models.class_.class_model import class_courses
-from app.routers.auth import get_current_user, require_role, get_password_hash
-
+from app.core.security import hash_password_async, password_hasher
+from app.routers.auth import get_current_user, require_role
+from app.services.auth_context import invalidate_auth_context
+from app.services.principal_cache import invalidate_principal, principal_cache
+from app.services.progress_buffer import progress_buffer
+from app.services.admin_stats import admin_stats_snapshot
+from app.services.daily_metrics import load_trends
+from app.services.exports import EXPORTS, build_export
+from app.services.http_cache import purge_cache_keys, surrogate_index
+from app.services.content_snapshot import content_store
+from app.services.lesson_cache import lesson_read_cache
+from app.services.cache_invalidation import stats as cache_invalidation_stats
+from app.services.user_import import parse_user_csv, prepare_import, import_users
+from app.services.class_enrollment import enroll_in_class
+from app.services.schedule_recurrence import request_materialization
+from app.services.progress import get_user_course_progress
+from app.services.pagination import keyset_page, next_page_cursor
+from app.services.search import user_typeahead
+
+# Settings & Router
+settings = get_settings()
 router = APIRouter()
 
 
@@ -89,6 +112,7 @@ async def setup_admin(
             existing_user.is_active = True
             existing_user.email_verified = True
             await db.commit()
+            await invalidate_principal(existing_user.id)
             return {
                 "status": "upgraded",
                 "message": "Benutzer zu Admin upgegraded!",
@@ -98,7 +122,7 @@ async def setup_admin(
     # Neuen Admin erstellen
     admin_user = User(
         email=admin_email,
-        password_hash=get_password_hash(admin_password),
+        password_hash=await hash_password_async(admin_password),
         first_name="Admin",
         last_name="Warizmy",
         role=UserRole.ADMIN,
@@ -149,6 +173,12 @@ class ClassCreate(BaseModel):
     course_ids: Optional[List[str]] = None  # Mehrere Kurse
 
 
+class BulkClassEnrollment(BaseModel):
+    """Schema für Sammel-Einschreibung in eine Klasse"""
+    user_ids: List[str]
+    enrollment_type: EnrollmentType = EnrollmentType.ONE_TIME
+
+
 class ClassScheduleCreate(BaseModel):
     """Schema für Stundenplan-Erstellung"""
     day_of_week: int
@@ -216,64 +246,89 @@ class CertificateIssue(BaseModel):
 # Benutzer-Verwaltung
 # =========================================
 @router.get("/users")
+@query_budget(3)
 async def list_users(
+    response: Response,
     role: Optional[str] = None,
     search: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 50,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Alle Benutzer auflisten mit Klassen und Kursen"""
+    """
+    Alle Benutzer auflisten mit Klassen und Kursen (neueste zuerst).
+    
+    Keyset-Pagination: Cursor der nächsten Seite steht im Header
+    X-Next-Cursor (fehlt auf der letzten Seite).
+    """
     query = select(User)
     
     if role:
         query = query.where(User.role == UserRole(role))
     
     if search:
+        # ILIKE '%x%' nutzt die Trigramm-Indizes (pg_trgm, Migration 0006)
         query = query.where(
             (User.email.ilike(f"%{search}%")) |
             (User.first_name.ilike(f"%{search}%")) |
             (User.last_name.ilike(f"%{search}%"))
         )
     
-    query = query.order_by(User.created_at.desc()).offset(skip).limit(limit)
+    result = await db.execute(keyset_page(query, User, cursor, limit))
+    users, next_cursor = next_page_cursor(result.scalars().all(), limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    result = await db.execute(query)
-    users = result.scalars().all()
+    # Klassen und Kurse aller Benutzer der Seite in EINER Abfrage
+    user_ids = [u.id for u in users]
+    classes_by_user = {uid: {} for uid in user_ids}
+    courses_by_user = {uid: {} for uid in user_ids}
     
-    # Für jeden Benutzer Klassen und Kurse laden
-    user_list = []
-    for u in users:
-        # Klassen-Einschreibungen mit Kursen laden (Legacy + Many-to-Many)
-        enrollments_result = await db.execute(
-            select(ClassEnrollment)
-            .options(
-                selectinload(ClassEnrollment.class_).selectinload(Class.courses),
-                selectinload(ClassEnrollment.class_).selectinload(Class.course)  # Legacy 1:1
-            )
-            .where(ClassEnrollment.user_id == u.id)
+    if user_ids:
+        page_class_ids = (
+            select(ClassEnrollment.class_id)
+            .where(ClassEnrollment.user_id.in_(user_ids))
         )
-        enrollments = enrollments_result.scalars().all()
-        
-        # Klassen und Kurse extrahieren
-        classes = []
-        courses_set = set()
-        for e in enrollments:
-            if e.class_:
-                classes.append({
-                    "id": str(e.class_.id),
-                    "name": e.class_.name,
-                    "status": e.status.value
-                })
-                # Legacy 1:1 Beziehung (Dropdown im Admin)
-                if e.class_.course:
-                    courses_set.add((str(e.class_.course.id), e.class_.course.title))
-                # Many-to-Many Beziehung
-                for c in e.class_.courses:
-                    courses_set.add((str(c.id), c.title))
+        # Kurse einer Klasse: Legacy 1:1 (Dropdown im Admin) + Many-to-Many
+        class_course_links = union(
+            select(Class.id.label("class_id"), Class.course_id.label("course_id"))
+            .where(Class.id.in_(page_class_ids))
+            .where(Class.course_id.isnot(None)),
+            select(class_courses.c.class_id, class_courses.c.course_id)
+            .where(class_courses.c.class_id.in_(page_class_ids)),
+        ).subquery()
         
-        courses = [{"id": cid, "title": ctitle} for cid, ctitle in courses_set]
+        rows = await db.execute(
+            select(
+                ClassEnrollment.user_id,
+                ClassEnrollment.status,
+                Class.id,
+                Class.name,
+                Course.id,
+                Course.title,
+            )
+            .join(Class, Class.id == ClassEnrollment.class_id)
+            .outerjoin(class_course_links, class_course_links.c.class_id == Class.id)
+            .outerjoin(Course, Course.id == class_course_links.c.course_id)
+            .where(ClassEnrollment.user_id.in_(user_ids))
+        )
+        for user_id, enrollment_status, class_id, class_name, course_id, course_title in rows.all():
+            classes_by_user[user_id].setdefault(class_id, {
+                "id": str(class_id),
+                "name": class_name,
+                "status": enrollment_status.value
+            })
+            if course_id:
+                courses_by_user[user_id][course_id] = course_title
+    
+    user_list = []
+    for u in users:
+        classes = list(classes_by_user[u.id].values())
+        courses = [
+            {"id": str(cid), "title": ctitle}
+            for cid, ctitle in courses_by_user[u.id].items()
+        ]
         
         user_list.append({
             "id": str(u.id),
@@ -292,6 +347,33 @@ async def list_users(
     return user_list
 
 
+@router.get("/users/typeahead")
+@query_budget(1)
+async def typeahead_users(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Schnellsuche nach Name oder E-Mail (tolerant gegenüber Tippfehlern),
+    ähnlichste Treffer zuerst.
+    """
+    result = await db.execute(user_typeahead(q, limit))
+    return [
+        {
+            "id": str(u.id),
+            "email": u.email,
+            "first_name": u.first_name,
+            "last_name": u.last_name,
+            "role": u.role.value,
+            "is_active": u.is_active,
+            "similarity": round(similarity, 3),
+        }
+        for u, similarity in result.all()
+    ]
+
+
 @router.post("/users")
 async def create_user(
     data: UserCreateAdmin,
@@ -311,7 +393,7 @@ async def create_user(
     
     user = User(
         email=data.email.lower(),
-        password_hash=get_password_hash(data.password),
+        password_hash=await hash_password_async(data.password),
         first_name=data.first_name,
         last_name=data.last_name,
         role=UserRole(data.role),
@@ -325,16 +407,72 @@ async def create_user(
     return {"id": str(user.id), "message": "Benutzer erstellt"}
 
 
+@router.post("/users/import")
+async def import_users_csv(
+    file: UploadFile = File(...),
+    class_id: Optional[str] = Form(None),
+    enrollment_type: EnrollmentType = Form(EnrollmentType.ONE_TIME),
+    current_user: User = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Viele Benutzer per CSV anlegen (Spalten: email, first_name, last_name,
+    optional password, phone, role).
+    
+    Mit class_id werden alle Benutzer der Datei (neue und vorhandene)
+    in derselben Transaktion in die Klasse eingeschrieben. Passwörter
+    werden vor der ersten Abfrage gehasht, die Transaktion bleibt kurz.
+    Antwort: Zusammenfassung + Bericht pro Zeile (inkl. erzeugter
+    Startpasswörter).
+    """
+    try:
+        rows = parse_user_csv(await file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not rows:
+        raise HTTPException(status_code=400, detail="Keine Zeilen in der Datei")
+    if len(rows) > settings.USER_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximal {settings.USER_IMPORT_MAX_ROWS} Zeilen pro Import"
+        )
+    
+    class_uuid = None
+    if class_id:
+        try:
+            class_uuid = uuid.UUID(class_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Klasse nicht gefunden")
+    
+    # Validieren + hashen ohne offene Transaktion (eine evtl. vom
+    # Login-Check begonnene vorher beenden, gibt die Verbindung frei)
+    await db.commit()
+    prepared = await prepare_import(rows)
+    
+    if class_uuid is not None:
+        result = await db.execute(select(Class.id).where(Class.id == class_uuid))
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Klasse nicht gefunden")
+    
+    report = await import_users(db, prepared, class_uuid, enrollment_type.value)
+    await db.commit()
+    
+    if class_uuid is not None:
+        for entry in report["rows"]:
+            if entry["enrolled"]:
+                await invalidate_auth_context(entry["user_id"])
+    
+    return report
+
+
 @router.get("/users/{user_id}")
 async def get_user(
     user_id: str,
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Benutzer-Details mit Lernstatistiken abrufen"""
-    from app.models import LessonProgress, Lesson
-    from app.models.class_.class_model import EnrollmentStatus
-    
     result = await db.execute(
         select(User).where(User.id == user_id)
     )
@@ -389,34 +527,18 @@ async def get_user(
                         "slug": c.slug
                     })
     
-    # === Fortschritt pro Kurs berechnen ===
+    # === Fortschritt pro Kurs berechnen (eine Abfrage, nur veröffentlichte Lektionen) ===
+    progress_by_course = await get_user_course_progress(
+        db, user.id, [course["id"] for course in courses_list], published_only=True
+    )
     courses_with_progress = []
     for course in courses_list:
-        cid = course["id"]
-        # Gesamtlektionen
-        total_result = await db.execute(
-            select(func.count(Lesson.id))
-            .where(Lesson.course_id == cid)
-            .where(Lesson.is_published == True)
-        )
-        total_lessons = total_result.scalar() or 0
-        
-        # Abgeschlossene Lektionen
-        completed_result = await db.execute(
-            select(func.count(LessonProgress.id))
-            .where(LessonProgress.user_id == user_id)
-            .where(LessonProgress.course_id == cid)
-            .where(LessonProgress.completed == True)
-        )
-        completed_lessons = completed_result.scalar() or 0
-        
-        progress = int((completed_lessons / total_lessons) * 100) if total_lessons > 0 else 0
-        
+        course_progress = progress_by_course[uuid.UUID(course["id"])]
         courses_with_progress.append({
             **course,
-            "total_lessons": total_lessons,
-            "completed_lessons": completed_lessons,
-            "progress": progress,
+            "total_lessons": course_progress["total_lessons"],
+            "completed_lessons": course_progress["completed_lessons"],
+            "progress": course_progress["progress"],
         })
     
     # === Anwesenheitsstatistik berechnen ===
@@ -524,6 +646,7 @@ async def update_user(
         setattr(user, field, value)
     
     await db.commit()
+    await invalidate_principal(user.id)
     return {"message": "Benutzer aktualisiert"}
 
 
@@ -545,6 +668,7 @@ async def change_user_role(
     
     user.role = UserRole(role)
     await db.commit()
+    await invalidate_principal(user.id)
     
     return {"message": f"Rolle geändert zu {role}"}
 
@@ -573,6 +697,8 @@ async def delete_user(
     
     await db.delete(user)
     await db.commit()
+    await invalidate_principal(user_id)
+    await invalidate_auth_context(user_id)
     
     return None
 
@@ -584,7 +710,7 @@ async def delete_user(
 async def list_classes(
     active_only: bool = False,
     current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.TEACHER)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle Klassen auflisten"""
     query = select(Class).options(selectinload(Class.enrollments))
@@ -639,7 +765,7 @@ async def create_class(
 async def get_class(
     class_id: str,
     current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.TEACHER)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Einzelne Klasse mit allen Details abrufen"""
     result = await db.execute(
@@ -734,6 +860,8 @@ async def update_class(
                 class_.courses.append(course)
     
     await db.commit()
+    # Kurszuordnung betrifft alle Studenten der Klasse
+    await invalidate_auth_context()
     return {"message": "Klasse aktualisiert"}
 
 
@@ -762,6 +890,7 @@ async def add_courses_to_class(
             class_.courses.append(course)
     
     await db.commit()
+    await invalidate_auth_context()
     return {"message": f"{len(course_ids)} Kurs(e) zur Klasse hinzugefügt"}
 
 
@@ -785,6 +914,7 @@ async def remove_course_from_class(
     if course_to_remove:
         class_.courses.remove(course_to_remove)
         await db.commit()
+        await invalidate_auth_context()
     
     return {"message": "Kurs von Klasse entfernt"}
 
@@ -793,48 +923,53 @@ async def remove_course_from_class(
 async def add_student_to_class(
     class_id: str,
     user_id: str,
-    enrollment_type: str = "one_time",
+    enrollment_type: EnrollmentType = EnrollmentType.ONE_TIME,
     current_user: User = Depends(require_role(UserRole.ADMIN)),
     db: AsyncSession = Depends(get_db)
 ):
-    """Student zu Klasse hinzufügen"""
-    # Prüfen ob User existiert
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
+    """Student zu Klasse hinzufügen (max_students wird eingehalten)"""
+    result = await enroll_in_class(db, class_id, [user_id], enrollment_type.value)
     
-    # Prüfen ob Klasse existiert
-    class_result = await db.execute(select(Class).where(Class.id == class_id))
-    class_ = class_result.scalar_one_or_none()
-    if not class_:
-        raise HTTPException(status_code=404, detail="Klasse nicht gefunden")
-    
-    # Prüfen ob bereits eingeschrieben
-    existing = await db.execute(
-        select(ClassEnrollment)
-        .where(ClassEnrollment.user_id == user_id)
-        .where(ClassEnrollment.class_id == class_id)
-    )
-    if existing.scalar_one_or_none():
+    if result["not_found"]:
+        raise HTTPException(status_code=404, detail="Benutzer nicht gefunden")
+    if result["already_enrolled"]:
         raise HTTPException(status_code=400, detail="Student bereits in dieser Klasse")
+    if result["class_full"]:
+        raise HTTPException(status_code=409, detail="Klasse ist voll")
     
-    enrollment = ClassEnrollment(
-        user_id=user_id,
-        class_id=class_id,
-        enrollment_type=enrollment_type,
-    )
-    db.add(enrollment)
     await db.commit()
+    await invalidate_auth_context(user_id)
     
     return {"message": "Student zur Klasse hinzugefügt"}
 
 
+@router.post("/classes/{class_id}/students/bulk")
+async def add_students_to_class(
+    class_id: str,
+    data: BulkClassEnrollment,
+    current_user: User = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Viele Studenten auf einmal in eine Klasse einschreiben.
+    
+    Reicht der Platz (max_students) nicht, werden die ersten in der
+    Reihenfolge von user_ids eingeschrieben, der Rest steht in class_full.
+    """
+    result = await enroll_in_class(db, class_id, data.user_ids, data.enrollment_type.value)
+    await db.commit()
+    
+    for user_id in result["enrolled"]:
+        await invalidate_auth_context(user_id)
+    
+    return result
+
+
 @router.get("/classes/{class_id}/students")
 async def get_class_students(
     class_id: str,
     current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.TEACHER)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle Studenten einer Klasse abrufen"""
     result = await db.execute(
@@ -879,6 +1014,7 @@ async def remove_student_from_class(
     
     await db.delete(enrollment)
     await db.commit()
+    await invalidate_auth_context(user_id)
     
     return {"message": "Student von Klasse entfernt"}
 
@@ -906,6 +1042,7 @@ async def add_class_schedule(
     )
     db.add(schedule)
     await db.commit()
+    request_materialization()
     
     return {"message": "Stundenplan-Eintrag hinzugefügt"}
 
@@ -933,6 +1070,7 @@ async def create_session(
     )
     db.add(session)
     await db.commit()
+    purge_cache_keys("sessions")
     await db.refresh(session)
     
     return {"id": str(session.id), "message": "Session erstellt"}
@@ -957,6 +1095,7 @@ async def cancel_session(
     session.is_cancelled = True
     session.cancel_reason = reason
     await db.commit()
+    purge_cache_keys("sessions")
     
     # TODO: Teilnehmer benachrichtigen
     
@@ -1008,7 +1147,7 @@ async def list_payments(
     skip: int = 0,
     limit: int = 50,
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle Zahlungen auflisten"""
     query = select(Payment).options(selectinload(Payment.user))
@@ -1059,6 +1198,42 @@ async def confirm_bank_transfer(
     return {"message": "Zahlung bestätigt"}
 
 
+# =========================================
+# Exporte (CSV / XLSX)
+# =========================================
+@router.get("/export/{kind}")
+async def export_data(
+    kind: str,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    role: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    current_user: User = Depends(require_role(UserRole.ADMIN)),
+):
+    """
+    Benutzer, Zahlungen, Anwesenheit oder Einschreibungen als Datei.
+    
+    kind: users | payments | attendance | enrollments
+    Filter: role (users), status_filter (payments).
+    Die Zeilen werden gestreamt, auch sehr große Exporte brauchen
+    keinen zusätzlichen Speicher.
+    """
+    if kind not in EXPORTS:
+        raise HTTPException(status_code=404, detail="Unbekannter Export")
+    
+    try:
+        media_type, filename, body = build_export(
+            kind, format, role=role, status_filter=status_filter
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiger Filter")
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # =========================================
 # Prüfungs-Verwaltung
 # =========================================
@@ -1116,7 +1291,7 @@ async def record_exam_result(
 @router.get("/holidays")
 async def list_holidays(
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle Ferien/Feiertage auflisten"""
     result = await db.execute(
@@ -1154,6 +1329,7 @@ async def create_holiday(
     db.add(holiday)
     await db.commit()
     await db.refresh(holiday)
+    request_materialization()
     
     return {"id": str(holiday.id), "message": "Ferien erstellt"}
 
@@ -1196,232 +1372,92 @@ async def issue_certificate(
     }
 
 
+# =========================================
+# System / Monitoring
+# =========================================
+@router.get("/system/metrics")
+async def get_system_metrics(
+    current_user: User = Depends(require_role(UserRole.ADMIN)),
+):
+    """Cache-Trefferquoten, Heartbeat-Puffer, Hash-Pool, Lese-Replikate, SQL pro Route, Stats-Snapshot, HTTP-Cache, CMS-Snapshot und Cache-Invalidierung"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "progress_buffer": progress_buffer.stats(),
+        "password_hashing": password_hasher.stats(),
+        "read_replicas": replica_router.stats(),
+        "sql": query_metrics.stats(),
+        "admin_stats": admin_stats_snapshot.stats(),
+        "http_cache": surrogate_index.stats(),
+        "content_snapshot": content_store.stats(),
+        "lesson_cache": lesson_read_cache.stats(),
+        "cache_invalidation": dict(cache_invalidation_stats),
+    }
+
+
 # =========================================
 # Dashboard-Statistiken
 # =========================================
 @router.get("/stats")
 async def get_admin_stats(
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Admin Dashboard Statistiken"""
-    from datetime import timedelta
-    from app.models import Lesson
-    
-    # Benutzer zählen
-    result = await db.execute(select(func.count(User.id)))
-    total_users = result.scalar() or 0
-    
-    # Aktive Studenten
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.role == UserRole.STUDENT)
-        .where(User.is_active == True)
-    )
-    active_students = result.scalar() or 0
-    
-    # Lehrer zählen
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.role == UserRole.TEACHER)
-    )
-    total_teachers = result.scalar() or 0
-    
-    # Kurse zählen
-    result = await db.execute(select(func.count(Course.id)))
-    total_courses = result.scalar() or 0
-    
-    # Lektionen zählen
-    result = await db.execute(select(func.count(Lesson.id)))
-    total_lessons = result.scalar() or 0
-    
-    # Aktive Klassen
-    result = await db.execute(
-        select(func.count(Class.id))
-        .where(Class.is_active == True)
-    )
-    active_classes = result.scalar() or 0
-    
-    # Monatliche Einnahmen
-    today = datetime.utcnow().date()
-    month_start = today.replace(day=1)
-    result = await db.execute(
-        select(func.sum(Payment.amount))
-        .where(Payment.payment_status == PaymentStatus.COMPLETED)
-        .where(func.date(Payment.paid_at) >= month_start)
-    )
-    monthly_revenue = result.scalar() or 0
-    
-    # Neue Studenten diese Woche
-    week_start = today - timedelta(days=today.weekday())
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.role == UserRole.STUDENT)
-        .where(func.date(User.created_at) >= week_start)
-    )
-    new_students_week = result.scalar() or 0
-    
-    # Ausstehende Zahlungen
-    result = await db.execute(
-        select(func.count(Payment.id))
-        .where(Payment.payment_status == PaymentStatus.PENDING)
-    )
-    pending_payments = result.scalar() or 0
-    
-    # Unbestätigte Registrierungen
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.email_verified == False)
-    )
-    unverified_users = result.scalar() or 0
+    """Admin Dashboard Statistiken (aus dem Snapshot, siehe admin_stats)"""
+    counts = (await admin_stats_snapshot.get(db))["counts"]
     
     return {
-        "total_users": total_users,
-        "students": active_students,
-        "teachers": total_teachers,
-        "courses": total_courses,
-        "lessons": total_lessons,
-        "active_classes": active_classes,
-        "monthly_revenue": float(monthly_revenue),
-        "new_students_week": new_students_week,
-        "pending_payments": pending_payments,
-        "unverified_users": unverified_users,
+        "total_users": counts["total_users"],
+        "students": counts["active_students"],
+        "teachers": counts["teachers"],
+        "courses": counts["courses"],
+        "lessons": counts["lessons"],
+        "active_classes": counts["active_classes"],
+        "monthly_revenue": counts["monthly_revenue"],
+        "new_students_week": counts["new_students_week"],
+        "pending_payments": counts["pending_payments"],
+        "unverified_users": counts["unverified_users"],
     }
 
 
+@router.get("/stats/trends")
+async def get_admin_trends(
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Tageswerte (Umsatz, neue Studenten, Sessions, Anwesenheitsquote,
+    abgeschlossene Lektionen) der letzten Tage plus Wochenvergleich.
+    
+    Liest nur die Rollup-Tabelle daily_metrics.
+    """
+    return await load_trends(db, days=days)
+
+
 @router.get("/dashboard")
 async def get_admin_dashboard(
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Vollständige Admin Dashboard Daten"""
-    from datetime import timedelta
-    from app.models import Lesson
-    
-    today = datetime.utcnow()
-    
-    # === Statistiken ===
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.role == UserRole.STUDENT)
-        .where(User.is_active == True)
-    )
-    total_students = result.scalar() or 0
-    
-    result = await db.execute(select(func.count(Course.id)))
-    total_courses = result.scalar() or 0
-    
-    result = await db.execute(select(func.count(Lesson.id)))
-    total_lessons = result.scalar() or 0
-    
-    # Monatliche Einnahmen
-    month_start = today.date().replace(day=1)
-    result = await db.execute(
-        select(func.sum(Payment.amount))
-        .where(Payment.payment_status == PaymentStatus.COMPLETED)
-        .where(func.date(Payment.paid_at) >= month_start)
-    )
-    monthly_revenue = result.scalar() or 0
-    
-    # Neue Studenten diese Woche
-    week_start = today.date() - timedelta(days=today.weekday())
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.role == UserRole.STUDENT)
-        .where(func.date(User.created_at) >= week_start)
-    )
-    new_students_week = result.scalar() or 0
-    
-    # === Neue Registrierungen ===
-    result = await db.execute(
-        select(User)
-        .where(User.role == UserRole.STUDENT)
-        .order_by(User.created_at.desc())
-        .limit(5)
-    )
-    recent_users = result.scalars().all()
-    registrations = [
-        {
-            "id": str(u.id),
-            "name": f"{u.first_name} {u.last_name}",
-            "email": u.email,
-            "date": u.created_at.strftime("%Y-%m-%d"),
-            "status": "verified" if u.email_verified else "pending",
-        }
-        for u in recent_users
-    ]
-    
-    # === Letzte Zahlungen ===
-    result = await db.execute(
-        select(Payment)
-        .options(selectinload(Payment.user))
-        .order_by(Payment.created_at.desc())
-        .limit(5)
-    )
-    recent_payments = result.scalars().all()
-    payments = [
-        {
-            "id": str(p.id),
-            "user": f"{p.user.first_name} {p.user.last_name}" if p.user else "Unbekannt",
-            "amount": float(p.amount),
-            "course": "Kurs",  # TODO: Kursname aus enrollment laden
-            "status": p.payment_status.value,
-            "date": p.created_at.strftime("%Y-%m-%d"),
-        }
-        for p in recent_payments
-    ]
-    
-    # === Heutige Sessions ===
-    today_start = datetime.combine(today.date(), datetime.min.time())
-    today_end = datetime.combine(today.date(), datetime.max.time())
-    result = await db.execute(
-        select(LiveSession)
-        .options(selectinload(LiveSession.class_))
-        .where(LiveSession.scheduled_at >= today_start)
-        .where(LiveSession.scheduled_at <= today_end)
-        .where(LiveSession.is_cancelled == False)
-        .order_by(LiveSession.scheduled_at)
-    )
-    todays_sessions = result.scalars().all()
-    sessions = [
-        {
-            "id": str(s.id),
-            "title": s.title,
-            "time": s.scheduled_at.strftime("%H:%M"),
-            "teacher": "Lehrer",  # TODO: Lehrername laden
-            "students": 0,  # TODO: Teilnehmerzahl
-        }
-        for s in todays_sessions
-    ]
-    
-    # === Ausstehende Aktionen ===
-    result = await db.execute(
-        select(func.count(User.id))
-        .where(User.email_verified == False)
-    )
-    pending_verifications = result.scalar() or 0
-    
-    result = await db.execute(
-        select(func.count(Payment.id))
-        .where(Payment.payment_status == PaymentStatus.PENDING)
-    )
-    pending_payments_count = result.scalar() or 0
+    """Vollständige Admin Dashboard Daten (aus dem Snapshot, siehe admin_stats)"""
+    snapshot = await admin_stats_snapshot.get(db)
+    counts = snapshot["counts"]
     
     return {
         "stats": {
-            "students": total_students,
-            "courses": total_courses,
-            "lessons": total_lessons,
-            "revenue": float(monthly_revenue),
-            "revenue_change": "+12%",  # TODO: Berechnen
-            "new_students_change": f"+{new_students_week}",
+            "students": counts["active_students"],
+            "courses": counts["courses"],
+            "lessons": counts["lessons"],
+            "revenue": counts["monthly_revenue"],
+            "revenue_change": snapshot["revenue_change"],  # letzte 7 Tage vs. Vorwoche
+            "new_students_change": f"+{counts['new_students_week']}",
         },
-        "registrations": registrations,
-        "payments": payments,
-        "sessions": sessions,
+        "registrations": snapshot["registrations"],
+        "payments": snapshot["payments"],
+        "sessions": snapshot["sessions"],
         "pending_actions": {
-            "verifications": pending_verifications,
-            "payments": pending_payments_count,
+            "verifications": counts["unverified_users"],
+            "payments": counts["pending_payments"],
         },
     }
 
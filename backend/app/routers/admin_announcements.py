@@ -14,11 +14,12 @@ import httpx
 import json
 import os
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import Announcement
 from app.routers.auth import get_current_user, require_role
 from app.models.user import User, UserRole
 from app.services.ai_service import generate_announcement_text
+from app.services.content_snapshot import notify_content_changed
 
 router = APIRouter()
 
@@ -59,7 +60,7 @@ class AISuggestionRequest(BaseModel):
 @router.get("/announcements", response_model=List[AnnouncementResponse])
 async def list_announcements(
     current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle Ankündigungen auflisten (Admin)"""
     result = await db.execute(select(Announcement).order_by(Announcement.created_at.desc()))
@@ -93,6 +94,7 @@ async def create_announcement(
     )
     
     db.add(announcement)
+    await notify_content_changed(db, "announcements")
     await db.commit()
     await db.refresh(announcement)
     
@@ -124,6 +126,7 @@ async def update_announcement(
     if data.is_active is not None:
         announcement.is_active = data.is_active
     
+    await notify_content_changed(db, "announcements")
     await db.commit()
     await db.refresh(announcement)
     
@@ -150,6 +153,7 @@ async def delete_announcement(
         raise HTTPException(status_code=404, detail="Ankündigung nicht gefunden")
     
     await db.delete(announcement)
+    await notify_content_changed(db, "announcements")
     await db.commit()
     
     return {"success": True, "message": "Ankündigung gelöscht"}
@@ -5,20 +5,22 @@
 
 from datetime import datetime, timedelta, date
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 import resend
 import secrets
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db, READ_METHODS
 from app.core.config import get_settings
+from app.core.security import hash_password_async, verify_password_async
 from app.models.user import User, UserRole
+from app.services.auth_context import AuthContext, load_auth_context
+from app.services.principal_cache import get_principal, invalidate_principal, load_profile
 
 # Settings & Router
 settings = get_settings()
@@ -31,11 +33,6 @@ if settings.RESEND_API_KEY:
 # Token-Serializer für E-Mail-Verifizierung
 email_serializer = URLSafeTimedSerializer(settings.JWT_SECRET)
 
-# =========================================
-# Passwort-Hashing
-# =========================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # =========================================
 # OAuth2 Schema für Token
 # =========================================
@@ -115,16 +112,6 @@ class LoginResponse(BaseModel):
 # =========================================
 # Helper-Funktionen
 # =========================================
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Überprüft, ob das Passwort korrekt ist"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """Erstellt einen Passwort-Hash"""
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Erstellt einen JWT Access Token.
@@ -238,17 +225,12 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+def get_user_id_from_token(token: str) -> str:
     """
-    Dependency: Aktuellen Benutzer aus JWT Token abrufen.
+    Benutzer-ID aus einem Access Token lesen.
     
-    Wird in geschützten Routen verwendet:
-        @router.get("/me")
-        async def get_me(user: User = Depends(get_current_user)):
-            ...
+    Raises:
+        HTTPException 401: Wenn Token ungültig, abgelaufen oder kein Access Token
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -273,14 +255,41 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    # Benutzer aus Datenbank laden
-    result = await db.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
+    return user_id
+
+
+async def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """
+    Dependency: Aktuellen Benutzer aus JWT Token abrufen.
+    
+    Bei lesenden Requests (GET) wird der Benutzer über die Read-Only
+    Session geladen (dieselbe wie im Handler), sonst über get_db,
+    damit Änderungen am User committet werden.
+    
+    Wird in geschützten Routen verwendet:
+        @router.get("/me")
+        async def get_me(user: User = Depends(get_current_user)):
+            ...
+    """
+    user_id = get_user_id_from_token(token)
+    
+    # Benutzer aus Cache oder Datenbank laden
+    if request.method in READ_METHODS:
+        user = await get_principal(read_db, user_id)
+    else:
+        user = await get_principal(db, user_id)
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ungültige Anmeldedaten",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(
@@ -291,6 +300,46 @@ async def get_current_user(
     return user
 
 
+async def get_auth_context(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+) -> AuthContext:
+    """
+    Dependency: Aktueller Benutzer inkl. Mitgliedschaften.
+    
+    Liefert User, Rolle, aktive Klassen-IDs, Lehrer-Klassen-IDs und
+    zugängliche Kurs-IDs aus einer Abfrage. Innerhalb eines Requests
+    wird der Kontext von FastAPI nur einmal aufgelöst.
+    
+    Verwendung:
+        @router.get("/sessions")
+        async def my_sessions(auth: AuthContext = Depends(get_auth_context)):
+            ... auth.class_ids ...
+    """
+    user_id = get_user_id_from_token(token)
+    
+    if request.method in READ_METHODS:
+        auth = await load_auth_context(read_db, user_id)
+    else:
+        auth = await load_auth_context(db, user_id)
+    if auth is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ungültige Anmeldedaten",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not auth.user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Benutzer ist deaktiviert"
+        )
+    
+    return auth
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -348,7 +397,7 @@ async def register(
         )
     
     # Passwort hashen
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     
     # Neuen Benutzer erstellen
     new_user = User(
@@ -409,14 +458,21 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Passwort prüfen
-    if not verify_password(form_data.password, user.password_hash):
+    # Passwort prüfen (bcrypt im Thread-Pool)
+    password_valid, new_hash = await verify_password_async(form_data.password, user.password_hash)
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Ungültige E-Mail oder Passwort",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Veralteten Hash (andere Kostenstufe) transparent ersetzen
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        await invalidate_principal(user.id)
+    
     # Prüfen ob Benutzer aktiv ist
     if not user.is_active:
         raise HTTPException(
@@ -507,6 +563,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
     """
     Aktuellen angemeldeten Benutzer abrufen.
     """
+    await load_profile(current_user)
     return UserResponse(
         id=str(current_user.id),
         email=current_user.email,
@@ -598,8 +655,9 @@ async def reset_password(
         raise credentials_exception
     
     # Neues Passwort setzen
-    user.password_hash = get_password_hash(data.new_password)
+    user.password_hash = await hash_password_async(data.new_password)
     await db.commit()
+    await invalidate_principal(user.id)
     
     return {"message": "Passwort erfolgreich geändert"}
 
@@ -637,6 +695,7 @@ async def verify_email(
     # E-Mail als verifiziert markieren
     user.email_verified = True
     await db.commit()
+    await invalidate_principal(user.id)
     
     return {"message": "E-Mail erfolgreich bestätigt!"}
 
@@ -11,7 +11,7 @@ from sqlalchemy import select
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.models import User, Certificate
 from app.routers.auth import get_current_user
 
@@ -49,7 +49,7 @@ class CertificateVerification(BaseModel):
 @router.get("/", response_model=List[CertificateResponse])
 async def get_my_certificates(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Zertifikate abrufen.
@@ -78,7 +78,7 @@ async def get_my_certificates(
 async def download_certificate(
     certificate_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Zertifikat als PDF herunterladen.
@@ -120,7 +120,7 @@ async def download_certificate(
 @router.get("/verify/{certificate_number}", response_model=CertificateVerification)
 async def verify_certificate(
     certificate_number: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Zertifikat verifizieren (öffentlicher Endpunkt).
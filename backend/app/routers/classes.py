@@ -11,7 +11,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import (
     User,
     UserRole,
@@ -21,6 +21,8 @@ from app.models import (
     LiveSession,
 )
 from app.routers.auth import get_current_user, require_role
+from app.services.http_cache import purge_cache_keys
+from app.services.schedule_recurrence import cancel_schedule_sessions, request_materialization
 
 router = APIRouter()
 
@@ -137,7 +139,7 @@ class ScheduleUpdate(BaseModel):
 @router.get("/admin/{class_id}", response_model=ClassResponse)
 async def admin_get_class(
     class_id: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Einzelne Klasse abrufen (Admin, ohne Auth für interne Calls).
@@ -185,7 +187,7 @@ async def admin_get_class(
 
 @router.get("/admin", response_model=List[ClassResponse])
 async def admin_get_all_classes(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Alle Klassen abrufen (Admin).
@@ -322,6 +324,7 @@ async def create_schedule(
     db.add(new_schedule)
     await db.commit()
     await db.refresh(new_schedule)
+    request_materialization()
     
     return ClassScheduleResponse(
         id=str(new_schedule.id),
@@ -377,6 +380,7 @@ async def update_schedule(
     
     await db.commit()
     await db.refresh(schedule)
+    request_materialization()
     
     return ClassScheduleResponse(
         id=str(schedule.id),
@@ -407,8 +411,11 @@ async def delete_schedule(
             detail="Schedule nicht gefunden"
         )
     
+    # Bereits angelegte zukünftige Sessions absagen
+    await cancel_schedule_sessions(db, schedule.id)
     await db.delete(schedule)
     await db.commit()
+    purge_cache_keys("sessions")
     
     return None
 
@@ -516,7 +523,7 @@ async def delete_class(
 async def get_class(
     class_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Klassen-Details abrufen.
@@ -600,7 +607,7 @@ async def get_class(
 async def get_class_students(
     class_id: str,
     current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Studenten einer Klasse abrufen (nur für Lehrer/Admin).
@@ -636,7 +643,7 @@ async def get_class_students(
 async def get_class_schedule(
     class_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Stundenplan einer Klasse abrufen.
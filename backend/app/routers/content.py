@@ -3,6 +3,7 @@
 # ===========================================
 # API-Endpunkte für Lehrer, FAQs, Testimonials, Ankündigungen
 
+from itertools import islice
 from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -12,7 +13,7 @@ from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import (
     TeacherProfile,
     FAQ,
@@ -22,6 +23,8 @@ from app.models import (
     Weekday,
     RamadanMode,
 )
+from app.services.content_snapshot import content_store, notify_content_changed, todays_guidance
+from app.services.http_cache import cache_policy, purge_cache_keys
 
 router = APIRouter()
 
@@ -155,31 +158,19 @@ class DailyGuidanceResponse(DailyGuidanceBase):
 # =========================================
 
 @router.get("/teachers", response_model=List[TeacherResponse])
-async def list_teachers(
-    db: AsyncSession = Depends(get_db)
-):
-    """Alle aktiven Lehrer auflisten."""
-    query = select(TeacherProfile).where(
-        TeacherProfile.is_active == True
-    ).order_by(TeacherProfile.order, TeacherProfile.name)
-    
-    result = await db.execute(query)
-    teachers = result.scalars().all()
-    return [TeacherResponse.model_validate(t) for t in teachers]
+@cache_policy(300, stale_while_revalidate=3600, keys=["teachers"])
+async def list_teachers():
+    """Alle aktiven Lehrer auflisten (aus dem CMS-Snapshot)."""
+    snapshot = await content_store.get()
+    return [TeacherResponse.model_validate(t) for t in snapshot.teachers]
 
 
 @router.get("/teachers/{slug}", response_model=TeacherResponse)
-async def get_teacher(
-    slug: str,
-    db: AsyncSession = Depends(get_db)
-):
-    """Einzelnen Lehrer abrufen."""
-    query = select(TeacherProfile).where(
-        TeacherProfile.slug == slug,
-        TeacherProfile.is_active == True
-    )
-    result = await db.execute(query)
-    teacher = result.scalar_one_or_none()
+@cache_policy(300, stale_while_revalidate=3600, keys=["teachers"])
+async def get_teacher(slug: str):
+    """Einzelnen Lehrer abrufen (aus dem CMS-Snapshot)."""
+    snapshot = await content_store.get()
+    teacher = snapshot.teachers_by_slug.get(slug)
     
     if not teacher:
         raise HTTPException(status_code=404, detail="Lehrer nicht gefunden")
@@ -195,7 +186,9 @@ async def create_teacher(
     """Neues Lehrer-Profil erstellen."""
     teacher = TeacherProfile(**teacher_data.model_dump())
     db.add(teacher)
+    await notify_content_changed(db, "teachers")
     await db.commit()
+    purge_cache_keys("teachers", "courses")
     await db.refresh(teacher)
     return TeacherResponse.model_validate(teacher)
 
@@ -216,7 +209,9 @@ async def update_teacher(
     for field, value in teacher_data.model_dump().items():
         setattr(teacher, field, value)
     
+    await notify_content_changed(db, "teachers")
     await db.commit()
+    purge_cache_keys("teachers", "courses")
     await db.refresh(teacher)
     return TeacherResponse.model_validate(teacher)
 
@@ -234,7 +229,9 @@ async def delete_teacher(
         raise HTTPException(status_code=404, detail="Lehrer nicht gefunden")
     
     await db.delete(teacher)
+    await notify_content_changed(db, "teachers")
     await db.commit()
+    purge_cache_keys("teachers", "courses")
 
 
 # =========================================
@@ -242,21 +239,15 @@ async def delete_teacher(
 # =========================================
 
 @router.get("/faqs", response_model=List[FAQResponse])
-async def list_faqs(
-    category: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
-):
-    """Alle veröffentlichten FAQs auflisten."""
-    query = select(FAQ).where(FAQ.is_published == True)
-    
-    if category:
-        query = query.where(FAQ.category == category)
-    
-    query = query.order_by(FAQ.order, FAQ.created_at)
-    
-    result = await db.execute(query)
-    faqs = result.scalars().all()
-    return [FAQResponse.model_validate(f) for f in faqs]
+@cache_policy(300, stale_while_revalidate=3600, keys=["faqs"])
+async def list_faqs(category: Optional[str] = None):
+    """Alle veröffentlichten FAQs auflisten (aus dem CMS-Snapshot)."""
+    snapshot = await content_store.get()
+    return [
+        FAQResponse.model_validate(f)
+        for f in snapshot.faqs
+        if not category or f.category == category
+    ]
 
 
 @router.post("/faqs", response_model=FAQResponse, status_code=status.HTTP_201_CREATED)
@@ -267,7 +258,9 @@ async def create_faq(
     """Neue FAQ erstellen."""
     faq = FAQ(**faq_data.model_dump())
     db.add(faq)
+    await notify_content_changed(db, "faqs")
     await db.commit()
+    purge_cache_keys("faqs")
     await db.refresh(faq)
     return FAQResponse.model_validate(faq)
 
@@ -288,7 +281,9 @@ async def update_faq(
     for field, value in faq_data.model_dump().items():
         setattr(faq, field, value)
     
+    await notify_content_changed(db, "faqs")
     await db.commit()
+    purge_cache_keys("faqs")
     await db.refresh(faq)
     return FAQResponse.model_validate(faq)
 
@@ -306,7 +301,9 @@ async def delete_faq(
         raise HTTPException(status_code=404, detail="FAQ nicht gefunden")
     
     await db.delete(faq)
+    await notify_content_changed(db, "faqs")
     await db.commit()
+    purge_cache_keys("faqs")
 
 
 # =========================================
@@ -314,25 +311,20 @@ async def delete_faq(
 # =========================================
 
 @router.get("/testimonials", response_model=List[TestimonialResponse])
+@cache_policy(300, stale_while_revalidate=3600, keys=["testimonials"])
 async def list_testimonials(
     featured: Optional[bool] = None,
     course_id: Optional[UUID] = None,
     limit: int = Query(10, ge=1, le=50),
-    db: AsyncSession = Depends(get_db)
 ):
-    """Alle veröffentlichten Testimonials auflisten."""
-    query = select(Testimonial).where(Testimonial.is_published == True)
-    
-    if featured is not None:
-        query = query.where(Testimonial.is_featured == featured)
-    if course_id:
-        query = query.where(Testimonial.course_id == course_id)
-    
-    query = query.order_by(Testimonial.order, Testimonial.created_at.desc()).limit(limit)
-    
-    result = await db.execute(query)
-    testimonials = result.scalars().all()
-    return [TestimonialResponse.model_validate(t) for t in testimonials]
+    """Alle veröffentlichten Testimonials auflisten (aus dem CMS-Snapshot)."""
+    snapshot = await content_store.get()
+    testimonials = (
+        t for t in snapshot.testimonials
+        if (featured is None or t.is_featured == featured)
+        and (not course_id or t.course_id == course_id)
+    )
+    return [TestimonialResponse.model_validate(t) for t in islice(testimonials, limit)]
 
 
 @router.post("/testimonials", response_model=TestimonialResponse, status_code=status.HTTP_201_CREATED)
@@ -343,7 +335,9 @@ async def create_testimonial(
     """Neues Testimonial erstellen."""
     testimonial = Testimonial(**testimonial_data.model_dump())
     db.add(testimonial)
+    await notify_content_changed(db, "testimonials")
     await db.commit()
+    purge_cache_keys("testimonials")
     await db.refresh(testimonial)
     return TestimonialResponse.model_validate(testimonial)
 
@@ -361,7 +355,9 @@ async def delete_testimonial(
         raise HTTPException(status_code=404, detail="Testimonial nicht gefunden")
     
     await db.delete(testimonial)
+    await notify_content_changed(db, "testimonials")
     await db.commit()
+    purge_cache_keys("testimonials")
 
 
 # =========================================
@@ -371,23 +367,18 @@ async def delete_testimonial(
 @router.get("/announcements", response_model=List[AnnouncementResponse])
 async def list_announcements(
     active_only: bool = True,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle aktiven Ankündigungen auflisten."""
-    query = select(Announcement)
-    
+    # Nur sichtbare: aus dem CMS-Snapshot
     if active_only:
-        query = query.where(Announcement.is_active == True)
-    
-    query = query.order_by(Announcement.priority.desc(), Announcement.created_at.desc())
+        snapshot = await content_store.get()
+        return [AnnouncementResponse.model_validate(a) for a in snapshot.announcements if a.is_visible]
     
+    query = select(Announcement).order_by(Announcement.priority.desc(), Announcement.created_at.desc())
     result = await db.execute(query)
     announcements = result.scalars().all()
     
-    # Nur sichtbare zurückgeben
-    if active_only:
-        announcements = [a for a in announcements if a.is_visible]
-    
     return [AnnouncementResponse.model_validate(a) for a in announcements]
 
 
@@ -399,6 +390,7 @@ async def create_announcement(
     """Neue Ankündigung erstellen."""
     announcement = Announcement(**announcement_data.model_dump())
     db.add(announcement)
+    await notify_content_changed(db, "announcements")
     await db.commit()
     await db.refresh(announcement)
     return AnnouncementResponse.model_validate(announcement)
@@ -417,6 +409,7 @@ async def delete_announcement(
         raise HTTPException(status_code=404, detail="Ankündigung nicht gefunden")
     
     await db.delete(announcement)
+    await notify_content_changed(db, "announcements")
     await db.commit()
 
 
@@ -425,49 +418,11 @@ async def delete_announcement(
 # =========================================
 
 @router.get("/daily-guidance", response_model=DailyGuidanceResponse)
-async def get_todays_guidance(
-    is_ramadan: bool = False,
-    db: AsyncSession = Depends(get_db)
-):
-    """Tageshinweis für heute abrufen."""
-    import calendar
-    
-    # Aktueller Wochentag
-    today = datetime.utcnow()
-    weekday_map = {
-        0: Weekday.MONDAY,
-        1: Weekday.TUESDAY,
-        2: Weekday.WEDNESDAY,
-        3: Weekday.THURSDAY,
-        4: Weekday.FRIDAY,
-        5: Weekday.SATURDAY,
-        6: Weekday.SUNDAY,
-    }
-    current_weekday = weekday_map[today.weekday()]
-    
-    # Query aufbauen
-    query = select(DailyGuidance).where(
-        DailyGuidance.is_active == True,
-        (DailyGuidance.weekday == current_weekday) | (DailyGuidance.weekday == Weekday.EVERYDAY)
-    )
-    
-    # Ramadan-Filter
-    if is_ramadan:
-        query = query.where(DailyGuidance.ramadan_mode.in_([RamadanMode.ONLY, RamadanMode.BOTH]))
-    else:
-        query = query.where(DailyGuidance.ramadan_mode.in_([RamadanMode.EXCLUDE, RamadanMode.BOTH]))
-    
-    # Datums-Filter
-    query = query.where(
-        (DailyGuidance.start_date == None) | (DailyGuidance.start_date <= today)
-    ).where(
-        (DailyGuidance.end_date == None) | (DailyGuidance.end_date >= today)
-    )
-    
-    query = query.order_by(DailyGuidance.priority.desc()).limit(1)
-    
-    result = await db.execute(query)
-    guidance = result.scalar_one_or_none()
+@cache_policy(300, stale_while_revalidate=600, keys=["guidance"])
+async def get_todays_guidance(is_ramadan: bool = False):
+    """Tageshinweis für heute abrufen (aus dem CMS-Snapshot)."""
+    snapshot = await content_store.get()
+    guidance = todays_guidance(snapshot, datetime.utcnow(), is_ramadan)
     
     if not guidance:
         raise HTTPException(status_code=404, detail="Kein Tageshinweis verfügbar")
@@ -477,7 +432,7 @@ async def get_todays_guidance(
 
 @router.get("/daily-guidance/all", response_model=List[DailyGuidanceResponse])
 async def list_all_guidance(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Alle Tageshinweise auflisten (Admin)."""
     query = select(DailyGuidance).order_by(DailyGuidance.weekday, DailyGuidance.priority.desc())
@@ -494,7 +449,9 @@ async def create_daily_guidance(
     """Neuen Tageshinweis erstellen."""
     guidance = DailyGuidance(**guidance_data.model_dump())
     db.add(guidance)
+    await notify_content_changed(db, "guidance")
     await db.commit()
+    purge_cache_keys("guidance")
     await db.refresh(guidance)
     return DailyGuidanceResponse.model_validate(guidance)
 
@@ -512,5 +469,7 @@ async def delete_daily_guidance(
         raise HTTPException(status_code=404, detail="Tageshinweis nicht gefunden")
     
     await db.delete(guidance)
+    await notify_content_changed(db, "guidance")
     await db.commit()
+    purge_cache_keys("guidance")
 
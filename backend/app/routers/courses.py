@@ -5,14 +5,16 @@
 
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer_group, with_expression
 from pydantic import BaseModel, Field
 from datetime import datetime
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.db.instrumentation import query_budget
 from app.models import (
     Course,
     CourseCategory,
@@ -20,9 +22,14 @@ from app.models import (
     CourseType,
     PriceType,
     Lesson,
+    LESSON_CONTENT_GROUP,
     ContentType,
     TeacherProfile,
 )
+from app.services.progress import refresh_course_progress_for_course
+from app.services.http_cache import cache_policy, purge_cache_keys, etag_matches
+from app.services.lesson_cache import lesson_read_cache, lesson_etag
+from app.services.search import search_query, course_ranks, course_headline, lesson_search
 
 router = APIRouter()
 
@@ -103,6 +110,28 @@ class LessonResponse(LessonBase):
         from_attributes = True
 
 
+class LessonDetailResponse(LessonResponse):
+    # Zum Vorladen: nächste veröffentlichte Lektion des Kurses
+    next_lesson_slug: Optional[str] = None
+
+
+class LessonOutlineResponse(BaseModel):
+    """Lektion in der Kursgliederung (ohne Inhalt, Materialien, Quiz)"""
+    id: UUID
+    title: str
+    slug: str
+    section_title: Optional[str] = None
+    order: int = 0
+    content_type: str = "video"
+    duration_minutes: Optional[int] = None
+    has_quiz: bool = False
+    is_free_preview: bool = False
+    is_published: bool = False
+
+    class Config:
+        from_attributes = True
+
+
 class TeacherProfileResponse(BaseModel):
     id: UUID
     name: str
@@ -174,12 +203,18 @@ class CourseResponse(CourseBase):
     lesson_count: int = 0
     total_duration_minutes: int = 0
     teachers: List[TeacherProfileResponse] = []
+    # Nur bei Suche: Ausschnitt mit <mark>-Hervorhebung
+    search_headline: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
 class CourseDetailResponse(CourseResponse):
+    lessons: List[LessonOutlineResponse] = []
+
+
+class AdminCourseDetailResponse(CourseResponse):
     lessons: List[LessonResponse] = []
 
 
@@ -190,11 +225,54 @@ class CourseListResponse(BaseModel):
     per_page: int
 
 
+# =========================================
+# Projektionen
+# =========================================
+
+# Spalten der Kursgliederung
+LESSON_OUTLINE_COLUMNS = (
+    Lesson.id,
+    Lesson.course_id,
+    Lesson.title,
+    Lesson.slug,
+    Lesson.section_title,
+    Lesson.order,
+    Lesson.content_type,
+    Lesson.duration_minutes,
+    Lesson.has_quiz,
+    Lesson.is_free_preview,
+    Lesson.is_published,
+)
+
+
+def with_lesson_stats(query):
+    """
+    Lektionsanzahl und Gesamtdauer als korrelierte Unterabfragen
+    (Index ix_lessons_course_order) statt alle Lektionen zu laden.
+    """
+    lesson_count = (
+        select(func.count(Lesson.id))
+        .where(Lesson.course_id == Course.id)
+        .scalar_subquery()
+    )
+    total_duration = (
+        select(func.coalesce(func.sum(Lesson.duration_minutes), 0))
+        .where(Lesson.course_id == Course.id)
+        .scalar_subquery()
+    )
+    return query.options(
+        with_expression(Course.lesson_count, lesson_count),
+        with_expression(Course.total_duration_minutes, total_duration),
+    )
+
+
 # =========================================
 # Öffentliche Endpunkte (kein Login nötig)
 # =========================================
 
 @router.get("", response_model=CourseListResponse)
+@query_budget(4)
+@cache_policy(60, stale_while_revalidate=300, keys=["courses"])
 async def list_courses(
     page: int = Query(1, ge=1),
     per_page: int = Query(12, ge=1, le=100),
@@ -203,19 +281,19 @@ async def list_courses(
     course_type: Optional[CourseType] = None,
     featured: Optional[bool] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Alle veröffentlichten Kurse auflisten.
     Unterstützt Filterung nach Kategorie, Level, Typ und Suchbegriff.
+    
+    Mit Suchbegriff: Volltextsuche (deutsch + arabisch) in Kursen und
+    Lektionen, sortiert nach Relevanz, mit hervorgehobenem Ausschnitt.
     """
     # Basis-Query: nur veröffentlichte und aktive Kurse
     query = select(Course).where(
         Course.is_published == True,
         Course.is_active == True
-    ).options(
-        selectinload(Course.teachers), 
-        selectinload(Course.lessons)
     )
     
     # Filter anwenden
@@ -227,24 +305,30 @@ async def list_courses(
         query = query.where(Course.course_type == course_type)
     if featured is not None:
         query = query.where(Course.is_featured == featured)
-    if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            Course.title.ilike(search_term) | 
-            Course.short_description.ilike(search_term)
-        )
     
-    # Sortierung
-    query = query.order_by(Course.order, Course.created_at.desc())
+    # Volltextsuche (app/services/search.py)
+    ranks = None
+    if search and search.strip():
+        ts_query = search_query(search)
+        ranks = course_ranks(ts_query)
+        query = query.join(ranks, ranks.c.course_id == Course.id)
     
-    # Gesamtanzahl ermitteln
-    count_query = select(func.count()).select_from(query.subquery())
+    # Gesamtanzahl ermitteln (nur die Filter, ohne Unterabfrage)
+    count_query = query.with_only_columns(func.count(Course.id))
     total_result = await db.execute(count_query)
     total = total_result.scalar()
     
+    # Sortierung (bei Suche zuerst nach Relevanz)
+    if ranks is not None:
+        query = query.order_by(ranks.c.rank.desc()).options(
+            with_expression(Course.search_headline, course_headline(ts_query))
+        )
+    query = query.order_by(Course.order, Course.created_at.desc())
+    
     # Pagination
     offset = (page - 1) * per_page
     query = query.offset(offset).limit(per_page)
+    query = with_lesson_stats(query.options(selectinload(Course.teachers)))
     
     result = await db.execute(query)
     courses = result.scalars().all()
@@ -258,9 +342,11 @@ async def list_courses(
 
 
 @router.get("/featured", response_model=List[CourseResponse])
+@query_budget(3)
+@cache_policy(60, stale_while_revalidate=300, keys=["courses"])
 async def get_featured_courses(
     limit: int = Query(6, ge=1, le=20),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Hervorgehobene Kurse für die Startseite."""
     query = select(Course).where(
@@ -268,31 +354,62 @@ async def get_featured_courses(
         Course.is_active == True,
         Course.is_featured == True
     ).options(
-        selectinload(Course.teachers),
-        selectinload(Course.lessons)
+        selectinload(Course.teachers)
     ).order_by(Course.order).limit(limit)
     
-    result = await db.execute(query)
+    result = await db.execute(with_lesson_stats(query))
     courses = result.scalars().all()
     return [CourseResponse.model_validate(c) for c in courses]
 
 
+@router.get("/search/lessons")
+@query_budget(1)
+@cache_policy(60, stale_while_revalidate=300, keys=["courses"])
+async def search_lessons(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Lektionen durchsuchen (Titel, Beschreibung, Text; deutsch + arabisch).
+    Treffer nach Relevanz mit hervorgehobenen Ausschnitten.
+    """
+    result = await db.execute(lesson_search(search_query(q), limit))
+    return [
+        {
+            "id": str(row.id),
+            "title": row.title,
+            "slug": row.slug,
+            "section_title": row.section_title,
+            "is_free_preview": row.is_free_preview,
+            "course_title": row.course_title,
+            "course_slug": row.course_slug,
+            "rank": row.rank,
+            "title_headline": row.title_headline,
+            "headline": row.headline,
+        }
+        for row in result.all()
+    ]
+
+
 @router.get("/{slug}", response_model=CourseDetailResponse)
+@query_budget(3)
+@cache_policy(60, stale_while_revalidate=300, keys=["courses"])
 async def get_course_by_slug(
     slug: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Einzelnen Kurs mit allen Lektionen abrufen."""
+    """Einzelnen Kurs mit Lektionsgliederung abrufen (Inhalte über die Lektions-Route)."""
     query = select(Course).where(
         Course.slug == slug,
         Course.is_published == True,
         Course.is_active == True
     ).options(
         selectinload(Course.teachers),
-        selectinload(Course.lessons)
+        selectinload(Course.lessons).load_only(*LESSON_OUTLINE_COLUMNS)
     )
     
-    result = await db.execute(query)
+    result = await db.execute(with_lesson_stats(query))
     course = result.scalar_one_or_none()
     
     if not course:
@@ -301,34 +418,58 @@ async def get_course_by_slug(
     return CourseDetailResponse.model_validate(course)
 
 
-@router.get("/{course_slug}/lessons/{lesson_slug}", response_model=LessonResponse)
+@router.get("/{course_slug}/lessons/{lesson_slug}", response_model=LessonDetailResponse)
+@query_budget(3)
 async def get_lesson(
     course_slug: str,
     lesson_slug: str,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Einzelne Lektion abrufen."""
-    # Erst Kurs finden
-    course_query = select(Course).where(Course.slug == course_slug)
-    course_result = await db.execute(course_query)
-    course = course_result.scalar_one_or_none()
-    
-    if not course:
-        raise HTTPException(status_code=404, detail="Kurs nicht gefunden")
+    """
+    Einzelne Lektion abrufen.
     
-    # Dann Lektion
-    lesson_query = select(Lesson).where(
-        Lesson.course_id == course.id,
-        Lesson.slug == lesson_slug,
-        Lesson.is_published == True
-    )
-    lesson_result = await db.execute(lesson_query)
-    lesson = lesson_result.scalar_one_or_none()
+    Eine Versions-Abfrage (Kurs + Lektion + nächste Lektion), der Inhalt
+    kommt aus dem Lektions-Cache (app/services/lesson_cache.py).
+    ETag/If-None-Match -> 304; Link-Header rel=prefetch auf die nächste
+    Lektion.
+    """
+    row = await lesson_read_cache.find(db, course_slug, lesson_slug)
     
-    if not lesson:
+    if row is None:
+        raise HTTPException(status_code=404, detail="Kurs nicht gefunden")
+    if row.lesson_id is None:
         raise HTTPException(status_code=404, detail="Lektion nicht gefunden")
     
-    return LessonResponse.model_validate(lesson)
+    # no-cache: Browser revalidiert jedes Mal (günstig), nginx cacht nicht
+    headers = {
+        "ETag": lesson_etag(row.lesson_id, row.updated_at, row.next_lesson_slug),
+        "Cache-Control": "no-cache",
+    }
+    if row.next_lesson_slug:
+        lessons_path = request.url.path.rsplit("/", 1)[0]
+        headers["Link"] = f"<{lessons_path}/{row.next_lesson_slug}>; rel=prefetch"
+    
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        lesson_read_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    
+    content = lesson_read_cache.content(row.lesson_id, row.updated_at)
+    if content is None:
+        lesson_result = await db.execute(
+            select(Lesson)
+            .where(Lesson.id == row.lesson_id)
+            .options(undefer_group(LESSON_CONTENT_GROUP))
+        )
+        lesson = lesson_result.scalar_one_or_none()
+        if not lesson:
+            raise HTTPException(status_code=404, detail="Lektion nicht gefunden")
+        content = LessonResponse.model_validate(lesson).model_dump(mode="json")
+        lesson_read_cache.store(lesson.id, lesson.updated_at, content)
+        # Inzwischen geändert: ETag passend zum ausgelieferten Inhalt
+        headers["ETag"] = lesson_etag(lesson.id, lesson.updated_at, row.next_lesson_slug)
+    
+    return JSONResponse({**content, "next_lesson_slug": row.next_lesson_slug}, headers=headers)
 
 
 # =========================================
@@ -339,16 +480,13 @@ async def get_lesson(
 async def admin_list_all_courses(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Alle Kurse für Admin (inkl. nicht veröffentlichte).
     TODO: Admin-Authentifizierung hinzufügen.
     """
-    query = select(Course).options(
-        selectinload(Course.teachers),
-        selectinload(Course.lessons)
-    )
+    query = with_lesson_stats(select(Course).options(selectinload(Course.teachers)))
     query = query.order_by(Course.order, Course.created_at.desc())
     
     # Gesamtanzahl
@@ -371,27 +509,28 @@ async def admin_list_all_courses(
     )
 
 
-@router.get("/admin/{course_id}", response_model=CourseDetailResponse)
+@router.get("/admin/{course_id}", response_model=AdminCourseDetailResponse)
 async def admin_get_course(
     course_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Einzelnen Kurs für Admin abrufen (inkl. nicht veröffentlichte).
     TODO: Admin-Authentifizierung hinzufügen.
     """
+    # Der Kurs-Editor braucht die vollständigen Lektionen
     query = select(Course).where(Course.id == course_id).options(
         selectinload(Course.teachers),
-        selectinload(Course.lessons)
+        selectinload(Course.lessons).undefer_group(LESSON_CONTENT_GROUP)
     )
     
-    result = await db.execute(query)
+    result = await db.execute(with_lesson_stats(query))
     course = result.scalar_one_or_none()
     
     if not course:
         raise HTTPException(status_code=404, detail="Kurs nicht gefunden")
     
-    return CourseDetailResponse.model_validate(course)
+    return AdminCourseDetailResponse.model_validate(course)
 
 
 @router.post("", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
@@ -450,12 +589,13 @@ async def create_course(
     
     db.add(course)
     await db.commit()
+    purge_cache_keys("courses")
     
     # Kurs mit allen Relationships neu laden
     result = await db.execute(
-        select(Course)
-        .where(Course.id == course.id)
-        .options(selectinload(Course.teachers), selectinload(Course.lessons))
+        with_lesson_stats(select(Course).where(Course.id == course.id))
+        .options(selectinload(Course.teachers))
+        .execution_options(populate_existing=True)
     )
     course = result.scalar_one()
     
@@ -501,12 +641,13 @@ async def update_course(
         course.published_at = datetime.utcnow()
     
     await db.commit()
+    purge_cache_keys("courses")
     
     # Kurs mit allen Relationships neu laden
     result = await db.execute(
-        select(Course)
-        .where(Course.id == course_id)
-        .options(selectinload(Course.teachers), selectinload(Course.lessons))
+        with_lesson_stats(select(Course).where(Course.id == course_id))
+        .options(selectinload(Course.teachers))
+        .execution_options(populate_existing=True)
     )
     course = result.scalar_one()
     
@@ -530,6 +671,7 @@ async def delete_course(
     
     await db.delete(course)
     await db.commit()
+    purge_cache_keys("courses")
 
 
 # =========================================
@@ -556,13 +698,16 @@ async def create_lesson(
     )
     
     db.add(lesson)
+    await db.flush()
+    await refresh_course_progress_for_course(db, course_id)
     await db.commit()
+    purge_cache_keys("courses")
 
     # Lektion neu laden
     result = await db.execute(
         select(Lesson)
         .where(Lesson.id == lesson.id)
-        
+        .options(undefer_group(LESSON_CONTENT_GROUP))
     )
     lesson = result.scalar_one()
     
@@ -586,13 +731,19 @@ async def update_lesson(
     for field, value in update_data.items():
         setattr(lesson, field, value)
     
+    # Reihenfolge/Slug bestimmen die nächste Lektion im Kursfortschritt
+    if {"order", "slug", "is_published"} & update_data.keys():
+        await db.flush()
+        await refresh_course_progress_for_course(db, lesson.course_id)
+    
     await db.commit()
+    purge_cache_keys("courses")
     
     # Lektion mit allen Beziehungen neu laden
     result = await db.execute(
         select(Lesson)
         .where(Lesson.id == lesson_id)
-        
+        .options(undefer_group(LESSON_CONTENT_GROUP))
     )
     lesson = result.scalar_one()
     
@@ -611,5 +762,9 @@ async def delete_lesson(
     if not lesson:
         raise HTTPException(status_code=404, detail="Lektion nicht gefunden")
     
+    course_id = lesson.course_id
     await db.delete(lesson)
+    await db.flush()
+    await refresh_course_progress_for_course(db, course_id)
     await db.commit()
+    purge_cache_keys("courses")
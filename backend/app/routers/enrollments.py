@@ -3,14 +3,13 @@
 # ===========================================
 # Einschreibungs- und Fortschritts-Endpunkte
 
-from typing import Optional
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import (
     User,
     Enrollment,
@@ -20,6 +19,15 @@ from app.models import (
     EnrollmentStatus,
 )
 from app.routers.auth import get_current_user
+from app.services.auth_context import invalidate_auth_context
+from app.services.progress import refresh_course_progress, refresh_course_progress_for_lesson
+from app.services.progress_buffer import (
+    progress_buffer,
+    flush_progress_buffer,
+    upsert_lesson_progress,
+    upsert_lesson_progress_batch,
+)
+from app.services.quiz import grade_quiz
 
 router = APIRouter()
 
@@ -33,6 +41,20 @@ class LessonProgressUpdate(BaseModel):
     completed: Optional[bool] = None
 
 
+class ProgressBatchItem(BaseModel):
+    """Ein Eintrag im Fortschritts-Batch (Offline-Sync)"""
+    lesson_id: str
+    watched_seconds: Optional[int] = Field(None, ge=0)
+    completed: Optional[bool] = None
+    # Quiz-Antworten wie bei submit_quiz, bewertet wird auf dem Server
+    quiz_answers: Optional[dict] = None
+
+
+class ProgressBatch(BaseModel):
+    """Schema für Fortschritts-Batch"""
+    items: List[ProgressBatchItem] = Field(..., max_length=500)
+
+
 class QuizSubmission(BaseModel):
     """Schema für Quiz-Abgabe"""
     answers: dict  # {question_id: answer_index}
@@ -53,7 +75,7 @@ class QuizResult(BaseModel):
 async def get_enrollment(
     enrollment_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Einschreibung Details abrufen.
@@ -113,6 +135,7 @@ async def cancel_enrollment(
     # Status auf gekündigt setzen
     enrollment.status = EnrollmentStatus.CANCELLED
     await db.commit()
+    await invalidate_auth_context(current_user.id)
     
     # TODO: Stripe/PayPal Abo kündigen
     
@@ -123,75 +146,177 @@ async def cancel_enrollment(
 async def update_lesson_progress(
     lesson_id: str,
     progress_data: LessonProgressUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Lektions-Fortschritt aktualisieren.
+    
+    Reine Video-Heartbeats (nur watched_seconds) werden gepuffert und
+    gebündelt geschrieben. Abschlüsse werden sofort per Upsert gespeichert.
+    
+    Antwort immer mit lesson_id, watched_seconds, completed, completed_at.
+    Bei gepufferten Heartbeats (buffered: true) ist der Abschluss-Stand
+    ohne Datenbankzugriff nicht bekannt: completed/completed_at sind dann
+    null, watched_seconds ist der gepufferte (höchste) Wert.
     """
     from uuid import UUID
     
-    print(f"[Enrollments] Update lesson progress: user_id={current_user.id}, lesson_id={lesson_id}, data={progress_data}")
-    
     # lesson_id in UUID umwandeln
     try:
         lesson_uuid = UUID(lesson_id)
     except ValueError:
-        print(f"[Enrollments] Invalid lesson_id format: {lesson_id}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ungültige Lektions-ID"
         )
     
-    # Existierenden Fortschritt suchen oder neuen erstellen
-    result = await db.execute(
-        select(LessonProgress)
-        .where(LessonProgress.user_id == current_user.id)
-        .where(LessonProgress.lesson_id == lesson_uuid)
-    )
-    progress = result.scalar_one_or_none()
+    # Heartbeat: nur puffern, kein Datenbankzugriff
+    if progress_data.completed is None:
+        watched_seconds = progress_data.watched_seconds or 0
+        if progress_buffer.add(current_user.id, lesson_uuid, watched_seconds):
+            background_tasks.add_task(flush_progress_buffer)
+        return {
+            "lesson_id": str(lesson_uuid),
+            "watched_seconds": progress_buffer.get(current_user.id, lesson_uuid) or watched_seconds,
+            "completed": None,
+            "completed_at": None,
+            "buffered": True,
+        }
     
+    # Abschluss: sofort schreiben, gepufferten Heartbeat mitnehmen
+    buffered_seconds = progress_buffer.pop(current_user.id, lesson_uuid)
+    watched_values = [v for v in (progress_data.watched_seconds, buffered_seconds) if v is not None]
+    
+    progress = await upsert_lesson_progress(
+        db,
+        current_user.id,
+        lesson_uuid,
+        watched_seconds=max(watched_values) if watched_values else None,
+        completed=progress_data.completed,
+    )
     if not progress:
-        # Überprüfe, ob die Lektion existiert
-        lesson_result = await db.execute(
-            select(Lesson)
-            .where(Lesson.id == lesson_uuid)
-        )
-        lesson = lesson_result.scalar_one_or_none()
-        if not lesson:
-            print(f"[Enrollments] Lesson not found: {lesson_uuid}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Lektion nicht gefunden"
-            )
-        
-        progress = LessonProgress(
-            user_id=current_user.id,
-            lesson_id=lesson_uuid,
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lektion nicht gefunden"
         )
-        db.add(progress)
-        print(f"[Enrollments] Created new progress entry for lesson {lesson_uuid}")
-    
-    # Fortschritt aktualisieren
-    if progress_data.watched_seconds is not None:
-        progress.watched_seconds = progress_data.watched_seconds
-    
-    if progress_data.completed is not None:
-        progress.completed = progress_data.completed
-        if progress_data.completed:
-            progress.completed_at = datetime.utcnow()
-            print(f"[Enrollments] Marked lesson {lesson_uuid} as completed for user {current_user.id}")
     
+    # Kursfortschritt in derselben Transaktion nachziehen
+    await refresh_course_progress_for_lesson(db, current_user.id, lesson_uuid)
     await db.commit()
-    await db.refresh(progress)
-    
-    print(f"[Enrollments] Updated progress: completed={progress.completed}, completed_at={progress.completed_at}")
     
     return {
         "lesson_id": str(progress.lesson_id),
         "watched_seconds": progress.watched_seconds,
         "completed": progress.completed,
         "completed_at": progress.completed_at.isoformat() if progress.completed_at else None,
+        "buffered": False,
+    }
+
+
+@router.post("/progress/batch")
+async def sync_progress_batch(
+    batch: ProgressBatch,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Mehrere Fortschritts- und Quiz-Updates in einem Aufruf übernehmen.
+    
+    Für Clients, die nach Verbindungsabbruch ihren Stand nachreichen.
+    Lektionen werden mit einer Abfrage geprüft, alle gültigen Einträge
+    in einer Transaktion per Upsert geschrieben. Mehrere Einträge für
+    dieselbe Lektion werden zusammengeführt (max. watched_seconds,
+    letzter Abschluss-/Quiz-Stand). Ergebnis pro Eintrag in Eingabe-Reihenfolge.
+    
+    Quiz-Antworten werden wie bei submit_quiz auf dem Server bewertet
+    (grade_quiz), eine Punktzahl vom Client gibt es nicht.
+    """
+    from uuid import UUID
+    
+    # IDs parsen, ungültige direkt als Fehler markieren
+    parsed = []
+    for item in batch.items:
+        try:
+            parsed.append((item, UUID(item.lesson_id)))
+        except ValueError:
+            parsed.append((item, None))
+    
+    # Alle Lektionen mit EINER Abfrage prüfen
+    lesson_ids = {lesson_uuid for _, lesson_uuid in parsed if lesson_uuid}
+    lessons = {}
+    if lesson_ids:
+        columns = [Lesson.id, Lesson.course_id]
+        # Quiz-Fragen (JSON) nur laden, wenn es etwas zu bewerten gibt
+        if any(item.quiz_answers is not None for item, _ in parsed):
+            columns += [Lesson.quiz_questions, Lesson.quiz_passing_score]
+        lesson_result = await db.execute(
+            select(*columns)
+            .where(Lesson.id.in_(lesson_ids))
+        )
+        lessons = {row.id: row for row in lesson_result.all()}
+    
+    # Einträge pro Lektion zusammenführen
+    merged = {}
+    for item, lesson_uuid in parsed:
+        if lesson_uuid not in lessons:
+            continue
+        entry = merged.setdefault(lesson_uuid, {})
+        watched_values = [v for v in (entry.get("watched_seconds"), item.watched_seconds) if v is not None]
+        entry["watched_seconds"] = max(watched_values) if watched_values else None
+        if item.completed is not None:
+            entry["completed"] = item.completed
+        lesson = lessons[lesson_uuid]
+        if item.quiz_answers is not None and lesson.quiz_questions:
+            grade = grade_quiz(lesson.quiz_questions, lesson.quiz_passing_score, item.quiz_answers)
+            entry["quiz_score"] = grade["score"]
+            entry["quiz_passed"] = grade["passed"]
+    
+    # Gepufferte Heartbeats dieser Lektionen mitnehmen
+    for lesson_uuid, entry in merged.items():
+        buffered_seconds = progress_buffer.pop(current_user.id, lesson_uuid)
+        if buffered_seconds is not None:
+            entry["watched_seconds"] = max(entry.get("watched_seconds") or 0, buffered_seconds)
+    
+    saved = {}
+    if merged:
+        saved = await upsert_lesson_progress_batch(db, current_user.id, merged)
+        
+        # Kursfortschritt für alle betroffenen Kurse in einem Statement
+        completion_courses = {
+            lessons[lesson_uuid].course_id
+            for lesson_uuid, entry in merged.items()
+            if "completed" in entry
+        }
+        if completion_courses:
+            await refresh_course_progress(db, [current_user.id], list(completion_courses))
+        
+        await db.commit()
+    
+    results = []
+    for item, lesson_uuid in parsed:
+        if lesson_uuid is None:
+            results.append({"lesson_id": item.lesson_id, "status": "error", "detail": "Ungültige Lektions-ID"})
+            continue
+        progress = saved.get(lesson_uuid)
+        if progress is None:
+            results.append({"lesson_id": item.lesson_id, "status": "error", "detail": "Lektion nicht gefunden"})
+            continue
+        results.append({
+            "lesson_id": str(progress.lesson_id),
+            "status": "ok",
+            "watched_seconds": progress.watched_seconds,
+            "completed": progress.completed,
+            "completed_at": progress.completed_at.isoformat() if progress.completed_at else None,
+            "quiz_score": progress.quiz_score,
+            "quiz_passed": progress.quiz_passed,
+        })
+    
+    return {
+        "processed": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
     }
 
 
@@ -203,9 +328,8 @@ async def submit_quiz(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Quiz-Antworten einreichen und bewerten.
-    
-    TODO: Quiz-Daten aus der Datenbank laden und auswerten.
+    Quiz-Antworten einreichen und bewerten (grade_quiz, wie im
+    Fortschritts-Batch).
     """
     from uuid import UUID
     
@@ -218,14 +342,24 @@ async def submit_quiz(
             detail="Ungültige Lektions-ID"
         )
     
-    # TODO: Quiz aus Datenbank laden
-    # quiz = await db.get_quiz(lesson_id)
+    # Quiz der Lektion laden
+    lesson_result = await db.execute(
+        select(Lesson.quiz_questions, Lesson.quiz_passing_score)
+        .where(Lesson.id == lesson_uuid)
+    )
+    lesson = lesson_result.one_or_none()
+    if lesson is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lektion nicht gefunden"
+        )
+    if not lesson.quiz_questions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Diese Lektion hat kein Quiz"
+        )
     
-    # Dummy-Bewertung für jetzt
-    correct_answers = 7
-    total_questions = 10
-    score = int((correct_answers / total_questions) * 100)
-    passed = score >= 70  # 70% zum Bestehen
+    grade = grade_quiz(lesson.quiz_questions, lesson.quiz_passing_score, submission.answers)
     
     # Fortschritt aktualisieren
     result = await db.execute(
@@ -242,24 +376,19 @@ async def submit_quiz(
         )
         db.add(progress)
     
-    progress.quiz_score = score
-    progress.quiz_passed = passed
+    progress.quiz_score = grade["score"]
+    progress.quiz_passed = grade["passed"]
     
     await db.commit()
     
-    return QuizResult(
-        score=score,
-        passed=passed,
-        correct_answers=correct_answers,
-        total_questions=total_questions,
-    )
+    return QuizResult(**grade)
 
 
 @router.get("/progress/course/{course_id}")
 async def get_course_progress(
     course_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Gesamtfortschritt für einen Kurs abrufen.
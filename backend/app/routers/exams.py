@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from pydantic import BaseModel
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.config import get_settings
 from app.models import (
     User,
@@ -153,7 +153,7 @@ async def get_exam_slots(
     course_id: Optional[int] = None,
     available_only: bool = True,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Verfügbare Prüfungstermine abrufen.
@@ -188,7 +188,7 @@ async def get_exam_slots(
 async def get_my_pvl_status(
     course_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meinen PVL-Status für einen Kurs abrufen.
@@ -321,7 +321,7 @@ async def book_exam(
 @router.get("/my-bookings", response_model=List[ExamBookingResponse])
 async def get_my_bookings(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Prüfungsbuchungen abrufen.
@@ -360,7 +360,7 @@ async def get_my_bookings(
 @router.get("/my-grades", response_model=List[GradeResponse])
 async def get_my_grades(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Noten abrufen.
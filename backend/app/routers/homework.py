@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models import Homework, HomeworkSubmission, Lesson, User
 from app.routers.auth import get_current_user, require_role
 from app.models.user import UserRole
@@ -117,7 +117,7 @@ async def create_homework(
 async def list_homework_admin(
     lesson_id: UUID,
     current_user: User = Depends(require_role(UserRole.ADMIN, UserRole.TEACHER)),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Hausaufgaben einer Lektion abrufen (Admin)."""
     result = await db.execute(
@@ -178,7 +178,7 @@ async def delete_homework(
 async def list_homework_for_lesson(
     lesson_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Aktive Hausaufgaben einer Lektion abrufen."""
     result = await db.execute(
@@ -242,7 +242,7 @@ async def submit_homework(
 async def get_my_submission(
     homework_id: UUID,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Eigene Abgabe fuer eine Hausaufgabe abrufen."""
     result = await db.execute(
@@ -13,6 +13,8 @@ from datetime import datetime
 
 from app.db.session import get_db
 from app.models.content import Location
+from app.services.content_snapshot import content_store, notify_content_changed
+from app.services.http_cache import cache_policy, purge_cache_keys
 
 router = APIRouter()
 
@@ -88,20 +90,13 @@ class LocationResponse(LocationBase):
 # API Endpunkte - Öffentlich
 # =========================================
 @router.get("", response_model=List[LocationResponse])
-async def get_locations(
-    active_only: bool = True,
-    db: AsyncSession = Depends(get_db)
-):
+@cache_policy(300, stale_while_revalidate=3600, keys=["locations"])
+async def get_locations(active_only: bool = True):
     """
-    Alle Standorte abrufen.
+    Alle Standorte abrufen (aus dem CMS-Snapshot).
     """
-    query = select(Location).order_by(Location.order, Location.name)
-    
-    if active_only:
-        query = query.where(Location.is_active == True)
-    
-    result = await db.execute(query)
-    locations = result.scalars().all()
+    snapshot = await content_store.get()
+    locations = [loc for loc in snapshot.locations if loc.is_active or not active_only]
     
     return [
         LocationResponse(
@@ -135,17 +130,13 @@ async def get_locations(
 
 
 @router.get("/{location_id}", response_model=LocationResponse)
-async def get_location(
-    location_id: str,
-    db: AsyncSession = Depends(get_db)
-):
+@cache_policy(300, stale_while_revalidate=3600, keys=["locations"])
+async def get_location(location_id: str):
     """
-    Einzelnen Standort abrufen.
+    Einzelnen Standort abrufen (aus dem CMS-Snapshot).
     """
-    result = await db.execute(
-        select(Location).where(Location.id == location_id)
-    )
-    location = result.scalar_one_or_none()
+    snapshot = await content_store.get()
+    location = snapshot.locations_by_id.get(location_id.lower())
     
     if not location:
         raise HTTPException(
@@ -205,7 +196,9 @@ async def create_location(
     location = Location(**location_data.model_dump())
     
     db.add(location)
+    await notify_content_changed(db, "locations")
     await db.commit()
+    purge_cache_keys("locations")
     await db.refresh(location)
     
     return LocationResponse(
@@ -261,7 +254,9 @@ async def update_location(
     for field, value in update_data.items():
         setattr(location, field, value)
     
+    await notify_content_changed(db, "locations")
     await db.commit()
+    purge_cache_keys("locations")
     await db.refresh(location)
     
     return LocationResponse(
@@ -312,5 +307,7 @@ async def delete_location(
         )
     
     await db.delete(location)
+    await notify_content_changed(db, "locations")
     await db.commit()
+    purge_cache_keys("locations")
 
@@ -11,7 +11,7 @@ from sqlalchemy import select
 from pydantic import BaseModel
 import stripe
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.config import get_settings
 from app.models import (
     User,
@@ -23,6 +23,7 @@ from app.models import (
     EnrollmentStatus,
 )
 from app.routers.auth import get_current_user
+from app.services.auth_context import invalidate_auth_context
 
 settings = get_settings()
 router = APIRouter()
@@ -201,6 +202,7 @@ async def stripe_webhook(
         payment.enrollment_id = enrollment.id
         
         await db.commit()
+        await invalidate_auth_context(user_id)
         
         # TODO: Bestätigungs-E-Mail senden
         # TODO: Rechnung erstellen
@@ -291,7 +293,7 @@ async def notify_bank_transfer(
 async def get_payment(
     payment_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Zahlungsdetails abrufen.
@@ -324,7 +326,7 @@ async def get_payment(
 async def get_payment_invoice(
     payment_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Rechnung für Zahlung herunterladen.
@@ -3,6 +3,9 @@
 # ===========================================
 # Live-Sessions und Anwesenheits-Endpunkte
 
+import heapq
+from itertools import islice
+from operator import itemgetter
 from typing import List, Optional
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -11,7 +14,8 @@ from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 
-from app.db.session import get_db
+from app.core.config import get_settings
+from app.db.session import get_db, get_read_db
 from app.models import (
     User,
     UserRole,
@@ -21,8 +25,18 @@ from app.models import (
     AttendanceStatus,
     ClassEnrollment,
 )
-from app.routers.auth import get_current_user, require_role
+from app.routers.auth import get_current_user, get_auth_context, require_role
+from app.services.auth_context import AuthContext
+from app.services.http_cache import cache_policy
+from app.services.schedule_recurrence import (
+    Occurrence,
+    expand_schedules,
+    load_holiday_index,
+    load_schedule_classes,
+    local_now,
+)
 
+settings = get_settings()
 router = APIRouter()
 
 
@@ -71,137 +85,113 @@ class ConfirmationResponse(BaseModel):
 # =========================================
 # API Endpunkte - Öffentlich (für Startseite)
 # =========================================
+PUBLIC_SESSIONS_LIMIT = 50
+
+
+def _course_color(course) -> str:
+    """Farbe basierend auf Kurstyp"""
+    if course and course.category and course.category.value == "islamic":
+        return "purple"
+    return "primary"
+
+
+def _public_course(course) -> Optional[dict]:
+    if not course:
+        return None
+    return {"id": str(course.id), "title": course.title, "slug": course.slug}
+
+
+def _public_live_session(s: LiveSession) -> dict:
+    return {
+        "id": str(s.id),
+        "title": s.title,
+        "date": s.scheduled_at.strftime("%Y-%m-%d"),
+        "start_time": s.scheduled_at.strftime("%H:%M:%S"),
+        "end_time": (s.scheduled_at + timedelta(minutes=s.duration_minutes)).strftime("%H:%M:%S"),
+        "type": s.session_type.value,
+        "location": s.location,
+        "zoom_link": s.zoom_join_url,
+        "description": s.description,
+        "color": _course_color(s.course) if s.is_generated else "primary",
+        "course": _public_course(s.course),
+        "teacher": None,
+    }
+
+
+def _public_occurrence(o: Occurrence) -> dict:
+    schedule, cls = o.schedule, o.class_
+    return {
+        "id": f"schedule-{schedule.id}-{o.start.strftime('%Y%m%d')}",
+        "title": cls.name,
+        "date": o.start.strftime("%Y-%m-%d"),
+        "start_time": o.start.strftime("%H:%M:%S"),
+        "end_time": o.end.strftime("%H:%M:%S"),
+        "type": schedule.session_type.value,
+        "location": schedule.location,
+        "zoom_link": schedule.zoom_join_url,
+        "description": cls.description,
+        "color": _course_color(cls.course),
+        "course": _public_course(cls.course),
+        "teacher": None,
+    }
+
+
 @router.get("/public")
+@cache_policy(60, stale_while_revalidate=300, keys=["sessions"])
 async def get_public_sessions(
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Öffentliche Sessions für Stundenplan auf Startseite.
-    Zeigt:
-    1. Konkrete LiveSessions (bereits erstellt)
-    2. Virtuelle Sessions aus ClassSchedules (wiederkehrende Termine)
-    """
-    from app.models import Course, Class, ClassSchedule
     
-    # Parse Datumsfilter
-    now = datetime.utcnow()
+    Termine aus dem Stundenplan liegen für die nächsten
+    SCHEDULE_MATERIALIZE_WEEKS Wochen als LiveSessions vor (ein Range-Scan).
+    Nur für den Teil des Zeitraums dahinter werden wiederkehrende Termine
+    berechnet und einsortiert.
+    """
+    # Parse Datumsfilter (Ortszeit, wie scheduled_at)
+    now = local_now()
     start = datetime.fromisoformat(from_date) if from_date else now
     end = datetime.fromisoformat(to_date + "T23:59:59") if to_date else (now + timedelta(days=30))
     
-    result_sessions = []
-    
     # 1. Konkrete LiveSessions laden
-    query = select(LiveSession).options(
-        selectinload(LiveSession.class_),
-        selectinload(LiveSession.course),
-    ).where(LiveSession.is_cancelled == False)
-    
-    query = query.where(LiveSession.scheduled_at >= start)
-    query = query.where(LiveSession.scheduled_at <= end)
-    query = query.order_by(LiveSession.scheduled_at).limit(50)
-    
-    result = await db.execute(query)
+    result = await db.execute(
+        select(LiveSession)
+        .options(selectinload(LiveSession.course))
+        .where(LiveSession.is_cancelled == False)
+        .where(LiveSession.scheduled_at >= start)
+        .where(LiveSession.scheduled_at <= end)
+        .order_by(LiveSession.scheduled_at)
+        .limit(PUBLIC_SESSIONS_LIMIT)
+    )
     sessions = result.scalars().all()
+    live = [(s.scheduled_at, _public_live_session(s)) for s in sessions]
     
-    for s in sessions:
-        result_sessions.append({
-            "id": str(s.id),
-            "title": s.title,
-            "date": s.scheduled_at.strftime("%Y-%m-%d"),
-            "start_time": s.scheduled_at.strftime("%H:%M:%S"),
-            "end_time": (s.scheduled_at + timedelta(minutes=s.duration_minutes)).strftime("%H:%M:%S"),
-            "type": s.session_type.value,
-            "location": s.location,
-            "zoom_link": s.zoom_join_url,
-            "description": s.description,
-            "color": "primary",
-            "course": {
-                "id": str(s.course_id) if s.course_id else None,
-                "title": s.course.title if s.course else None,
-                "slug": s.course.slug if s.course else None,
-            } if s.course_id else None,
-            "teacher": None,
-        })
-    
-    # 2. Virtuelle Sessions aus ClassSchedules generieren
-    # Lade alle aktiven Klassen mit Schedules
-    query = select(Class).options(
-        selectinload(Class.schedules),
-        selectinload(Class.course),
-    ).where(Class.is_active == True)
-    
-    result = await db.execute(query)
-    classes = result.scalars().all()
+    # 2. Hinter dem materialisierten Horizont: Termine berechnen
+    horizon = now + timedelta(weeks=settings.SCHEDULE_MATERIALIZE_WEEKS)
+    virtual_start = max(start, horizon)
+    needs_virtual = end > horizon and (
+        len(sessions) < PUBLIC_SESSIONS_LIMIT or sessions[-1].scheduled_at > horizon
+    )
+    if not needs_virtual:
+        return [entry for _, entry in live]
+    
+    classes = await load_schedule_classes(db, virtual_start.date(), end.date())
+    holidays = await load_holiday_index(db, virtual_start.date(), end.date())
+    occurrences = expand_schedules(
+        classes,
+        virtual_start,
+        end,
+        holidays,
+        exclude={(s.class_id, s.scheduled_at.date(), s.scheduled_at.time()) for s in sessions},
+    )
+    virtual = ((o.start, _public_occurrence(o)) for o in occurrences)
     
-    # Für jeden Schedule virtuelle Termine generieren
-    for cls in classes:
-        if not cls.schedules:
-            continue
-            
-        for schedule in cls.schedules:
-            # Generiere Termine für den Zeitraum
-            current = start
-            while current <= end:
-                # Finde den nächsten passenden Wochentag
-                days_ahead = schedule.day_of_week - current.weekday()
-                if days_ahead < 0:
-                    days_ahead += 7
-                
-                session_date = current + timedelta(days=days_ahead)
-                
-                # Prüfe ob im Zeitraum
-                if session_date > end:
-                    break
-                    
-                # Kombiniere Datum und Zeit
-                session_datetime = datetime.combine(
-                    session_date.date(),
-                    schedule.start_time
-                )
-                
-                # Nur zukünftige Termine
-                if session_datetime >= start and session_datetime <= end:
-                    # Prüfe ob bereits eine LiveSession existiert (vermeiden Duplikate)
-                    existing = any(
-                        s["date"] == session_date.strftime("%Y-%m-%d") and
-                        s["start_time"] == schedule.start_time.strftime("%H:%M:%S")
-                        for s in result_sessions
-                    )
-                    
-                    if not existing:
-                        # Farbe basierend auf Kurstyp
-                        color = "primary"
-                        if cls.course and cls.course.category:
-                            color = "purple" if cls.course.category.value == "islamic" else "primary"
-                        
-                        result_sessions.append({
-                            "id": f"schedule-{schedule.id}-{session_date.strftime('%Y%m%d')}",
-                            "title": cls.name,
-                            "date": session_date.strftime("%Y-%m-%d"),
-                            "start_time": schedule.start_time.strftime("%H:%M:%S"),
-                            "end_time": schedule.end_time.strftime("%H:%M:%S"),
-                            "type": schedule.session_type.value,
-                            "location": schedule.location,
-                            "zoom_link": schedule.zoom_join_url,
-                            "description": cls.description,
-                            "color": color,
-                            "course": {
-                                "id": str(cls.course_id) if cls.course_id else None,
-                                "title": cls.course.title if cls.course else None,
-                                "slug": cls.course.slug if cls.course else None,
-                            } if cls.course else None,
-                            "teacher": None,
-                        })
-                
-                # Nächste Woche
-                current = session_date + timedelta(days=1)
-    
-    # Nach Datum und Zeit sortieren
-    result_sessions.sort(key=lambda x: (x["date"], x["start_time"]))
-    
-    return result_sessions[:50]  # Limit auf 50
+    # Nach Zeit zusammenführen, beim Limit aufhören
+    merged = heapq.merge(live, virtual, key=itemgetter(0))
+    return [entry for _, entry in islice(merged, PUBLIC_SESSIONS_LIMIT)]
 
 
 # =========================================
@@ -211,18 +201,16 @@ async def get_public_sessions(
 async def get_my_sessions(
     upcoming_only: bool = True,
     limit: int = 20,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Sessions abrufen (Klassen, in denen ich eingeschrieben bin).
     """
-    # Meine Klassen-IDs finden
-    result = await db.execute(
-        select(ClassEnrollment.class_id)
-        .where(ClassEnrollment.user_id == current_user.id)
-    )
-    class_ids = [row[0] for row in result.all()]
+    current_user = auth.user
+    
+    # Meine Klassen-IDs (aus dem Auth-Kontext)
+    class_ids = list(auth.class_ids)
     
     if not class_ids:
         return []
@@ -275,18 +263,16 @@ async def get_my_sessions(
 @router.get("/upcoming")
 async def get_upcoming_sessions(
     days: int = 7,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Sessions der nächsten X Tage abrufen (für Dashboard-Widget).
     """
-    # Meine Klassen-IDs finden
-    result = await db.execute(
-        select(ClassEnrollment.class_id)
-        .where(ClassEnrollment.user_id == current_user.id)
-    )
-    class_ids = [row[0] for row in result.all()]
+    current_user = auth.user
+    
+    # Meine Klassen-IDs (aus dem Auth-Kontext)
+    class_ids = list(auth.class_ids)
     
     if not class_ids:
         return {"sessions": [], "requires_confirmation": []}
@@ -343,19 +329,17 @@ async def get_upcoming_sessions(
 
 @router.get("/unconfirmed")
 async def get_unconfirmed_sessions(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Sessions ohne Bestätigung für den aktuellen Benutzer abrufen.
     Zeigt nur zukünftige Sessions in den nächsten 14 Tagen.
     """
-    # Meine Klassen-IDs finden
-    result = await db.execute(
-        select(ClassEnrollment.class_id)
-        .where(ClassEnrollment.user_id == current_user.id)
-    )
-    class_ids = [row[0] for row in result.all()]
+    current_user = auth.user
+    
+    # Meine Klassen-IDs (aus dem Auth-Kontext)
+    class_ids = list(auth.class_ids)
     
     if not class_ids:
         return {"unconfirmed": []}
@@ -417,7 +401,7 @@ async def get_unconfirmed_sessions(
 async def get_session(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Session Details abrufen.
@@ -530,7 +514,7 @@ async def confirm_attendance(
 async def get_my_confirmation(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Teilnahmebestätigung abrufen.
@@ -609,14 +593,16 @@ class BulkAttendanceUpdate(BaseModel):
 @router.get("/{session_id}/attendance")
 async def get_session_attendance(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Anwesenheitsliste einer Session abrufen (für Lehrer).
     Zeigt alle Studenten der Klasse mit ihrem Bestätigungs- und Anwesenheitsstatus.
     """
-    from app.models import Class, ClassTeacher, LiveSessionType
+    from app.models import Class, LiveSessionType
+    
+    current_user = auth.user
     
     # Nur Lehrer und Admins
     if current_user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
@@ -641,12 +627,7 @@ async def get_session_attendance(
     
     # Prüfen ob User Lehrer dieser Klasse ist (außer Admin)
     if current_user.role == UserRole.TEACHER:
-        result = await db.execute(
-            select(ClassTeacher)
-            .where(ClassTeacher.class_id == session.class_id)
-            .where(ClassTeacher.teacher_id == current_user.id)
-        )
-        if not result.scalar_one_or_none():
+        if not auth.teaches_class(session.class_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Sie sind nicht Lehrer dieser Klasse"
@@ -728,13 +709,15 @@ async def get_session_attendance(
 async def update_session_attendance(
     session_id: str,
     data: BulkAttendanceUpdate,
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(get_auth_context),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Anwesenheit für mehrere Studenten erfassen/aktualisieren (für Lehrer).
     """
-    from app.models import ClassTeacher, LiveSessionType, CheckInMethod
+    from app.models import LiveSessionType, CheckInMethod
+    
+    current_user = auth.user
     
     # Nur Lehrer und Admins
     if current_user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
@@ -757,12 +740,7 @@ async def update_session_attendance(
     
     # Prüfen ob User Lehrer dieser Klasse ist (außer Admin)
     if current_user.role == UserRole.TEACHER:
-        result = await db.execute(
-            select(ClassTeacher)
-            .where(ClassTeacher.class_id == session.class_id)
-            .where(ClassTeacher.teacher_id == current_user.id)
-        )
-        if not result.scalar_one_or_none():
+        if not auth.teaches_class(session.class_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Sie sind nicht Lehrer dieser Klasse"
@@ -7,16 +7,18 @@ from typing import List, Optional
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, literal, union_all
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, date
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.db.instrumentation import query_budget
 from app.models import (
     User,
     ClassEnrollment,
     Enrollment,
+    EnrollmentStatus,
     LessonProgress,
     Certificate,
     Invoice,
@@ -28,7 +30,11 @@ from app.models import (
     Lesson,
     UserRole,
 )
-from app.routers.auth import get_current_user
+from app.models.class_.class_model import class_courses
+from app.routers.auth import get_current_user, get_auth_context
+from app.services.auth_context import AuthContext
+from app.services.principal_cache import invalidate_principal, load_profile
+from app.services.progress import get_user_course_progress
 
 router = APIRouter()
 
@@ -147,10 +153,12 @@ class InvoiceResponse(BaseModel):
 # API Endpunkte
 # =========================================
 @router.get("/me", response_model=UserProfile)
+@query_budget(1)
 async def get_my_profile(current_user: User = Depends(get_current_user)):
     """
     Eigenes Profil abrufen.
     """
+    await load_profile(current_user)
     return UserProfile(
         id=str(current_user.id),
         email=current_user.email,
@@ -199,6 +207,7 @@ async def update_my_profile(
     
     await db.commit()
     await db.refresh(current_user)
+    await invalidate_principal(current_user.id)
     
     return UserProfile(
         id=str(current_user.id),
@@ -224,7 +233,7 @@ async def update_my_profile(
 @router.get("/me/classes", response_model=List[ClassEnrollmentResponse])
 async def get_my_classes(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Klassen-Einschreibungen abrufen.
@@ -251,204 +260,128 @@ async def get_my_classes(
     ]
 
 
+def _my_enrollment_rows(auth: AuthContext):
+    """
+    Aktive Einschreibungen eines Users mit den Kursdaten für die Übersicht:
+    Klassen (Legacy course_id, dann class_courses), danach direkte
+    Einschreibungen. Ein Kurs kann mehrfach vorkommen.
+
+    Klassen und Kurse kommen aus dem Auth-Kontext, die Abfrage liest nur
+    noch Einschreibungs-ID und Datum dazu.
+    """
+    user_id = auth.user_id
+    class_ids = list(auth.class_ids)
+    legacy = (
+        select(
+            literal(0).label("source"),
+            ClassEnrollment.id.label("enrollment_id"),
+            ClassEnrollment.started_at.label("started_at"),
+            literal(0).label("position"),
+            Class.course_id.label("course_id"),
+        )
+        .join(Class, Class.id == ClassEnrollment.class_id)
+        .where(ClassEnrollment.user_id == user_id)
+        .where(ClassEnrollment.class_id.in_(class_ids))
+        .where(Class.course_id.isnot(None))
+    )
+    linked = (
+        select(
+            literal(0),
+            ClassEnrollment.id,
+            ClassEnrollment.started_at,
+            literal(1),
+            class_courses.c.course_id,
+        )
+        .join(class_courses, class_courses.c.class_id == ClassEnrollment.class_id)
+        .where(ClassEnrollment.user_id == user_id)
+        .where(ClassEnrollment.class_id.in_(class_ids))
+    )
+    direct = (
+        select(
+            literal(1),
+            Enrollment.id,
+            Enrollment.started_at,
+            literal(0),
+            Enrollment.course_id,
+        )
+        .where(Enrollment.user_id == user_id)
+        .where(Enrollment.status == EnrollmentStatus.ACTIVE)
+    )
+    entries = union_all(legacy, linked, direct).subquery()
+    return (
+        select(
+            entries.c.enrollment_id,
+            entries.c.started_at,
+            Course.id.label("course_id"),
+            Course.title,
+            Course.slug,
+            Course.short_description,
+            Course.thumbnail_url,
+            Course.duration_weeks,
+        )
+        .join(Course, Course.id == entries.c.course_id)
+        .where(Course.id.in_(list(auth.course_ids)))
+        .order_by(
+            entries.c.source,
+            entries.c.started_at,
+            entries.c.enrollment_id,
+            entries.c.position,
+            Course.title,
+        )
+    )
+
+
 @router.get("/me/enrollments")
+@query_budget(4)
 async def get_my_enrollments(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Alle meine Kurs-Einschreibungen abrufen.
+    Alle meine aktiven Kurs-Einschreibungen abrufen.
     Enthält sowohl direkte Einschreibungen als auch Kurse über Klassen.
     """
-    from sqlalchemy import func
-    
-    enrollments_list = []
+    if not auth.course_ids:
+        return []
+    
+    # Klassen-Kurse (Legacy + Many-to-Many) und direkte Seminar-
+    # Einschreibungen in einer Abfrage, Klassen zuerst; je Kurs zählt
+    # die erste Einschreibung
+    result = await db.execute(_my_enrollment_rows(auth))
+    rows = []
     added_course_ids = set()
-    
-    # 1. Klassen-basierte Kurse
-    class_result = await db.execute(
-        select(ClassEnrollment)
-        .options(
-            selectinload(ClassEnrollment.class_).selectinload(Class.course),
-            selectinload(ClassEnrollment.class_).selectinload(Class.courses)
-        )
-        .where(ClassEnrollment.user_id == current_user.id)
-    )
-    class_enrollments = class_result.scalars().all()
-    
-    for ce in class_enrollments:
-        if not ce.class_:
+    for row in result.all():
+        if row.course_id in added_course_ids:
             continue
-        
-        # Sammle alle Kurse (Legacy + Many-to-Many)
-        courses_to_add = []
-        if ce.class_.course:
-            courses_to_add.append(ce.class_.course)
-        for c in ce.class_.courses:
-            courses_to_add.append(c)
-        
-        for course in courses_to_add:
-            if course.id in added_course_ids:
-                continue
-            added_course_ids.add(course.id)
-            
-            # Fortschritt berechnen (alle Lektionen, auch unveröffentlichte)
-            total_result = await db.execute(
-                select(func.count(Lesson.id))
-                .where(Lesson.course_id == course.id)
-            )
-            total_lessons = total_result.scalar() or 0
-            
-            completed_result = await db.execute(
-                select(func.count(LessonProgress.id))
-                .join(Lesson, LessonProgress.lesson_id == Lesson.id)
-                .where(LessonProgress.user_id == current_user.id)
-                .where(Lesson.course_id == course.id)
-                .where(LessonProgress.completed == True)
-            )
-            completed_lessons = completed_result.scalar() or 0
-            
-            print(f"[Enrollments] Class - Course {course.title}: {completed_lessons}/{total_lessons} - user={current_user.id}")
-            
-            progress = int((completed_lessons / total_lessons) * 100) if total_lessons > 0 else 0
-            is_completed = progress >= 100
-            
-            # Nächste unvollendete Lektion ermitteln
-            next_lesson_slug = None
-            if progress < 100 and total_lessons > 0:
-                # Alle Lektionen sortiert abrufen
-                lessons_result = await db.execute(
-                    select(Lesson)
-                    .where(Lesson.course_id == course.id)
-                    .order_by(Lesson.order)
-                )
-                all_lessons = lessons_result.scalars().all()
-                
-                # Abgeschlossene Lektionen ermitteln
-                completed_ids_result = await db.execute(
-                    select(LessonProgress.lesson_id)
-                    .join(Lesson, LessonProgress.lesson_id == Lesson.id)
-                    .where(LessonProgress.user_id == current_user.id)
-                    .where(Lesson.course_id == course.id)
-                    .where(LessonProgress.completed == True)
-                )
-                completed_lesson_ids = set(row[0] for row in completed_ids_result.fetchall())
-                
-                # Erste nicht abgeschlossene Lektion finden (mit gültigem Slug)
-                for lesson in all_lessons:
-                    if lesson.id not in completed_lesson_ids and lesson.slug:
-                        next_lesson_slug = lesson.slug
-                        break
-                
-                # Falls alle abgeschlossen, nimm die erste Lektion mit Slug
-                if not next_lesson_slug and all_lessons:
-                    for lesson in all_lessons:
-                        if lesson.slug:
-                            next_lesson_slug = lesson.slug
-                            break
-            
-            enrollments_list.append({
-                "id": str(ce.id),
-                "course": {
-                    "id": str(course.id),
-                    "title": course.title,
-                    "slug": course.slug,
-                    "short_description": course.short_description,
-                    "thumbnail_url": course.thumbnail_url,
-                    "duration_weeks": course.duration_weeks,
-                    "total_lessons": total_lessons,
-                },
-                "progress": progress,
-                "completed_lessons": completed_lessons,
-                "status": "completed" if is_completed else "active",
-                "enrolled_at": ce.started_at.isoformat() if ce.started_at else None,
-                "next_lesson_slug": next_lesson_slug,
-            })
+        added_course_ids.add(row.course_id)
+        rows.append(row)
     
-    # 2. Direkte Seminar-Einschreibungen
-    direct_result = await db.execute(
-        select(Enrollment)
-        .options(selectinload(Enrollment.course))
-        .where(Enrollment.user_id == current_user.id)
+    # Fortschritt aller Kurse in einer Abfrage (alle Lektionen, auch unveröffentlichte)
+    progress_by_course = await get_user_course_progress(
+        db, auth.user_id, [row.course_id for row in rows]
     )
-    direct_enrollments = direct_result.scalars().all()
     
-    for e in direct_enrollments:
-        if not e.course or e.course.id in added_course_ids:
-            continue
-        added_course_ids.add(e.course.id)
-        
-        # Fortschritt berechnen (alle Lektionen, auch unveröffentlichte)
-        total_result = await db.execute(
-            select(func.count(Lesson.id))
-            .where(Lesson.course_id == e.course.id)
-        )
-        total_lessons = total_result.scalar() or 0
-        
-        completed_result = await db.execute(
-            select(func.count(LessonProgress.id))
-            .join(Lesson, LessonProgress.lesson_id == Lesson.id)
-            .where(LessonProgress.user_id == current_user.id)
-            .where(Lesson.course_id == e.course.id)
-            .where(LessonProgress.completed == True)
-        )
-        completed_lessons = completed_result.scalar() or 0
-        
-        print(f"[Enrollments] Direct - Course {e.course.title}: {completed_lessons}/{total_lessons} - user={current_user.id}")
-        
-        progress = int((completed_lessons / total_lessons) * 100) if total_lessons > 0 else 0
-        is_completed = progress >= 100
-        
-        # Nächste unvollendete Lektion ermitteln
-        next_lesson_slug = None
-        if progress < 100 and total_lessons > 0:
-            # Alle Lektionen sortiert abrufen
-            lessons_result = await db.execute(
-                select(Lesson)
-                .where(Lesson.course_id == e.course.id)
-                .order_by(Lesson.order)
-            )
-            all_lessons = lessons_result.scalars().all()
-            
-            # Abgeschlossene Lektionen ermitteln
-            completed_ids_result = await db.execute(
-                select(LessonProgress.lesson_id)
-                .join(Lesson, LessonProgress.lesson_id == Lesson.id)
-                .where(LessonProgress.user_id == current_user.id)
-                .where(Lesson.course_id == e.course.id)
-                .where(LessonProgress.completed == True)
-            )
-            completed_lesson_ids = set(row[0] for row in completed_ids_result.fetchall())
-            
-            # Erste nicht abgeschlossene Lektion finden (mit gültigem Slug)
-            for lesson in all_lessons:
-                if lesson.id not in completed_lesson_ids and lesson.slug:
-                    next_lesson_slug = lesson.slug
-                    break
-            
-            # Falls alle abgeschlossen, nimm die erste Lektion mit Slug
-            if not next_lesson_slug and all_lessons:
-                for lesson in all_lessons:
-                    if lesson.slug:
-                        next_lesson_slug = lesson.slug
-                        break
+    enrollments_list = []
+    for row in rows:
+        course_progress = progress_by_course[row.course_id]
+        is_completed = course_progress["progress"] >= 100
         
         enrollments_list.append({
-            "id": str(e.id),
+            "id": str(row.enrollment_id),
             "course": {
-                "id": str(e.course.id),
-                "title": e.course.title,
-                "slug": e.course.slug,
-                "short_description": e.course.short_description,
-                "thumbnail_url": e.course.thumbnail_url,
-                "duration_weeks": e.course.duration_weeks,
-                "total_lessons": total_lessons,
+                "id": str(row.course_id),
+                "title": row.title,
+                "slug": row.slug,
+                "short_description": row.short_description,
+                "thumbnail_url": row.thumbnail_url,
+                "duration_weeks": row.duration_weeks,
+                "total_lessons": course_progress["total_lessons"],
             },
-            "progress": progress,
-            "completed_lessons": completed_lessons,
+            "progress": course_progress["progress"],
+            "completed_lessons": course_progress["completed_lessons"],
             "status": "completed" if is_completed else "active",
-            "enrolled_at": e.started_at.isoformat() if e.started_at else None,
-            "next_lesson_slug": next_lesson_slug,
+            "enrolled_at": row.started_at.isoformat() if row.started_at else None,
+            "next_lesson_slug": course_progress["next_lesson_slug"],
         })
     
     return enrollments_list
@@ -458,7 +391,7 @@ async def get_my_enrollments(
 async def get_my_progress(
     course_id: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meinen Lektions-Fortschritt abrufen.
@@ -494,7 +427,7 @@ async def get_my_progress(
 @router.get("/me/certificates", response_model=List[CertificateResponse])
 async def get_my_certificates(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Zertifikate abrufen.
@@ -521,7 +454,7 @@ async def get_my_certificates(
 @router.get("/me/invoices", response_model=List[InvoiceResponse])
 async def get_my_invoices(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Meine Rechnungen abrufen.
@@ -551,9 +484,10 @@ async def get_my_invoices(
 # Dashboard-Endpunkte
 # =========================================
 @router.get("/me/dashboard")
+@query_budget(16)
 async def get_student_dashboard(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Studenten-Dashboard Daten abrufen.
@@ -680,6 +614,7 @@ async def get_student_dashboard(
     # === Meine Kurse mit Fortschritt ===
     my_courses = []
     added_course_ids = set()
+    dashboard_courses = []
     
     # 1. Kurse aus Klassen-Einschreibungen
     for enrollment in class_enrollments:
@@ -698,75 +633,7 @@ async def get_student_dashboard(
             if course.id in added_course_ids:
                 continue
             added_course_ids.add(course.id)
-            
-            # Lektionen für diesen Kurs (alle, auch unveröffentlichte)
-            result = await db.execute(
-                select(func.count(Lesson.id))
-                .where(Lesson.course_id == course.id)
-            )
-            total_lessons = result.scalar() or 0
-            
-            # Abgeschlossene Lektionen (nur aus Lektionen in diesem Kurs)
-            result = await db.execute(
-                select(func.count(LessonProgress.id))
-                .where(LessonProgress.user_id == current_user.id)
-                .where(LessonProgress.lesson_id.in_(
-                    select(Lesson.id).where(Lesson.course_id == course.id)
-                ))
-                .where(LessonProgress.completed == True)
-            )
-            completed_lessons = result.scalar() or 0
-            
-            print(f"[DEBUG] Class enrollment - Course {course.title}: total_lessons={total_lessons}, completed={completed_lessons}")
-            
-            progress = int((completed_lessons / total_lessons) * 100) if total_lessons > 0 else 0
-            
-            print(f"[Dashboard] Class - Course {course.title}: {completed_lessons}/{total_lessons} completed (progress={progress}%) - user_id={current_user.id}")
-            
-            # Nächste unvollendete Lektion ermitteln
-            next_lesson_slug = None
-            if progress < 100 and total_lessons > 0:
-                # Alle Lektionen sortiert abrufen (auch unveröffentlichte)
-                lessons_result = await db.execute(
-                    select(Lesson)
-                    .where(Lesson.course_id == course.id)
-                    .order_by(Lesson.order)
-                )
-                all_lessons = lessons_result.scalars().all()
-                
-                # Abgeschlossene Lektionen ermitteln
-                completed_ids_result = await db.execute(
-                    select(LessonProgress.lesson_id)
-                    .join(Lesson, LessonProgress.lesson_id == Lesson.id)
-                    .where(LessonProgress.user_id == current_user.id)
-                    .where(Lesson.course_id == course.id)
-                    .where(LessonProgress.completed == True)
-                )
-                completed_lesson_ids = set(row[0] for row in completed_ids_result.fetchall())
-                
-                # Erste nicht abgeschlossene Lektion finden (mit gültigem Slug)
-                for lesson in all_lessons:
-                    if lesson.id not in completed_lesson_ids and lesson.slug:
-                        next_lesson_slug = lesson.slug
-                        break
-                
-                # Falls alle abgeschlossen, nimm die erste Lektion mit Slug
-                if not next_lesson_slug and all_lessons:
-                    for lesson in all_lessons:
-                        if lesson.slug:
-                            next_lesson_slug = lesson.slug
-                            break
-            
-            my_courses.append({
-                "id": str(course.id),
-                "title": course.title,
-                "slug": course.slug,
-                "progress": progress,
-                "next_lesson": "Nächste Lektion",
-                "next_lesson_slug": next_lesson_slug,
-                "total_lessons": total_lessons,
-                "completed_lessons": completed_lessons,
-            })
+            dashboard_courses.append(course)
     
     # 2. Direkte Kurs-Einschreibungen (Seminare ohne Klasse)
     result = await db.execute(
@@ -786,74 +653,24 @@ async def get_student_dashboard(
         if course.id in added_course_ids:
             continue
         added_course_ids.add(course.id)
-        
-        # Lektionen für diesen Kurs (alle, auch unveröffentlichte)
-        result = await db.execute(
-            select(func.count(Lesson.id))
-            .where(Lesson.course_id == course.id)
-        )
-        total_lessons = result.scalar() or 0
-        
-        # Abgeschlossene Lektionen (nur aus Lektionen in diesem Kurs)
-        result = await db.execute(
-            select(func.count(LessonProgress.id))
-            .where(LessonProgress.user_id == current_user.id)
-            .where(LessonProgress.lesson_id.in_(
-                select(Lesson.id).where(Lesson.course_id == course.id)
-            ))
-            .where(LessonProgress.completed == True)
-        )
-        completed_lessons = result.scalar() or 0
-        
-        print(f"[DEBUG] Direct enrollment - Course {course.title}: total_lessons={total_lessons}, completed={completed_lessons}")
-        
-        progress = int((completed_lessons / total_lessons) * 100) if total_lessons > 0 else 0
-        
-        print(f"[Dashboard] Direct - Course {course.title}: {completed_lessons}/{total_lessons} completed (progress={progress}%) - user_id={current_user.id}")
-        
-        # Nächste unvollendete Lektion ermitteln
-        next_lesson_slug = None
-        if progress < 100 and total_lessons > 0:
-            # Alle Lektionen sortiert abrufen (auch unveröffentlichte)
-            lessons_result = await db.execute(
-                select(Lesson)
-                .where(Lesson.course_id == course.id)
-                .order_by(Lesson.order)
-            )
-            all_lessons = lessons_result.scalars().all()
-            
-            # Abgeschlossene Lektionen ermitteln
-            completed_ids_result = await db.execute(
-                select(LessonProgress.lesson_id)
-                .join(Lesson, LessonProgress.lesson_id == Lesson.id)
-                .where(LessonProgress.user_id == current_user.id)
-                .where(Lesson.course_id == course.id)
-                .where(LessonProgress.completed == True)
-            )
-            completed_lesson_ids = set(row[0] for row in completed_ids_result.fetchall())
-            
-            # Erste nicht abgeschlossene Lektion finden (mit gültigem Slug)
-            for lesson in all_lessons:
-                if lesson.id not in completed_lesson_ids and lesson.slug:
-                    next_lesson_slug = lesson.slug
-                    break
-            
-            # Falls alle abgeschlossen, nimm die erste Lektion mit Slug
-            if not next_lesson_slug and all_lessons:
-                for lesson in all_lessons:
-                    if lesson.slug:
-                        next_lesson_slug = lesson.slug
-                        break
-        
+        dashboard_courses.append(course)
+    
+    # Fortschritt aller Kurse in einer Abfrage (alle Lektionen, auch unveröffentlichte)
+    progress_by_course = await get_user_course_progress(
+        db, current_user.id, [course.id for course in dashboard_courses]
+    )
+    
+    for course in dashboard_courses:
+        course_progress = progress_by_course[course.id]
         my_courses.append({
             "id": str(course.id),
             "title": course.title,
             "slug": course.slug,
-            "progress": progress,
+            "progress": course_progress["progress"],
             "next_lesson": "Nächste Lektion",
-            "next_lesson_slug": next_lesson_slug,
-            "total_lessons": total_lessons,
-            "completed_lessons": completed_lessons,
+            "next_lesson_slug": course_progress["next_lesson_slug"],
+            "total_lessons": course_progress["total_lessons"],
+            "completed_lessons": course_progress["completed_lessons"],
         })
     
     # === PVL Status (erstes Kurs mit PVL-Anforderung) ===
@@ -885,7 +702,7 @@ async def get_student_dashboard(
 @router.get("/me/attendance")
 async def get_my_attendance(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Anwesenheitsdaten des Schülers abrufen.
@@ -1009,8 +826,8 @@ async def get_my_attendance(
 
 @router.get("/me/teacher-dashboard")
 async def get_teacher_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Lehrer-Dashboard Daten abrufen.
@@ -1024,7 +841,9 @@ async def get_teacher_dashboard(
     """
     from datetime import timedelta
     from sqlalchemy import func
-    from app.models import ClassTeacher, ExamBooking, ExamSlot, Attendance, AttendanceStatus
+    from app.models import ExamBooking, ExamSlot, Attendance, AttendanceStatus
+    
+    current_user = auth.user
     
     # Nur für Lehrer und Admins
     if current_user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
@@ -1039,12 +858,8 @@ async def get_teacher_dashboard(
     now = datetime.utcnow()
     today = now.date()
     
-    # === Meine Klassen (als Lehrer) ===
-    result = await db.execute(
-        select(ClassTeacher.class_id)
-        .where(ClassTeacher.teacher_id == current_user.id)
-    )
-    teacher_class_ids = [row[0] for row in result.all()]
+    # === Meine Klassen (als Lehrer, aus dem Auth-Kontext) ===
+    teacher_class_ids = list(auth.teaching_class_ids)
     
     # Falls Admin, alle aktiven Klassen
     if current_user.role == UserRole.ADMIN:
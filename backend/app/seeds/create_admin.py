@@ -2,6 +2,7 @@
 # WARIZMY EDUCATION - Admin-Benutzer erstellen
 # ===========================================
 # Einmaliges Skript zum Erstellen eines Admin-Benutzers
+# (Schema vorher per 'alembic upgrade head' anlegen)
 # 
 # Ausführung lokal:
 #   cd backend
@@ -49,7 +50,7 @@ async def create_admin():
     print("WARIZMY Education - Admin erstellen")
     print("=" * 50)
     
-    # Datenbank initialisieren
+    # Schema-Version prüfen
     print("\n📦 Verbinde mit Datenbank...")
     await init_db()
     
@@ -2,6 +2,7 @@
 # WARIZMY EDUCATION - Migration: class_courses Table
 # ===========================================
 # Creates the many-to-many relationship table between classes and courses.
+# Superseded by Alembic revision 0001 (alembic upgrade head); kept for reference.
 #
 # Run locally:
 #   cd backend
@@ -2,6 +2,7 @@
 # WARIZMY EDUCATION - One-off DB Migration Helper
 # ===========================================
 # Adds frequency and location_id columns to `class_schedules` table.
+# Superseded by Alembic revision 0001 (alembic upgrade head); kept for reference.
 #
 # Run locally:
 #   cd backend
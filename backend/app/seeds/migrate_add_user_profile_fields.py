@@ -3,6 +3,7 @@
 # ===========================================
 # Adds onboarding/profile columns to `users` table for existing databases.
 # This repo currently doesn't ship Alembic migrations; this script is an idempotent helper.
+# Superseded by Alembic revision 0001 (alembic upgrade head); kept for reference.
 #
 # Run locally:
 #   cd backend
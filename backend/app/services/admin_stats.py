@@ -0,0 +1,255 @@
+# ===========================================
+# WARIZMY EDUCATION - Admin-Statistiken (Snapshot)
+# ===========================================
+# Kennzahlen für /admin/stats und /admin/dashboard.
+#
+# - Alle Zähler/Summen kommen aus EINEM Statement (je Tabelle eine CTE,
+#   COUNT(*) FILTER statt getrennter Abfragen)
+# - Zeiträume als Bereich auf der Spalte (paid_at >= Monatsanfang),
+#   nicht func.date(spalte), damit Indizes greifen
+# - Ergebnis wird pro Worker als gemeinsamer Snapshot gehalten
+#   (ADMIN_STATS_TTL_SECONDS). Ist er abgelaufen, bekommt der Request den
+#   alten Stand und EIN Hintergrund-Task lädt neu – egal wie viele Admins
+#   gleichzeitig das Dashboard öffnen
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, func, and_, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.services.daily_metrics import load_trends, format_change
+from app.models import (
+    User,
+    UserRole,
+    Course,
+    Lesson,
+    Class,
+    LiveSession,
+    Payment,
+    PaymentStatus,
+)
+
+settings = get_settings()
+
+
+# =========================================
+# Abfragen
+# =========================================
+def aggregate_statement(now: datetime):
+    """Alle Kennzahlen in einem Statement (eine Zeile)"""
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today_start - timedelta(days=today_start.weekday())
+    month_start = today_start.replace(day=1)
+
+    user_stats = select(
+        func.count().label("total_users"),
+        func.count().filter(and_(
+            User.role == UserRole.STUDENT, User.is_active == True
+        )).label("active_students"),
+        func.count().filter(User.role == UserRole.TEACHER).label("teachers"),
+        func.count().filter(and_(
+            User.role == UserRole.STUDENT, User.created_at >= week_start
+        )).label("new_students_week"),
+        func.count().filter(User.email_verified == False).label("unverified_users"),
+    ).select_from(User).cte("user_stats")
+
+    course_stats = select(func.count().label("courses")).select_from(Course).cte("course_stats")
+
+    lesson_stats = select(func.count().label("lessons")).select_from(Lesson).cte("lesson_stats")
+
+    class_stats = (
+        select(func.count().label("active_classes"))
+        .select_from(Class)
+        .where(Class.is_active == True)
+        .cte("class_stats")
+    )
+
+    # Beide über ix_payments_status_paid_at
+    revenue_stats = (
+        select(func.coalesce(func.sum(Payment.amount), 0).label("monthly_revenue"))
+        .where(Payment.payment_status == PaymentStatus.COMPLETED)
+        .where(Payment.paid_at >= month_start)
+        .cte("revenue_stats")
+    )
+    pending_stats = (
+        select(func.count().label("pending_payments"))
+        .select_from(Payment)
+        .where(Payment.payment_status == PaymentStatus.PENDING)
+        .cte("pending_stats")
+    )
+
+    ctes = [user_stats, course_stats, lesson_stats, class_stats, revenue_stats, pending_stats]
+
+    # Jede CTE liefert genau eine Zeile -> JOIN ON true
+    joined = ctes[0]
+    for cte in ctes[1:]:
+        joined = joined.join(cte, true())
+
+    return select(*[column for cte in ctes for column in cte.c]).select_from(joined)
+
+
+async def load_admin_stats(db: AsyncSession, now: Optional[datetime] = None) -> dict:
+    """Kennzahlen und Listen für das Admin-Dashboard laden"""
+    now = now or datetime.utcnow()
+
+    row = (await db.execute(aggregate_statement(now))).mappings().one()
+    counts = dict(row)
+    counts["monthly_revenue"] = float(counts["monthly_revenue"] or 0)
+
+    # === Neue Registrierungen ===
+    result = await db.execute(
+        select(User)
+        .where(User.role == UserRole.STUDENT)
+        .order_by(User.created_at.desc())
+        .limit(5)
+    )
+    registrations = [
+        {
+            "id": str(u.id),
+            "name": f"{u.first_name} {u.last_name}",
+            "email": u.email,
+            "date": u.created_at.strftime("%Y-%m-%d"),
+            "status": "verified" if u.email_verified else "pending",
+        }
+        for u in result.scalars().all()
+    ]
+
+    # === Letzte Zahlungen (Name per JOIN statt Nachladen) ===
+    result = await db.execute(
+        select(Payment, User.first_name, User.last_name)
+        .outerjoin(User, User.id == Payment.user_id)
+        .order_by(Payment.created_at.desc())
+        .limit(5)
+    )
+    payments = [
+        {
+            "id": str(p.id),
+            "user": f"{first_name} {last_name}" if first_name is not None else "Unbekannt",
+            "amount": float(p.amount),
+            "course": "Kurs",  # TODO: Kursname aus enrollment laden
+            "status": p.payment_status.value,
+            "date": p.created_at.strftime("%Y-%m-%d"),
+        }
+        for p, first_name, last_name in result.all()
+    ]
+
+    # === Heutige Sessions ===
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    result = await db.execute(
+        select(LiveSession)
+        .where(LiveSession.scheduled_at >= today_start)
+        .where(LiveSession.scheduled_at < today_start + timedelta(days=1))
+        .where(LiveSession.is_cancelled == False)
+        .order_by(LiveSession.scheduled_at)
+    )
+    sessions = [
+        {
+            "id": str(s.id),
+            "title": s.title,
+            "time": s.scheduled_at.strftime("%H:%M"),
+            "teacher": "Lehrer",  # TODO: Lehrername laden
+            "students": 0,  # TODO: Teilnehmerzahl
+        }
+        for s in result.scalars().all()
+    ]
+
+    # === Wochenvergleich aus daily_metrics ===
+    trends = await load_trends(db, days=14, today=now.date())
+    revenue_change = format_change(trends["week_over_week"]["revenue"]["change_percent"])
+
+    return {
+        "counts": counts,
+        "revenue_change": revenue_change,
+        "registrations": registrations,
+        "payments": payments,
+        "sessions": sessions,
+        "computed_at": now.isoformat(),
+    }
+
+
+# =========================================
+# Snapshot
+# =========================================
+class AdminStatsSnapshot:
+    """
+    Gemeinsamer Snapshot der Admin-Kennzahlen (pro Worker).
+
+    - Frisch (jünger als TTL): direkt aus dem Speicher
+    - Abgelaufen: alter Stand sofort, Neuladen im Hintergrund
+    - Noch nie geladen: Request wartet auf das (einzige) Laden
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._data: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def _refresh(self) -> dict:
+        from app.db.session import replica_router
+
+        async with replica_router.session() as db:
+            try:
+                data = await load_admin_stats(db)
+            except Exception as e:
+                self.errors += 1
+                replica_router.report_failure(db, e)
+                raise
+        self._data = data
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+        return data
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Höchstens ein laufendes Neuladen gleichzeitig"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh())
+            self._task.add_done_callback(self._log_failure)
+        return self._task
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            print(f"[AdminStats] Neuladen fehlgeschlagen: {task.exception()}")
+
+    async def get(self, db: AsyncSession) -> dict:
+        """Aktueller Snapshot (ohne Cache direkt über db geladen)"""
+        if not self.enabled:
+            return await load_admin_stats(db)
+
+        if self._data is not None:
+            if time.monotonic() - self._loaded_at < self.ttl:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._start_refresh()
+            return self._data
+
+        # shield: bricht der wartende Request ab, lädt der Task trotzdem fertig
+        return await asyncio.shield(self._start_refresh())
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._data else None,
+        }
+
+
+admin_stats_snapshot = AdminStatsSnapshot(settings.ADMIN_STATS_TTL_SECONDS)
@@ -0,0 +1,237 @@
+# ===========================================
+# WARIZMY EDUCATION - Auth Context Service
+# ===========================================
+# Löst User + Mitgliedschaften (aktive Klassen, Lehrer-Klassen,
+# zugängliche Kurse) in EINER Abfrage auf.
+#
+# Die Dependency dazu ist app.routers.auth.get_auth_context.
+# Optionaler prozesslokaler Cache der Mitgliedschaften
+# (AUTH_CONTEXT_CACHE_TTL_SECONDS > 0), wird bei Einschreibungs-
+# änderungen per invalidate_auth_context geleert – in allen Workern über
+# NOTIFY cache_invalidated (siehe cache_invalidation).
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, func, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.user import User, UserRole
+from app.models.class_.class_model import (
+    Class,
+    ClassEnrollment,
+    ClassTeacher,
+    class_courses,
+    EnrollmentStatus as ClassEnrollmentStatus,
+)
+from app.models.enrollment.enrollment import Enrollment, EnrollmentStatus
+from app.services.cache_invalidation import publish_invalidation, register_invalidation_handler
+from app.services.principal_cache import principal_cache
+
+settings = get_settings()
+
+
+# =========================================
+# Mitgliedschafts-Abfragen
+# =========================================
+def accessible_course_ids_query(user_id):
+    """
+    Alle Kurs-IDs, auf die ein User Zugriff hat, als eine UNION-Abfrage:
+    - Direkte Einschreibungen (Enrollments)
+    - Klassen-Einschreibungen (Legacy course_id)
+    - Klassen-Einschreibungen (Many-to-Many class_courses)
+    """
+    return union(
+        select(Enrollment.course_id.label("course_id"))
+        .where(Enrollment.user_id == user_id)
+        .where(Enrollment.status == EnrollmentStatus.ACTIVE),
+        select(Class.course_id.label("course_id"))
+        .join(ClassEnrollment, Class.id == ClassEnrollment.class_id)
+        .where(ClassEnrollment.user_id == user_id)
+        .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE)
+        .where(Class.course_id.isnot(None)),
+        select(class_courses.c.course_id.label("course_id"))
+        .join(ClassEnrollment, class_courses.c.class_id == ClassEnrollment.class_id)
+        .where(ClassEnrollment.user_id == user_id)
+        .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE),
+    ).subquery()
+
+
+def _membership_columns(user_id: UUID):
+    """Klassen-, Lehrer-Klassen- und Kurs-IDs als Array-Subqueries"""
+    courses = accessible_course_ids_query(user_id)
+    return (
+        select(func.array_agg(ClassEnrollment.class_id))
+        .where(ClassEnrollment.user_id == user_id)
+        .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE)
+        .scalar_subquery()
+        .label("class_ids"),
+        select(func.array_agg(ClassTeacher.class_id))
+        .where(ClassTeacher.teacher_id == user_id)
+        .scalar_subquery()
+        .label("teaching_class_ids"),
+        select(func.array_agg(courses.c.course_id))
+        .scalar_subquery()
+        .label("course_ids"),
+    )
+
+
+# =========================================
+# Auth-Kontext
+# =========================================
+@dataclass
+class AuthContext:
+    """
+    Authentifizierter User mit vorberechneten Mitgliedschaften.
+
+    Wird einmal pro Request aufgelöst (FastAPI cached Dependencies
+    innerhalb eines Requests), Router lesen die IDs statt sie erneut
+    abzufragen.
+    """
+    user: User
+    class_ids: FrozenSet[UUID] = field(default_factory=frozenset)
+    teaching_class_ids: FrozenSet[UUID] = field(default_factory=frozenset)
+    course_ids: FrozenSet[UUID] = field(default_factory=frozenset)
+
+    @property
+    def user_id(self) -> UUID:
+        return self.user.id
+
+    @property
+    def role(self) -> UserRole:
+        return self.user.role
+
+    @property
+    def is_admin(self) -> bool:
+        return self.user.role == UserRole.ADMIN
+
+    def can_access_course(self, course_id) -> bool:
+        """Zugriff auf Kurs (Admins immer)"""
+        return self.is_admin or _as_uuid(course_id) in self.course_ids
+
+    def teaches_class(self, class_id) -> bool:
+        """Lehrer der Klasse (Admins immer)"""
+        return self.is_admin or _as_uuid(class_id) in self.teaching_class_ids
+
+
+def _as_uuid(value) -> Optional[UUID]:
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# =========================================
+# Cache (optional, prozesslokal)
+# =========================================
+_membership_cache: "OrderedDict[UUID, Tuple[float, tuple]]" = OrderedDict()
+
+INVALIDATION_KIND = "memberships"
+# Schlüssel für "alle User" (z.B. Kurse einer Klasse geändert)
+_ALL_USERS = "*"
+
+
+def _cache_get(user_id: UUID) -> Optional[tuple]:
+    if settings.AUTH_CONTEXT_CACHE_TTL_SECONDS <= 0:
+        return None
+    entry = _membership_cache.get(user_id)
+    if not entry:
+        return None
+    expires_at, memberships = entry
+    if expires_at < time.monotonic():
+        _membership_cache.pop(user_id, None)
+        return None
+    _membership_cache.move_to_end(user_id)
+    return memberships
+
+
+def _cache_set(user_id: UUID, memberships: tuple) -> None:
+    if settings.AUTH_CONTEXT_CACHE_TTL_SECONDS <= 0:
+        return
+    _membership_cache[user_id] = (
+        time.monotonic() + settings.AUTH_CONTEXT_CACHE_TTL_SECONDS,
+        memberships,
+    )
+    _membership_cache.move_to_end(user_id)
+    while len(_membership_cache) > settings.AUTH_CONTEXT_CACHE_SIZE:
+        _membership_cache.popitem(last=False)
+
+
+def _discard_local(key: str) -> None:
+    """NOTIFY von einem anderen Worker (oder diesem)"""
+    if key == _ALL_USERS:
+        _membership_cache.clear()
+    else:
+        _membership_cache.pop(_as_uuid(key), None)
+
+
+register_invalidation_handler(INVALIDATION_KIND, _discard_local, _membership_cache.clear)
+
+
+async def invalidate_auth_context(user_id=None) -> None:
+    """
+    Gecachte Mitgliedschaften in allen Workern verwerfen.
+
+    Aufrufen nach dem Commit von Änderungen an Einschreibungen oder
+    Klassen-Zuordnungen. Ohne user_id wird der gesamte Cache geleert
+    (z.B. wenn sich die Kurse einer Klasse ändern).
+    """
+    key = _ALL_USERS if user_id is None else str(user_id)
+    _discard_local(key)
+    if settings.AUTH_CONTEXT_CACHE_TTL_SECONDS > 0:
+        await publish_invalidation(INVALIDATION_KIND, key)
+
+
+async def load_auth_context(db: AsyncSession, user_id) -> Optional[AuthContext]:
+    """
+    User und Mitgliedschaften laden (höchstens eine Abfrage).
+
+    Der User kommt wenn möglich aus dem Principal-Cache, die
+    Mitgliedschaften aus dem optionalen Mitgliedschafts-Cache.
+
+    Returns:
+        AuthContext oder None wenn der User nicht existiert
+    """
+    user_uuid = _as_uuid(user_id)
+    if user_uuid is None:
+        return None
+
+    user = await principal_cache.get(db, user_uuid)
+    memberships = _cache_get(user_uuid)
+
+    if memberships is None and user is not None:
+        # User aus dem Principal-Cache, nur Mitgliedschaften laden
+        result = await db.execute(select(*_membership_columns(user_uuid)))
+        memberships = tuple(frozenset(ids or ()) for ids in result.one())
+        _cache_set(user_uuid, memberships)
+    elif memberships is None:
+        result = await db.execute(
+            select(User, *_membership_columns(user_uuid)).where(User.id == user_uuid)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        user = row[0]
+        await principal_cache.set(user)
+        memberships = tuple(frozenset(ids or ()) for ids in row[1:])
+        _cache_set(user_uuid, memberships)
+    elif user is None:
+        result = await db.execute(select(User).where(User.id == user_uuid))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+        await principal_cache.set(user)
+
+    class_ids, teaching_class_ids, course_ids = memberships
+    return AuthContext(
+        user=user,
+        class_ids=class_ids,
+        teaching_class_ids=teaching_class_ids,
+        course_ids=course_ids,
+    )
@@ -0,0 +1,118 @@
+# ===========================================
+# WARIZMY EDUCATION - Cache-Invalidierung (LISTEN/NOTIFY)
+# ===========================================
+# Prozesslokale Caches (Principal, Mitgliedschaften) gibt es in jedem
+# Worker auf jedem Server einmal. Eine Invalidierung muss deshalb alle
+# Worker erreichen, nicht nur den, der die Änderung geschrieben hat.
+#
+# - publish_invalidation(kind, key): NOTIFY cache_invalidated mit
+#   "kind:key"; mit db vor dem Commit (wird mit dem Commit zugestellt),
+#   ohne db sofort über eine eigene kurze Transaktion
+# - register_invalidation_handler(kind, on_key, on_reset): Cache meldet
+#   sich an; on_key verwirft einen Eintrag, on_reset den ganzen Cache
+# - Eigene asyncpg-Verbindung für LISTEN (wie der CMS-Snapshot); nach
+#   (Neu-)Verbindung werden alle Caches geleert, weil Benachrichtigungen
+#   während eines Abbruchs verloren gehen
+
+import asyncio
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+CHANNEL = "cache_invalidated"
+
+RECONNECT_DELAY_SECONDS = 5
+
+_handlers: Dict[str, Tuple[Callable[[str], None], Callable[[], None]]] = {}
+
+stats = {"published": 0, "received": 0, "resets": 0, "errors": 0}
+
+
+def register_invalidation_handler(
+    kind: str,
+    on_key: Callable[[str], None],
+    on_reset: Callable[[], None],
+) -> None:
+    """Prozesslokalen Cache für Benachrichtigungen zu kind anmelden"""
+    _handlers[kind] = (on_key, on_reset)
+
+
+async def publish_invalidation(kind: str, key, db: Optional[AsyncSession] = None) -> None:
+    """
+    Eintrag in allen Workern verwerfen.
+
+    Mit db: Teil der laufenden Transaktion, Zustellung beim Commit.
+    Ohne db: eigene Transaktion (nach einem Commit aufrufen).
+    Fehler werden nur geloggt, der TTL der Caches begrenzt dann das Alter.
+    """
+    payload = f"{kind}:{key}"
+    try:
+        if db is not None:
+            await db.execute(select(func.pg_notify(CHANNEL, payload)))
+        else:
+            from app.db.session import AsyncSessionLocal
+
+            async with AsyncSessionLocal() as session:
+                await session.execute(select(func.pg_notify(CHANNEL, payload)))
+                await session.commit()
+        stats["published"] += 1
+    except Exception as e:
+        stats["errors"] += 1
+        print(f"[Cache] NOTIFY {CHANNEL} fehlgeschlagen: {e}")
+
+
+def _dispatch(payload: str) -> None:
+    kind, _, key = payload.partition(":")
+    handler = _handlers.get(kind)
+    if handler is not None:
+        handler[0](key)
+
+
+def _reset_all() -> None:
+    for _, on_reset in _handlers.values():
+        on_reset()
+    stats["resets"] += 1
+
+
+# =========================================
+# Hintergrund-Task
+# =========================================
+async def run_invalidation_listener(stop_event: asyncio.Event) -> None:
+    """Hintergrund-Task: LISTEN cache_invalidated, bei Abbruch neu verbinden"""
+    import asyncpg
+
+    def on_notify(connection, pid, channel, payload) -> None:
+        stats["received"] += 1
+        _dispatch(payload)
+
+    while not stop_event.is_set():
+        connection = None
+        closed = asyncio.Event()
+        try:
+            connection = await asyncpg.connect(settings.DATABASE_URL)
+            await connection.add_listener(CHANNEL, on_notify)
+            connection.add_termination_listener(lambda _: closed.set())
+            # Was vor dem LISTEN geändert wurde, ist nicht mehr im Cache
+            _reset_all()
+            waiters = [
+                asyncio.create_task(stop_event.wait()),
+                asyncio.create_task(closed.wait()),
+            ]
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"[Cache] LISTEN {CHANNEL} fehlgeschlagen: {e}")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=RECONNECT_DELAY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
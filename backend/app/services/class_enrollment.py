@@ -0,0 +1,139 @@
+# ===========================================
+# WARIZMY EDUCATION - Klassen-Einschreibung (Kapazität)
+# ===========================================
+# Schreibt einen oder viele Studenten in eine Klasse ein, ohne dass
+# Class.max_students je überschritten wird – auch bei gleichzeitigen
+# Requests.
+#
+# - Die classes-Zeile wird per SELECT ... FOR UPDATE gesperrt: alle
+#   Einschreibungen derselben Klasse laufen nacheinander, Zählen und
+#   Einfügen sehen immer den aktuellen Stand
+# - Gezählt werden nur aktive Einschreibungen
+#   (ix_class_enrollments_class_active)
+# - Eingefügt wird mit EINEM INSERT ... ON CONFLICT (user_id, class_id)
+#   DO NOTHING (uq_user_class), ab 1000 Studenten blockweise
+# - Die Sperre hält bis zum Commit des Aufrufers, also direkt danach
+#   committen
+
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User, Class, ClassEnrollment, ClassEnrollmentStatus
+
+INSERT_BATCH_SIZE = 1000
+
+
+def _split_ids(user_ids: Iterable) -> Tuple[List[uuid.UUID], List[str]]:
+    """(gültige UUIDs in Reihenfolge ohne Duplikate, ungültige Eingaben)"""
+    valid, invalid, seen = [], [], set()
+    for user_id in user_ids:
+        try:
+            value = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+        except ValueError:
+            invalid.append(str(user_id))
+            continue
+        if value not in seen:
+            seen.add(value)
+            valid.append(value)
+    return valid, invalid
+
+
+async def enroll_in_class(
+    db: AsyncSession,
+    class_id,
+    user_ids: Iterable,
+    enrollment_type: str = "one_time",
+) -> dict:
+    """
+    Benutzer in eine Klasse einschreiben (kein Commit).
+
+    Reicht der Platz nicht für alle, werden die ersten in der
+    übergebenen Reihenfolge eingeschrieben, der Rest landet in class_full.
+
+    Returns:
+        {"enrolled", "already_enrolled", "not_found", "class_full"}
+        (Listen von User-IDs als str) plus "active_students" und
+        "max_students" nach der Einschreibung
+
+    Raises:
+        HTTPException 404: Klasse existiert nicht
+    """
+    candidates, invalid = _split_ids(user_ids)
+    try:
+        class_id = class_id if isinstance(class_id, uuid.UUID) else uuid.UUID(str(class_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Klasse nicht gefunden")
+
+    # Sperre auf die Klasse (serialisiert Einschreibungen dieser Klasse)
+    result = await db.execute(
+        select(Class.id, Class.max_students)
+        .where(Class.id == class_id)
+        .with_for_update()
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Klasse nicht gefunden")
+    class_uuid, max_students = row
+
+    existing_users = set()
+    already = set()
+    if candidates:
+        result = await db.execute(select(User.id).where(User.id.in_(candidates)))
+        existing_users = set(result.scalars().all())
+        result = await db.execute(
+            select(ClassEnrollment.user_id)
+            .where(ClassEnrollment.class_id == class_uuid)
+            .where(ClassEnrollment.user_id.in_(candidates))
+        )
+        already = set(result.scalars().all())
+
+    active = (await db.execute(
+        select(func.count())
+        .select_from(ClassEnrollment)
+        .where(ClassEnrollment.class_id == class_uuid)
+        .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE)
+    )).scalar() or 0
+
+    to_enroll = [u for u in candidates if u in existing_users and u not in already]
+    free = len(to_enroll) if max_students is None else max(max_students - active, 0)
+    accepted, rejected = to_enroll[:free], to_enroll[free:]
+
+    enrolled = []
+    now = datetime.utcnow()
+    # Ein Statement pro Block (Parameter-Limit von asyncpg)
+    for offset in range(0, len(accepted), INSERT_BATCH_SIZE):
+        result = await db.execute(
+            insert(ClassEnrollment)
+            .values([
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "class_id": class_uuid,
+                    "enrollment_type": enrollment_type,
+                    "status": ClassEnrollmentStatus.ACTIVE,
+                    "started_at": now,
+                    "created_at": now,
+                }
+                for user_id in accepted[offset:offset + INSERT_BATCH_SIZE]
+            ])
+            .on_conflict_do_nothing(index_elements=[ClassEnrollment.user_id, ClassEnrollment.class_id])
+            .returning(ClassEnrollment.user_id)
+        )
+        enrolled.extend(result.scalars().all())
+
+    inserted = set(enrolled)
+    return {
+        "enrolled": [str(u) for u in enrolled],
+        "already_enrolled": [str(u) for u in candidates if u in already]
+                            + [str(u) for u in accepted if u not in inserted],
+        "not_found": invalid + [str(u) for u in candidates if u not in existing_users],
+        "class_full": [str(u) for u in rejected],
+        "active_students": active + len(enrolled),
+        "max_students": max_students,
+    }
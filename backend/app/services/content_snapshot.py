@@ -0,0 +1,243 @@
+# ===========================================
+# WARIZMY EDUCATION - CMS-Snapshot (LISTEN/NOTIFY)
+# ===========================================
+# Lehrer, FAQs, Testimonials, Ankündigungen, Tageshinweise und Standorte
+# ändern sich ein paar Mal pro Woche, werden aber bei jedem Seitenaufruf
+# gelesen. Jeder Worker hält deshalb einen Snapshot im Speicher und
+# beantwortet diese Lesezugriffe ohne Datenbank.
+#
+# - Geladen beim Start (Hintergrund-Task) bzw. beim ersten Zugriff
+# - Schreibende Endpunkte rufen vor dem Commit notify_content_changed(db)
+#   auf; NOTIFY content_changed wird mit dem Commit zugestellt, jeder
+#   Worker auf jedem Server lädt daraufhin neu
+# - Neu laden = neuen Snapshot komplett aufbauen, dann die Referenz
+#   austauschen: ein Request sieht immer einen vollständigen Stand
+# - Eigene asyncpg-Verbindung für LISTEN (belegt keinen Pool-Platz);
+#   nach einem Verbindungsabbruch und alle CONTENT_SNAPSHOT_REFRESH_SECONDS
+#   wird zusätzlich neu geladen (verpasste Benachrichtigungen)
+#
+# Die Objekte im Snapshot sind von der Session gelöste ORM-Instanzen und
+# werden nur gelesen, nie verändert.
+
+import asyncio
+import heapq
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import (
+    TeacherProfile,
+    FAQ,
+    Testimonial,
+    Announcement,
+    DailyGuidance,
+    Weekday,
+    RamadanMode,
+    Location,
+)
+
+settings = get_settings()
+
+CHANNEL = "content_changed"
+
+RECONNECT_DELAY_SECONDS = 5
+
+# datetime.weekday() -> Weekday
+WEEKDAYS = (
+    Weekday.MONDAY,
+    Weekday.TUESDAY,
+    Weekday.WEDNESDAY,
+    Weekday.THURSDAY,
+    Weekday.FRIDAY,
+    Weekday.SATURDAY,
+    Weekday.SUNDAY,
+)
+
+
+class ContentSnapshot(NamedTuple):
+    """Aktiver CMS-Inhalt, fertig sortiert"""
+    teachers: Tuple[TeacherProfile, ...]
+    teachers_by_slug: Mapping[str, TeacherProfile]
+    faqs: Tuple[FAQ, ...]
+    testimonials: Tuple[Testimonial, ...]
+    announcements: Tuple[Announcement, ...]
+    # Wochentag -> Tageshinweise nach Priorität absteigend
+    guidance: Mapping[Weekday, Tuple[DailyGuidance, ...]]
+    # Alle Standorte (auch inaktive, für active_only=false)
+    locations: Tuple[Location, ...]
+    locations_by_id: Mapping[str, Location]
+    loaded_at: datetime
+
+
+async def load_snapshot(db: AsyncSession) -> ContentSnapshot:
+    """Alle Inhalte laden und von der Session lösen"""
+    teachers = (await db.execute(
+        select(TeacherProfile)
+        .where(TeacherProfile.is_active == True)
+        .order_by(TeacherProfile.order, TeacherProfile.name)
+    )).scalars().all()
+    faqs = (await db.execute(
+        select(FAQ)
+        .where(FAQ.is_published == True)
+        .order_by(FAQ.order, FAQ.created_at)
+    )).scalars().all()
+    testimonials = (await db.execute(
+        select(Testimonial)
+        .where(Testimonial.is_published == True)
+        .order_by(Testimonial.order, Testimonial.created_at.desc())
+    )).scalars().all()
+    announcements = (await db.execute(
+        select(Announcement)
+        .where(Announcement.is_active == True)
+        .order_by(Announcement.priority.desc(), Announcement.created_at.desc())
+    )).scalars().all()
+    guidance = (await db.execute(
+        select(DailyGuidance)
+        .where(DailyGuidance.is_active == True)
+        .order_by(DailyGuidance.priority.desc())
+    )).scalars().all()
+    locations = (await db.execute(
+        select(Location).order_by(Location.order, Location.name)
+    )).scalars().all()
+    db.expunge_all()
+
+    by_weekday = {}
+    for g in guidance:
+        by_weekday.setdefault(g.weekday, []).append(g)
+
+    return ContentSnapshot(
+        teachers=tuple(teachers),
+        teachers_by_slug=MappingProxyType({t.slug: t for t in teachers}),
+        faqs=tuple(faqs),
+        testimonials=tuple(testimonials),
+        announcements=tuple(announcements),
+        guidance=MappingProxyType({day: tuple(items) for day, items in by_weekday.items()}),
+        locations=tuple(locations),
+        locations_by_id=MappingProxyType({str(loc.id): loc for loc in locations}),
+        loaded_at=datetime.utcnow(),
+    )
+
+
+def todays_guidance(snapshot: ContentSnapshot, now: datetime, is_ramadan: bool) -> Optional[DailyGuidance]:
+    """Tageshinweis mit der höchsten Priorität für Wochentag und Ramadan-Modus"""
+    modes = (RamadanMode.ONLY, RamadanMode.BOTH) if is_ramadan else (RamadanMode.EXCLUDE, RamadanMode.BOTH)
+    candidates = heapq.merge(
+        snapshot.guidance.get(WEEKDAYS[now.weekday()], ()),
+        snapshot.guidance.get(Weekday.EVERYDAY, ()),
+        key=lambda g: -g.priority,
+    )
+    for g in candidates:
+        if g.ramadan_mode not in modes:
+            continue
+        if g.start_date is not None and g.start_date > now:
+            continue
+        if g.end_date is not None and g.end_date < now:
+            continue
+        return g
+    return None
+
+
+async def notify_content_changed(db: AsyncSession, kind: str = "") -> None:
+    """Vor dem Commit aufrufen: alle Worker laden nach dem Commit neu"""
+    await db.execute(select(func.pg_notify(CHANNEL, kind)))
+
+
+# =========================================
+# Snapshot pro Worker
+# =========================================
+class ContentStore:
+    """Hält den aktuellen Snapshot und lädt auf NOTIFY neu"""
+
+    def __init__(self):
+        self._snapshot: Optional[ContentSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self.loads = 0
+        self.notifications = 0
+        self.errors = 0
+
+    async def get(self) -> ContentSnapshot:
+        """Aktueller Snapshot (beim allerersten Zugriff wird geladen)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self.reload(only_if_missing=True)
+        return snapshot
+
+    async def reload(self, only_if_missing: bool = False) -> ContentSnapshot:
+        # Primär-DB: ein Replikat könnte den gerade gemeldeten Commit noch nicht haben
+        from app.db.session import ReadSessionLocal
+
+        async with self._lock:
+            if only_if_missing and self._snapshot is not None:
+                return self._snapshot
+            async with ReadSessionLocal() as db:
+                snapshot = await load_snapshot(db)
+            self._snapshot = snapshot
+            self.loads += 1
+            return snapshot
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.notifications += 1
+        self._changed.set()
+
+    async def _reload_quietly(self) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            self.errors += 1
+            print(f"[Content] Snapshot laden fehlgeschlagen: {e}")
+
+    async def _wait(self, stop_event: asyncio.Event, timeout: float) -> None:
+        """Bis Änderung, Stopp oder Timeout warten"""
+        waiters = [
+            asyncio.create_task(stop_event.wait()),
+            asyncio.create_task(self._changed.wait()),
+        ]
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Hintergrund-Task: LISTEN content_changed, bei Abbruch neu verbinden"""
+        import asyncpg
+
+        while not stop_event.is_set():
+            connection = None
+            try:
+                connection = await asyncpg.connect(settings.DATABASE_URL)
+                await connection.add_listener(CHANNEL, self._on_notify)
+                # Abbruch der Verbindung weckt die Schleife zum Neuverbinden
+                connection.add_termination_listener(lambda _: self._changed.set())
+                while not stop_event.is_set() and not connection.is_closed():
+                    # Nach (Neu-)Verbindung, Benachrichtigung oder Timeout
+                    # (Sicherheitsnetz für verpasste Benachrichtigungen)
+                    self._changed.clear()
+                    await self._reload_quietly()
+                    await self._wait(stop_event, settings.CONTENT_SNAPSHOT_REFRESH_SECONDS)
+            except Exception as e:
+                self.errors += 1
+                print(f"[Content] LISTEN {CHANNEL} fehlgeschlagen: {e}")
+                await self._wait(stop_event, RECONNECT_DELAY_SECONDS)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "loaded_at": snapshot.loaded_at.isoformat() if snapshot else None,
+            "loads": self.loads,
+            "notifications": self.notifications,
+            "errors": self.errors,
+        }
+
+
+content_store = ContentStore()
+
+
+async def run_content_listener(stop_event: asyncio.Event) -> None:
+    await content_store.run(stop_event)
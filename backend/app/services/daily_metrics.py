@@ -0,0 +1,331 @@
+# ===========================================
+# WARIZMY EDUCATION - Tages-Kennzahlen (Rollup)
+# ===========================================
+# Pflegt die Tabelle daily_metrics inkrementell und liefert daraus
+# Trends und Wochenvergleiche für das Admin-Dashboard.
+#
+# - Ein Hintergrund-Task rechnet alle DAILY_METRICS_INTERVAL_SECONDS die
+#   letzten DAILY_METRICS_LOOKBACK_DAYS Tage neu (späte Änderungen wie
+#   nachträglich erfasste Anwesenheit oder abgeschlossene Zahlungen)
+# - Ist die Tabelle leer, wird einmalig ab dem ersten User nachgerechnet
+# - Pro Quelle eine GROUP BY-Abfrage über einen Zeitraum (Range auf der
+#   Spalte), Ergebnis per INSERT ... ON CONFLICT (day) DO UPDATE
+# - Mehrere Worker: nur einer rechnet gleichzeitig (Advisory Lock)
+#
+# Tage sind UTC-Tage (alle Timestamps werden in UTC gespeichert).
+# verified_users zählt die neuen Studenten des Tages mit bestätigter
+# E-Mail (es gibt keinen Zeitpunkt der Bestätigung).
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func, cast, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import (
+    User,
+    UserRole,
+    Payment,
+    PaymentStatus,
+    LiveSession,
+    Attendance,
+    AttendanceStatus,
+    LessonProgress,
+    DailyMetrics,
+)
+
+settings = get_settings()
+
+# Schlüssel für pg_try_advisory_xact_lock (beliebig, aber fest)
+ROLLUP_LOCK_ID = 716_001
+
+UPSERT_BATCH_SIZE = 1000
+
+METRIC_FIELDS = (
+    "revenue",
+    "new_students",
+    "verified_users",
+    "sessions_held",
+    "attendance_records",
+    "attendance_present",
+    "lessons_completed",
+)
+
+
+def _start_of(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _empty_row(day: date) -> dict:
+    row = {field: 0 for field in METRIC_FIELDS}
+    row["day"] = day
+    return row
+
+
+# =========================================
+# Berechnung
+# =========================================
+async def compute_daily_metrics(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    now: Optional[datetime] = None,
+) -> Dict[date, dict]:
+    """
+    Kennzahlen für die Tage start..end (inklusive) aus den Quelltabellen.
+
+    Tage ohne Daten sind mit 0 enthalten, damit veraltete Werte beim
+    Upsert überschrieben werden.
+    """
+    now = now or datetime.utcnow()
+    range_start = _start_of(start)
+    range_end = _start_of(end + timedelta(days=1))
+
+    rows = {}
+    day = start
+    while day <= end:
+        rows[day] = _empty_row(day)
+        day += timedelta(days=1)
+
+    # Umsatz (ix_payments_status_paid_at)
+    paid_day = cast(Payment.paid_at, Date)
+    result = await db.execute(
+        select(paid_day, func.sum(Payment.amount))
+        .where(Payment.payment_status == PaymentStatus.COMPLETED)
+        .where(Payment.paid_at >= range_start)
+        .where(Payment.paid_at < range_end)
+        .group_by(paid_day)
+    )
+    for day, revenue in result.all():
+        rows[day]["revenue"] = revenue or 0
+
+    # Neue Studenten (ix_users_created_at_id)
+    created_day = cast(User.created_at, Date)
+    result = await db.execute(
+        select(
+            created_day,
+            func.count(),
+            func.count().filter(User.email_verified == True),
+        )
+        .where(User.role == UserRole.STUDENT)
+        .where(User.created_at >= range_start)
+        .where(User.created_at < range_end)
+        .group_by(created_day)
+    )
+    for day, new_students, verified in result.all():
+        rows[day]["new_students"] = new_students
+        rows[day]["verified_users"] = verified
+
+    # Abgehaltene Sessions (nur bereits begonnene)
+    session_day = cast(LiveSession.scheduled_at, Date)
+    result = await db.execute(
+        select(session_day, func.count())
+        .where(LiveSession.is_cancelled == False)
+        .where(LiveSession.scheduled_at >= range_start)
+        .where(LiveSession.scheduled_at < min(range_end, now))
+        .group_by(session_day)
+    )
+    for day, held in result.all():
+        rows[day]["sessions_held"] = held
+
+    # Anwesenheit nach Tag der Session
+    result = await db.execute(
+        select(
+            session_day,
+            func.count(Attendance.id),
+            func.count(Attendance.id).filter(Attendance.status == AttendanceStatus.PRESENT),
+        )
+        .join(Attendance, Attendance.live_session_id == LiveSession.id)
+        .where(LiveSession.is_cancelled == False)
+        .where(LiveSession.scheduled_at >= range_start)
+        .where(LiveSession.scheduled_at < range_end)
+        .group_by(session_day)
+    )
+    for day, records, present in result.all():
+        rows[day]["attendance_records"] = records
+        rows[day]["attendance_present"] = present
+
+    # Abgeschlossene Lektionen
+    completed_day = cast(LessonProgress.completed_at, Date)
+    result = await db.execute(
+        select(completed_day, func.count())
+        .where(LessonProgress.completed == True)
+        .where(LessonProgress.completed_at >= range_start)
+        .where(LessonProgress.completed_at < range_end)
+        .group_by(completed_day)
+    )
+    for day, completed in result.all():
+        rows[day]["lessons_completed"] = completed
+
+    return rows
+
+
+async def refresh_daily_metrics(
+    db: AsyncSession,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> int:
+    """
+    daily_metrics für start..end neu berechnen und speichern (commit).
+
+    Ohne start: die letzten DAILY_METRICS_LOOKBACK_DAYS Tage, bei leerer
+    Tabelle ab dem Tag des ersten Users.
+
+    Returns:
+        Anzahl geschriebener Tage
+    """
+    now = datetime.utcnow()
+    end = end or now.date()
+
+    if start is None:
+        has_rows = (await db.execute(select(DailyMetrics.day).limit(1))).first()
+        if has_rows:
+            start = end - timedelta(days=settings.DAILY_METRICS_LOOKBACK_DAYS)
+        else:
+            first_user = (await db.execute(select(func.min(User.created_at)))).scalar()
+            start = first_user.date() if first_user else end
+
+    rows = list((await compute_daily_metrics(db, start, end, now)).values())
+    for row in rows:
+        row["updated_at"] = now
+
+    # In Blöcken (Parameter-Limit von asyncpg beim ersten Nachrechnen)
+    for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = insert(DailyMetrics).values(rows[offset:offset + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyMetrics.day],
+            set_={field: stmt.excluded[field] for field in METRIC_FIELDS + ("updated_at",)},
+        )
+        await db.execute(stmt)
+    await db.commit()
+    return len(rows)
+
+
+async def run_daily_metrics_job() -> int:
+    """Rollup mit eigener Session; übersprungen, wenn ein anderer Worker rechnet"""
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        try:
+            locked = (await db.execute(
+                select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK_ID))
+            )).scalar()
+            if not locked:
+                await db.rollback()
+                return 0
+            return await refresh_daily_metrics(db)
+        except Exception as e:
+            await db.rollback()
+            print(f"[DailyMetrics] Rollup fehlgeschlagen: {e}")
+            return 0
+
+
+async def run_daily_metrics_rollup(stop_event: asyncio.Event) -> None:
+    """Hintergrund-Task: sofort und dann periodisch rechnen"""
+    interval = settings.DAILY_METRICS_INTERVAL_SECONDS
+    while not stop_event.is_set():
+        await run_daily_metrics_job()
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+# =========================================
+# Auswertung
+# =========================================
+def _serialize(row: dict) -> dict:
+    records = row["attendance_records"]
+    return {
+        "day": row["day"].isoformat(),
+        "revenue": float(row["revenue"]),
+        "new_students": row["new_students"],
+        "verified_users": row["verified_users"],
+        "sessions_held": row["sessions_held"],
+        "attendance_rate": round(row["attendance_present"] / records, 3) if records else 0.0,
+        "lessons_completed": row["lessons_completed"],
+    }
+
+
+def _percent_change(current: float, previous: float) -> Optional[float]:
+    """Veränderung in Prozent, None wenn es keinen Vergleichswert gibt"""
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def week_over_week(rows: List[dict]) -> dict:
+    """
+    Letzte 7 Tage gegen die 7 Tage davor.
+
+    rows: aufsteigend sortierte Tageszeilen (mindestens 14 für beide Wochen),
+    nur abgeschlossene Tage – ein angebrochener heutiger Tag würde die
+    aktuelle Woche kleiner machen.
+    """
+    current, previous = rows[-7:], rows[-14:-7]
+    result = {}
+    for field in ("revenue", "new_students", "verified_users", "sessions_held", "lessons_completed"):
+        now_value = float(sum(r[field] for r in current))
+        before_value = float(sum(r[field] for r in previous))
+        result[field] = {
+            "current": now_value,
+            "previous": before_value,
+            "change_percent": _percent_change(now_value, before_value),
+        }
+
+    records_now = sum(r["attendance_records"] for r in current)
+    records_before = sum(r["attendance_records"] for r in previous)
+    rate_now = sum(r["attendance_present"] for r in current) / records_now if records_now else 0.0
+    rate_before = sum(r["attendance_present"] for r in previous) / records_before if records_before else 0.0
+    result["attendance_rate"] = {
+        "current": round(rate_now, 3),
+        "previous": round(rate_before, 3),
+        # Prozentpunkte statt Prozent
+        "change_points": round((rate_now - rate_before) * 100, 1) if records_before else None,
+    }
+    return result
+
+
+async def load_trends(db: AsyncSession, days: int = 30, today: Optional[date] = None) -> dict:
+    """
+    Tageswerte der letzten days Tage (lückenlos, inkl. heute) plus
+    Wochenvergleich der letzten 14 abgeschlossenen Tage (bis gestern)
+    """
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=max(days, 15) - 1)
+
+    result = await db.execute(
+        select(DailyMetrics)
+        .where(DailyMetrics.day >= start)
+        .where(DailyMetrics.day <= today)
+    )
+    stored = {m.day: m for m in result.scalars().all()}
+
+    rows = []
+    day = start
+    while day <= today:
+        metrics = stored.get(day)
+        row = _empty_row(day)
+        if metrics is not None:
+            row.update({field: getattr(metrics, field) for field in METRIC_FIELDS})
+        rows.append(row)
+        day += timedelta(days=1)
+
+    return {
+        "days": [_serialize(row) for row in rows[-days:]],
+        "week_over_week": week_over_week(rows[:-1]),
+        "updated_at": max(
+            (m.updated_at.isoformat() for m in stored.values() if m.updated_at),
+            default=None,
+        ),
+    }
+
+
+def format_change(change_percent: Optional[float]) -> str:
+    """Veränderung für die Dashboard-Kachel, z.B. '+12%'"""
+    if change_percent is None:
+        return "–"
+    return f"{change_percent:+.0f}%"
@@ -0,0 +1,369 @@
+# ===========================================
+# WARIZMY EDUCATION - Daten-Export (CSV / XLSX)
+# ===========================================
+# Streamt Benutzer, Zahlungen, Anwesenheit und Einschreibungen direkt
+# aus einem Server-Side-Cursor in die Response.
+#
+# - Zeilen kommen in Blöcken zu EXPORT_BATCH_SIZE (yield_per), jeder Block
+#   wird sofort geschrieben -> Speicher bleibt konstant, egal ob 100 oder
+#   1.000.000 Zeilen
+# - Es werden nur Spalten geladen (keine ORM-Objekte, keine Identity-Map)
+# - Die Session gehört dem Stream selbst: Request-Sessions aus Depends()
+#   sind beim Senden des Bodys schon geschlossen
+# - XLSX wird ohne Zusatzpaket geschrieben (ZIP mit Data-Descriptors,
+#   Zellen als Inline-Strings), auch das streamt blockweise.
+#   Excel öffnet max. 1.048.576 Zeilen, für mehr CSV verwenden
+# - Texte, die mit = + - @ Tab oder CR beginnen, bekommen in CSV und XLSX
+#   ein ' vorangestellt (keine Formel-Auswertung beim Öffnen)
+
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.models import (
+    User,
+    UserRole,
+    Payment,
+    PaymentStatus,
+    LiveSession,
+    Attendance,
+    Class,
+    ClassEnrollment,
+    Course,
+    Enrollment,
+)
+
+settings = get_settings()
+
+
+# =========================================
+# Export-Definitionen
+# =========================================
+def _users(role: Optional[str] = None, status_filter: Optional[str] = None) -> List:
+    query = select(
+        User.id,
+        User.email,
+        User.first_name,
+        User.last_name,
+        User.phone,
+        User.role,
+        User.is_active,
+        User.email_verified,
+        User.created_at,
+    ).order_by(User.created_at, User.id)
+    if role:
+        query = query.where(User.role == UserRole(role))
+    return [query]
+
+
+def _payments(role: Optional[str] = None, status_filter: Optional[str] = None) -> List:
+    query = (
+        select(
+            Payment.id,
+            User.email,
+            Payment.amount,
+            Payment.currency,
+            Payment.payment_method,
+            Payment.payment_status,
+            Payment.paid_at,
+            Payment.created_at,
+        )
+        .outerjoin(User, User.id == Payment.user_id)
+        .order_by(Payment.created_at, Payment.id)
+    )
+    if status_filter:
+        query = query.where(Payment.payment_status == PaymentStatus(status_filter))
+    return [query]
+
+
+def _attendance(role: Optional[str] = None, status_filter: Optional[str] = None) -> List:
+    query = (
+        select(
+            LiveSession.scheduled_at,
+            LiveSession.title,
+            Class.name,
+            User.email,
+            User.first_name,
+            User.last_name,
+            Attendance.status,
+            Attendance.attendance_type,
+            Attendance.checked_in_at,
+            Attendance.checked_in_by,
+        )
+        .join(LiveSession, LiveSession.id == Attendance.live_session_id)
+        .outerjoin(Class, Class.id == LiveSession.class_id)
+        .join(User, User.id == Attendance.user_id)
+        .order_by(LiveSession.scheduled_at, Attendance.id)
+    )
+    return [query]
+
+
+def _enrollments(role: Optional[str] = None, status_filter: Optional[str] = None) -> List:
+    # Klassen- und Kurs-Einschreibungen nacheinander, gleiche Spalten
+    class_query = (
+        select(
+            ClassEnrollment.id,
+            User.email,
+            User.first_name,
+            User.last_name,
+            Class.name,
+            ClassEnrollment.enrollment_type,
+            ClassEnrollment.status,
+            ClassEnrollment.started_at,
+            ClassEnrollment.expires_at,
+        )
+        .join(User, User.id == ClassEnrollment.user_id)
+        .join(Class, Class.id == ClassEnrollment.class_id)
+        .order_by(ClassEnrollment.created_at, ClassEnrollment.id)
+    )
+    course_query = (
+        select(
+            Enrollment.id,
+            User.email,
+            User.first_name,
+            User.last_name,
+            Course.title,
+            Enrollment.enrollment_type,
+            Enrollment.status,
+            Enrollment.started_at,
+            Enrollment.expires_at,
+        )
+        .join(User, User.id == Enrollment.user_id)
+        .join(Course, Course.id == Enrollment.course_id)
+        .order_by(Enrollment.created_at, Enrollment.id)
+    )
+    return [class_query, course_query]
+
+
+# Name -> (Spaltenüberschriften, Statements, Art-Spalte je Statement)
+EXPORTS: Dict[str, tuple] = {
+    "users": (
+        ["ID", "E-Mail", "Vorname", "Nachname", "Telefon", "Rolle",
+         "Aktiv", "E-Mail bestätigt", "Registriert am"],
+        _users,
+        None,
+    ),
+    "payments": (
+        ["ID", "E-Mail", "Betrag", "Währung", "Zahlungsart", "Status",
+         "Bezahlt am", "Erstellt am"],
+        _payments,
+        None,
+    ),
+    "attendance": (
+        ["Session am", "Session", "Klasse", "E-Mail", "Vorname", "Nachname",
+         "Status", "Teilnahme", "Eingecheckt am", "Eingecheckt per"],
+        _attendance,
+        None,
+    ),
+    "enrollments": (
+        ["Art", "ID", "E-Mail", "Vorname", "Nachname", "Klasse/Kurs",
+         "Typ", "Status", "Ab", "Bis"],
+        _enrollments,
+        ["Klasse", "Kurs"],
+    ),
+}
+
+
+# =========================================
+# Zellwerte
+# =========================================
+# Texte mit diesen Anfangszeichen wertet Excel/LibreOffice als Formel aus
+# (CSV-/Formel-Injection über Namen, Adressen, Notizen, ...)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _text(value) -> str:
+    """Wert als Text (CSV, XLSX-Strings); Freitext wird gegen Formeln geschützt"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "ja" if value else "nein"
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    if isinstance(value, str):
+        # Nur Strings: negative Beträge (Decimal) bleiben Zahlen
+        return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+    return str(value)
+
+
+# =========================================
+# Zeilen aus der Datenbank
+# =========================================
+async def stream_rows(statements: List, labels: Optional[List[str]]) -> AsyncIterator[List[list]]:
+    """Blöcke von Zeilen (Listen) über einen Server-Side-Cursor"""
+    from app.db.session import replica_router
+
+    async with replica_router.session() as db:
+        for index, statement in enumerate(statements):
+            prefix = [labels[index]] if labels else []
+            result = await db.stream(
+                statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                yield [prefix + list(row) for row in partition]
+
+
+# =========================================
+# CSV
+# =========================================
+async def csv_stream(headers: List[str], blocks: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    """CSV (UTF-8 mit BOM, damit Excel Umlaute/Arabisch richtig erkennt)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    async for rows in blocks:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow([_text(value) for value in row])
+        yield buffer.getvalue().encode("utf-8")
+
+
+# =========================================
+# XLSX
+# =========================================
+# In XML 1.0 verbotene Steuerzeichen
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+class _ChunkSink:
+    """
+    Schreibziel für zipfile ohne seek(): zipfile schreibt dann
+    Data-Descriptors, alles Geschriebene kann sofort gesendet werden.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = _ILLEGAL_XML.sub("", _text(value))
+    if not text:
+        return "<c/>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_row(values) -> str:
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+async def xlsx_stream(headers: List[str], blocks: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    """Einzelnes Tabellenblatt 'Export', Block für Block gezippt"""
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+
+    archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+    archive.writestr("_rels/.rels", _ROOT_RELS)
+    archive.writestr("xl/workbook.xml", _WORKBOOK)
+    archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+
+    sheet = archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+    sheet.write((_SHEET_START + _xlsx_row(headers)).encode("utf-8"))
+    yield sink.drain()
+
+    async for rows in blocks:
+        sheet.write("".join(_xlsx_row(row) for row in rows).encode("utf-8"))
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+
+    sheet.write(_SHEET_END.encode("utf-8"))
+    sheet.close()
+    archive.close()
+    yield sink.drain()
+
+
+# =========================================
+# Einstieg für den Router
+# =========================================
+FORMATS: Dict[str, tuple] = {
+    "csv": ("text/csv; charset=utf-8", csv_stream),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", xlsx_stream),
+}
+
+
+def build_export(kind: str, fmt: str, **filters) -> tuple:
+    """
+    (media_type, Dateiname, Byte-Stream) für einen Export.
+
+    kind und fmt müssen vorher gegen EXPORTS / FORMATS geprüft sein.
+    Statements werden sofort gebaut, ungültige Filter (ValueError)
+    fallen also vor dem Senden auf.
+    """
+    headers, build, labels = EXPORTS[kind]
+    statements = build(**filters)
+    media_type, writer = FORMATS[fmt]
+    filename = f"{kind}-{datetime.utcnow():%Y-%m-%d}.{fmt}"
+    return media_type, filename, writer(headers, stream_rows(statements, labels))
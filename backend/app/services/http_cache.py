@@ -0,0 +1,212 @@
+# ===========================================
+# WARIZMY EDUCATION - HTTP-Caching (ETag, Cache-Control, Surrogate-Keys)
+# ===========================================
+# Öffentliche Katalog- und CMS-Endpunkte (Kurse, Lehrer, FAQs, Standorte,
+# Stundenplan, ...) werden bei jedem Seitenaufruf der Startseite abgefragt.
+#
+# - @cache_policy(...) am Endpoint legt Cache-Control (max-age,
+#   stale-while-revalidate) und Surrogate-Keys fest
+# - Middleware (main.py, apply_cache_policy): starker ETag aus dem Body,
+#   304 Not Modified bei passendem If-None-Match
+# - nginx cacht diese Antworten (proxy_cache, siehe nginx.conf) und
+#   revalidiert per If-None-Match gegen das Backend
+# - Nach Admin-Änderungen purge_cache_keys("courses", ...) aufrufen: die
+#   unter diesen Keys ausgelieferten URLs werden bei nginx neu geladen
+#   (GET über den internen nginx-Server, HTTP_CACHE_PURGE_BASE_URL)
+#
+# Die URLs pro Key merkt sich jeder Worker selbst. Ein Purge geht deshalb
+# per NOTIFY cache_invalidated an alle Worker (cache_invalidation), jeder
+# lädt die Varianten neu, die er ausgeliefert hat.
+
+import asyncio
+import hashlib
+from collections import OrderedDict, defaultdict
+from typing import Iterable, Optional, Set
+
+from fastapi import Request, Response
+
+from app.core.config import get_settings
+from app.services.cache_invalidation import publish_invalidation, register_invalidation_handler
+
+settings = get_settings()
+
+INVALIDATION_KIND = "surrogate"
+
+# Vor dem Neuladen warten, bis alle Worker ihren CMS-Snapshot nach
+# NOTIFY content_changed neu geladen haben (content_snapshot)
+REFRESH_DELAY_SECONDS = 2
+
+
+# =========================================
+# Policy pro Endpoint
+# =========================================
+class CachePolicy:
+    """Cache-Control und Surrogate-Keys eines Endpoints"""
+
+    def __init__(self, max_age: int, stale_while_revalidate: int = 0, keys: Iterable[str] = ()):
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.keys = tuple(keys)
+
+    def cache_control(self) -> str:
+        value = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+
+def cache_policy(max_age: int, stale_while_revalidate: int = 0, keys: Iterable[str] = ()):
+    """
+    Öffentlichen Endpoint cachebar machen.
+
+    Verwendung:
+        @router.get("/faqs")
+        @cache_policy(300, stale_while_revalidate=3600, keys=["faqs"])
+        async def list_faqs(...):
+            ...
+    """
+    policy = CachePolicy(max_age, stale_while_revalidate, keys)
+
+    def decorator(endpoint):
+        endpoint.__cache_policy__ = policy
+        return endpoint
+    return decorator
+
+
+def endpoint_cache_policy(request: Request) -> Optional[CachePolicy]:
+    """Cache-Policy des aufgerufenen Endpoints (oder None)"""
+    endpoint = request.scope.get("endpoint")
+    return getattr(endpoint, "__cache_policy__", None)
+
+
+# =========================================
+# ETag / 304
+# =========================================
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match vergleicht schwach (W/-Präfix wird ignoriert)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def apply_cache_policy(request: Request, response: Response) -> Response:
+    """ETag, Cache-Control und Surrogate-Key setzen; 304 wenn unverändert"""
+    policy = endpoint_cache_policy(request)
+    if policy is None or request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = strong_etag(body)
+    keys = policy.keys
+
+    headers = dict(response.headers)
+    headers["etag"] = etag
+    headers["cache-control"] = policy.cache_control()
+    if keys:
+        headers["surrogate-key"] = " ".join(keys)
+        url = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        surrogate_index.register(keys, url)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        surrogate_index.not_modified += 1
+        for name in ("content-length", "content-type"):
+            headers.pop(name, None)
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
+# =========================================
+# Surrogate-Keys → URLs (pro Worker)
+# =========================================
+class SurrogateKeyIndex:
+    """Zuletzt ausgelieferte URLs pro Surrogate-Key (begrenzt)"""
+
+    def __init__(self, max_urls_per_key: int):
+        self.max_urls_per_key = max_urls_per_key
+        self._urls = defaultdict(OrderedDict)
+        self._tasks: Set[asyncio.Task] = set()
+        self.not_modified = 0
+        self.purges = 0
+        self.refreshed = 0
+        self.errors = 0
+
+    def register(self, keys: Iterable[str], url: str) -> None:
+        for key in keys:
+            urls = self._urls[key]
+            urls[url] = None
+            urls.move_to_end(url)
+            while len(urls) > self.max_urls_per_key:
+                urls.popitem(last=False)
+
+    def pop(self, keys: Iterable[str]) -> Set[str]:
+        urls = set()
+        for key in keys:
+            urls.update(self._urls.pop(key, {}))
+        return urls
+
+    async def _refresh(self, urls: Set[str]) -> None:
+        import httpx
+
+        await asyncio.sleep(REFRESH_DELAY_SECONDS)
+        async with httpx.AsyncClient(base_url=settings.HTTP_CACHE_PURGE_BASE_URL, timeout=10) as client:
+            for url in sorted(urls):
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    self.refreshed += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[HTTP-Cache] Neuladen von {url} fehlgeschlagen: {e}")
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def purge(self, keys: Iterable[str]) -> None:
+        """URLs dieser Keys aus diesem Worker neu laden lassen"""
+        urls = self.pop(keys)
+        if not urls or not settings.HTTP_CACHE_PURGE_BASE_URL:
+            return
+        self._spawn(self._refresh(urls))
+
+    def _purge_notified(self, key: str) -> None:
+        """NOTIFY von einem anderen Worker (oder diesem)"""
+        self.purge(key.split())
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._urls),
+            "urls": sum(len(urls) for urls in self._urls.values()),
+            "not_modified": self.not_modified,
+            "purges": self.purges,
+            "refreshed": self.refreshed,
+            "errors": self.errors,
+            "purge_enabled": bool(settings.HTTP_CACHE_PURGE_BASE_URL),
+        }
+
+
+surrogate_index = SurrogateKeyIndex(settings.HTTP_CACHE_MAX_URLS_PER_KEY)
+# Verpasste Purges (LISTEN unterbrochen): Einträge laufen nach max-age ab
+register_invalidation_handler(INVALIDATION_KIND, surrogate_index._purge_notified, lambda: None)
+
+
+def purge_cache_keys(*keys: str) -> None:
+    """
+    Nach Admin-Änderungen: gecachte Seiten dieser Keys neu laden lassen.
+
+    Dieser Worker sofort, alle anderen (und dieser erneut, dann ohne
+    URLs) über NOTIFY.
+    """
+    surrogate_index.purges += 1
+    surrogate_index.purge(keys)
+    surrogate_index._spawn(publish_invalidation(INVALIDATION_KIND, " ".join(keys)))
@@ -0,0 +1,174 @@
+# ===========================================
+# WARIZMY EDUCATION - Lektions-Cache (Lesepfad)
+# ===========================================
+# Studenten klicken sich Lektion für Lektion durch einen Kurs; der Inhalt
+# (Text, Materialien, Quiz) ändert sich dabei praktisch nie.
+#
+# - Slug-Index (course_slug, lesson_slug) -> lesson_id pro Worker: bei
+#   einem Treffer sucht die Versions-Abfrage nur per Primärschlüssel
+#   (Lektion, Kurs über course_id) und liefert die aktuellen Slugs mit;
+#   passen sie nicht mehr (umbenannt, gelöscht, nicht veröffentlicht),
+#   fällt sie auf die Slug-Suche zurück
+# - Versions-Abfrage (EINE pro Request bei Treffer): id, updated_at und
+#   Slug der nächsten veröffentlichten Lektion
+# - Inhalts-Cache (lesson_id, updated_at) -> fertige JSON-Daten: eine
+#   geänderte Lektion hat ein neues updated_at, alte Versionen werden
+#   ersetzt, ein Invalidieren ist nicht nötig
+# - ETag aus Version + nächster Lektion: If-None-Match -> 304 ohne den
+#   Inhalt zu laden
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, and_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import get_settings
+from app.models import Course, Lesson
+from app.services.http_cache import strong_etag
+
+settings = get_settings()
+
+
+def _next_lesson_slug():
+    """Slug der nächsten veröffentlichten Lektion nach order (Subquery)"""
+    next_lesson = aliased(Lesson)
+    return (
+        select(next_lesson.slug)
+        .where(next_lesson.course_id == Lesson.course_id)
+        .where(next_lesson.is_published == True)
+        .where(tuple_(next_lesson.order, next_lesson.id) > tuple_(Lesson.order, Lesson.id))
+        .order_by(next_lesson.order, next_lesson.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def lesson_version_query(course_slug: str, lesson_slug: str):
+    """
+    Kurs per Slug, dazu (LEFT JOIN) die veröffentlichte Lektion und der
+    Slug der nächsten veröffentlichten Lektion nach order.
+
+    lesson_id None: Kurs gefunden, Lektion nicht (-> passende 404).
+    """
+    lesson_match = and_(
+        Lesson.course_id == Course.id,
+        Lesson.slug == lesson_slug,
+        Lesson.is_published == True,
+    )
+    return (
+        select(
+            Lesson.id.label("lesson_id"),
+            Lesson.updated_at,
+            _next_lesson_slug().label("next_lesson_slug"),
+        )
+        .select_from(Course)
+        .outerjoin(Lesson, lesson_match)
+        .where(Course.slug == course_slug)
+        .limit(1)
+    )
+
+
+def lesson_version_by_id_query(lesson_id: UUID):
+    """
+    Versions-Zeile per Primärschlüssel (Slug-Index-Treffer), mit den
+    aktuellen Slugs und dem Veröffentlichungs-Status zum Prüfen.
+    """
+    return (
+        select(
+            Lesson.id.label("lesson_id"),
+            Lesson.updated_at,
+            _next_lesson_slug().label("next_lesson_slug"),
+            Lesson.slug.label("lesson_slug"),
+            Lesson.is_published,
+            Course.slug.label("course_slug"),
+        )
+        .join(Course, Course.id == Lesson.course_id)
+        .where(Lesson.id == lesson_id)
+    )
+
+
+def lesson_etag(lesson_id: UUID, updated_at: Optional[datetime], next_lesson_slug: Optional[str]) -> str:
+    version = f"{lesson_id}:{updated_at.isoformat() if updated_at else ''}:{next_lesson_slug or ''}"
+    return strong_etag(version.encode())
+
+
+# =========================================
+# Cache pro Worker
+# =========================================
+class LessonReadCache:
+    """Slug-Index und versionierter Inhalts-Cache (beide LRU-begrenzt)"""
+
+    def __init__(self, max_slugs: int, max_entries: int):
+        self.max_slugs = max_slugs
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[Tuple[str, str], UUID]" = OrderedDict()
+        self._content: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.stale_slugs = 0
+
+    async def find(self, db: AsyncSession, course_slug: str, lesson_slug: str):
+        """
+        Versions-Zeile (lesson_id, updated_at, next_lesson_slug) oder None,
+        wenn es den Kurs nicht gibt.
+        """
+        key = (course_slug, lesson_slug)
+        lesson_id = self._ids.get(key)
+        if lesson_id is not None:
+            row = (await db.execute(lesson_version_by_id_query(lesson_id))).first()
+            if (
+                row is not None
+                and row.is_published
+                and row.lesson_slug == lesson_slug
+                and row.course_slug == course_slug
+            ):
+                self._ids.move_to_end(key)
+                return row
+            # Slug geändert, Lektion gelöscht oder nicht mehr veröffentlicht
+            self._ids.pop(key, None)
+            self.stale_slugs += 1
+
+        row = (await db.execute(lesson_version_query(course_slug, lesson_slug))).first()
+        if row is not None and row.lesson_id is not None:
+            self._ids[key] = row.lesson_id
+            while len(self._ids) > self.max_slugs:
+                self._ids.popitem(last=False)
+        return row
+
+    def content(self, lesson_id: UUID, updated_at: Optional[datetime]) -> Optional[dict]:
+        entry = self._content.get(lesson_id)
+        if entry is None or entry[0] != updated_at:
+            self.misses += 1
+            return None
+        self._content.move_to_end(lesson_id)
+        self.hits += 1
+        return entry[1]
+
+    def store(self, lesson_id: UUID, updated_at: Optional[datetime], data: dict) -> None:
+        self._content[lesson_id] = (updated_at, data)
+        self._content.move_to_end(lesson_id)
+        while len(self._content) > self.max_entries:
+            self._content.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "slugs": len(self._ids),
+            "entries": len(self._content),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "not_modified": self.not_modified,
+            "stale_slugs": self.stale_slugs,
+        }
+
+
+lesson_read_cache = LessonReadCache(
+    settings.LESSON_SLUG_INDEX_MAX_ENTRIES,
+    settings.LESSON_CACHE_MAX_ENTRIES,
+)
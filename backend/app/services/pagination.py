@@ -0,0 +1,63 @@
+# ===========================================
+# WARIZMY EDUCATION - Keyset-Pagination
+# ===========================================
+# Cursor-basierte Seiten über (created_at, id) statt OFFSET:
+# jede Seite ist ein Index-Range-Scan ab dem letzten Eintrag, auch
+# tief in großen Tabellen.
+#
+# Der Cursor ist für Clients undurchsichtig (base64), die nächste Seite
+# wird mit ?cursor=<next_cursor> abgerufen.
+
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Cursor für den Eintrag (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Cursor wieder in (created_at, id) zerlegen.
+
+    Raises:
+        HTTPException 400: Bei manipuliertem oder ungültigem Cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ungültiger Cursor",
+        )
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int):
+    """
+    Query auf eine Seite (neueste zuerst) beschränken.
+
+    Lädt limit + 1 Zeilen, damit next_page_cursor erkennt, ob es eine
+    weitere Seite gibt.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < (created_at, row_id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def next_page_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """(Zeilen der Seite, Cursor der nächsten Seite oder None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
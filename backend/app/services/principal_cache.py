@@ -0,0 +1,311 @@
+# ===========================================
+# WARIZMY EDUCATION - Principal Cache
+# ===========================================
+# Cache für den authentifizierten User (Principal) über Requests hinweg,
+# damit get_current_user nicht bei jedem Request die users-Zeile lädt.
+#
+# - Backend "memory": begrenzter LRU/TTL-Cache pro Worker
+# - Backend "redis": gemeinsamer Cache aller Worker (REDIS_URL)
+# - Gespeichert werden nur PRINCIPAL_COLUMNS (Identität, Rolle, Status,
+#   Name) – kein Passwort-Hash, keine Adresse/Telefon/Geburtsdatum, auch
+#   nicht in Redis. Bei einem Treffer wird daraus ohne SELECT eine
+#   persistente Instanz in der Session erzeugt; die übrigen Spalten sind
+#   nicht geladen und werden bei Bedarf mit load_profile() nachgeladen
+# - Nach Änderungen am User invalidate_principal(user_id) aufrufen
+#   (Admin-Update, Rollenwechsel, Löschen, Profil, Passwort, ...); beim
+#   Memory-Backend erreicht die Invalidierung per NOTIFY alle Worker
+
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_object_session
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import get_settings
+from app.models.user import User
+from app.services.cache_invalidation import publish_invalidation, register_invalidation_handler
+
+settings = get_settings()
+
+# Was Authentifizierung, Rollenprüfung und Anzeige brauchen
+PRINCIPAL_COLUMNS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "is_active",
+    "email_verified",
+    "onboarding_completed",
+    "created_at",
+    "updated_at",
+)
+
+_COLUMNS = tuple(User.__table__.columns[name] for name in PRINCIPAL_COLUMNS)
+_PROFILE_KEYS = frozenset(c.key for c in User.__table__.columns) - frozenset(PRINCIPAL_COLUMNS)
+
+INVALIDATION_KIND = "principal"
+
+
+# =========================================
+# Serialisierung (JSON, spaltentyp-basiert)
+# =========================================
+def _encode(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _decode(column, value):
+    if value is None:
+        return None
+    python_type = getattr(column.type, "enum_class", None)
+    if python_type is not None:
+        return python_type(value)
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is UUID:
+        return UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def _snapshot(user: User) -> dict:
+    """Spaltenwerte eines Users als JSON-fähiges Dict"""
+    return {c.key: _encode(getattr(user, c.key)) for c in _COLUMNS}
+
+
+def _restore(data: dict) -> User:
+    """
+    Detached User-Instanz aus einem Snapshot (ohne Änderungs-Historie).
+    Nicht gecachte Spalten bleiben ungeladen.
+    """
+    user = User(**{c.key: _decode(c, data.get(c.key)) for c in _COLUMNS})
+    make_transient_to_detached(user)
+    return user
+
+
+async def load_profile(user: User) -> User:
+    """
+    Nicht gecachte Spalten (Telefon, Adresse, Opt-ins, ...) nachladen,
+    falls der User aus dem Cache kommt. Sonst keine Abfrage.
+    """
+    missing = [key for key in inspect(user).unloaded if key in _PROFILE_KEYS]
+    if missing:
+        await async_object_session(user).refresh(user, attribute_names=missing)
+    return user
+
+
+# =========================================
+# Backends
+# =========================================
+class _MemoryBackend:
+    """Begrenzter LRU/TTL-Cache (prozesslokal)"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    async def set(self, key: str, data: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class _RedisBackend:
+    """Gemeinsamer Cache über Redis (alle Worker sehen Invalidierungen)"""
+
+    PREFIX = "principal:"
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis
+
+        self.ttl = ttl
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._client.get(self.PREFIX + key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, data: dict) -> None:
+        await self._client.set(self.PREFIX + key, json.dumps(data), ex=self.ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.PREFIX + key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+# =========================================
+# Principal Cache
+# =========================================
+class PrincipalCache:
+    """
+    Cache für authentifizierte User, Schlüssel ist die User-ID.
+
+    Fehler des Backends (z.B. Redis nicht erreichbar) führen nie zu
+    Request-Fehlern, es wird dann einfach aus der Datenbank gelesen.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._backend = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PRINCIPAL_CACHE_TTL_SECONDS > 0
+
+    def _get_backend(self):
+        if self._backend is None:
+            ttl = settings.PRINCIPAL_CACHE_TTL_SECONDS
+            if settings.PRINCIPAL_CACHE_BACKEND == "redis":
+                try:
+                    self._backend = _RedisBackend(settings.REDIS_URL, ttl)
+                except ImportError:
+                    print("[PrincipalCache] redis nicht installiert, nutze Memory-Backend")
+            if self._backend is None:
+                self._backend = _MemoryBackend(settings.PRINCIPAL_CACHE_SIZE, ttl)
+        return self._backend
+
+    async def get(self, db: AsyncSession, user_id: UUID) -> Optional[User]:
+        """
+        User aus dem Cache in die Session übernehmen (ohne SELECT).
+        Gibt None zurück, wenn nicht im Cache.
+        """
+        if not self.enabled:
+            return None
+        try:
+            data = await self._get_backend().get(str(user_id))
+        except Exception as e:
+            self.errors += 1
+            print(f"[PrincipalCache] Lesefehler: {e}")
+            return None
+
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return await db.merge(_restore(data), load=False)
+
+    async def set(self, user: User) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self._get_backend().set(str(user.id), _snapshot(user))
+        except Exception as e:
+            self.errors += 1
+            print(f"[PrincipalCache] Schreibfehler: {e}")
+
+    async def invalidate(self, user_id) -> None:
+        if not self.enabled:
+            return
+        backend = self._get_backend()
+        try:
+            await backend.delete(str(user_id))
+        except Exception as e:
+            self.errors += 1
+            print(f"[PrincipalCache] Invalidierung fehlgeschlagen: {e}")
+        if isinstance(backend, _MemoryBackend):
+            # Die anderen Worker haben eigene Kopien
+            await publish_invalidation(INVALIDATION_KIND, user_id)
+
+    def _discard_local(self, key: str) -> None:
+        """NOTIFY von einem anderen Worker (oder diesem)"""
+        if isinstance(self._backend, _MemoryBackend):
+            self._backend.discard(key)
+
+    def _clear_local(self) -> None:
+        if isinstance(self._backend, _MemoryBackend):
+            self._backend.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": settings.PRINCIPAL_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": self._backend.size() if self._backend else 0,
+        }
+
+
+principal_cache = PrincipalCache()
+register_invalidation_handler(
+    INVALIDATION_KIND,
+    principal_cache._discard_local,
+    principal_cache._clear_local,
+)
+
+
+async def get_principal(db: AsyncSession, user_id) -> Optional[User]:
+    """
+    User für die Authentifizierung laden: erst Cache, sonst Datenbank.
+
+    Returns:
+        User (in der Session) oder None wenn nicht vorhanden
+    """
+    try:
+        user_uuid = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+    except ValueError:
+        return None
+
+    user = await principal_cache.get(db, user_uuid)
+    if user is not None:
+        return user
+
+    result = await db.execute(select(User).where(User.id == user_uuid))
+    user = result.scalar_one_or_none()
+    if user is not None:
+        await principal_cache.set(user)
+    return user
+
+
+async def invalidate_principal(user_id) -> None:
+    """Gecachten User verwerfen (nach jeder Änderung an der users-Zeile)."""
+    await principal_cache.invalidate(user_id)
@@ -0,0 +1,276 @@
+# ===========================================
+# WARIZMY EDUCATION - Progress Service
+# ===========================================
+# Mengenbasierte Berechnung und Pflege des Kursfortschritts
+#
+# - get_course_progress_map: Live-Berechnung für beliebig viele
+#   (User, Kurs)-Paare in EINER gruppierten Abfrage
+# - course_progress Tabelle: denormalisierte Zähler pro (User, Kurs),
+#   wird bei Lektionsabschluss und Lektionsänderungen per
+#   INSERT ... SELECT ... ON CONFLICT neu berechnet
+# - get_user_course_progress: Lesen per Primärschlüssel, fehlende
+#   Zeilen werden beim ersten Lesen nachgetragen
+
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, func, and_, literal, DateTime, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User, Course, Lesson, LessonProgress, CourseProgress
+
+
+def empty_progress() -> dict:
+    """Fortschritt für Kurse ohne Lektionen"""
+    return {
+        "total_lessons": 0,
+        "completed_lessons": 0,
+        "progress": 0,
+        "next_lesson_slug": None,
+    }
+
+
+def _format_progress(total: int, completed: int, next_lesson_slug) -> dict:
+    """Zähler in das Antwortformat der Dashboards umwandeln"""
+    total = total or 0
+    completed = completed or 0
+    progress = int((completed / total) * 100) if total > 0 else 0
+
+    return {
+        "total_lessons": total,
+        "completed_lessons": completed,
+        "progress": progress,
+        # Nächste Lektion nur für nicht abgeschlossene Kurse
+        "next_lesson_slug": next_lesson_slug if progress < 100 and total > 0 else None,
+    }
+
+
+def _first_ordered(column, condition, order_by, item_type):
+    """
+    Erstes Element von column innerhalb der Gruppe, sortiert nach order_by
+    und gefiltert auf condition (NULL wenn keine Zeile passt).
+    """
+    return type_coerce(
+        func.array_agg(aggregate_order_by(column, *order_by)).filter(condition),
+        ARRAY(item_type),
+    )[1]
+
+
+def _progress_query(user_ids, course_ids, published_only: bool = False):
+    """
+    Gruppierte Fortschritts-Abfrage für user_ids x course_ids.
+
+    user_ids / course_ids dürfen Listen oder Subqueries sein. Liefert pro
+    Paar genau eine Zeile (auch ohne Lektionen) mit den Spalten der
+    course_progress Tabelle.
+    """
+    has_slug = and_(Lesson.slug.isnot(None), Lesson.slug != "")
+    lesson_order = (Lesson.order, Lesson.created_at)
+
+    lesson_join = Lesson.course_id == Course.id
+    if published_only:
+        lesson_join = and_(lesson_join, Lesson.is_published == True)
+
+    next_open_id = _first_ordered(
+        Lesson.id, and_(LessonProgress.id.is_(None), has_slug), lesson_order, PG_UUID(as_uuid=True)
+    )
+    first_id = _first_ordered(Lesson.id, has_slug, lesson_order, PG_UUID(as_uuid=True))
+    last_completed_id = _first_ordered(
+        Lesson.id,
+        LessonProgress.id.isnot(None),
+        (LessonProgress.completed_at.desc().nulls_last(), Lesson.order.desc()),
+        PG_UUID(as_uuid=True),
+    )
+
+    # Kreuzprodukt User x Kurse, Lektionen und Abschlüsse per LEFT JOIN
+    return (
+        select(
+            User.id.label("user_id"),
+            Course.id.label("course_id"),
+            func.count(LessonProgress.id).label("completed_count"),
+            func.count(Lesson.id).label("total_count"),
+            last_completed_id.label("last_lesson_id"),
+            func.coalesce(next_open_id, first_id).label("next_lesson_id"),
+        )
+        .select_from(User)
+        .join(Course, Course.id.in_(course_ids))
+        .outerjoin(Lesson, lesson_join)
+        .outerjoin(
+            LessonProgress,
+            and_(
+                LessonProgress.user_id == User.id,
+                LessonProgress.lesson_id == Lesson.id,
+                LessonProgress.completed == True,
+            ),
+        )
+        .where(User.id.in_(user_ids))
+        .group_by(User.id, Course.id)
+    )
+
+
+def _as_uuids(values: Iterable) -> list:
+    return list({v if isinstance(v, UUID) else UUID(str(v)) for v in values})
+
+
+async def get_course_progress_map(
+    db: AsyncSession,
+    user_ids: Iterable[UUID],
+    course_ids: Iterable[UUID],
+    published_only: bool = False,
+) -> Dict[Tuple[UUID, UUID], dict]:
+    """
+    Fortschritt für alle Kombinationen aus user_ids x course_ids live berechnen.
+
+    Args:
+        db: Datenbanksession
+        user_ids: Benutzer-IDs
+        course_ids: Kurs-IDs
+        published_only: Nur veröffentlichte Lektionen zählen
+
+    Returns:
+        Dict {(user_id, course_id): {total_lessons, completed_lessons,
+        progress, next_lesson_slug}}
+    """
+    user_ids = _as_uuids(user_ids)
+    course_ids = _as_uuids(course_ids)
+    if not user_ids or not course_ids:
+        return {}
+
+    progress = _progress_query(user_ids, course_ids, published_only).subquery()
+    next_lesson = Lesson.__table__.alias("next_lesson")
+
+    result = await db.execute(
+        select(progress, next_lesson.c.slug.label("next_lesson_slug"))
+        .outerjoin(next_lesson, next_lesson.c.id == progress.c.next_lesson_id)
+    )
+
+    return {
+        (row.user_id, row.course_id): _format_progress(
+            row.total_count, row.completed_count, row.next_lesson_slug
+        )
+        for row in result.all()
+    }
+
+
+# =========================================
+# Denormalisierte course_progress Tabelle
+# =========================================
+async def refresh_course_progress(
+    db: AsyncSession,
+    user_ids,
+    course_ids,
+) -> None:
+    """
+    course_progress Zeilen für user_ids x course_ids neu berechnen (Upsert).
+
+    Läuft als ein INSERT ... SELECT ... ON CONFLICT in der Transaktion des
+    Aufrufers. Ausstehende ORM-Änderungen müssen vorher geflusht sein.
+    user_ids / course_ids dürfen Listen oder Subqueries sein.
+    """
+    now = datetime.utcnow()
+    source = _progress_query(user_ids, course_ids).add_columns(
+        literal(now, DateTime).label("updated_at")
+    )
+    stmt = insert(CourseProgress).from_select(
+        ["user_id", "course_id", "completed_count", "total_count", "last_lesson_id", "next_lesson_id", "updated_at"],
+        source,
+        include_defaults=False,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CourseProgress.user_id, CourseProgress.course_id],
+        set_={
+            "completed_count": stmt.excluded.completed_count,
+            "total_count": stmt.excluded.total_count,
+            "last_lesson_id": stmt.excluded.last_lesson_id,
+            "next_lesson_id": stmt.excluded.next_lesson_id,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def refresh_course_progress_for_lesson(
+    db: AsyncSession,
+    user_id: UUID,
+    lesson_id: UUID,
+) -> None:
+    """Fortschritt eines Users für den Kurs einer Lektion neu berechnen."""
+    course_id = select(Lesson.course_id).where(Lesson.id == lesson_id)
+    await refresh_course_progress(db, [user_id], course_id)
+
+
+async def refresh_course_progress_for_course(
+    db: AsyncSession,
+    course_id: UUID,
+) -> None:
+    """
+    Alle vorhandenen course_progress Zeilen eines Kurses neu berechnen.
+    Aufruf nach Anlegen, Löschen, Umsortieren oder (Ent-)Veröffentlichen
+    von Lektionen.
+    """
+    user_ids = select(CourseProgress.user_id).where(CourseProgress.course_id == course_id)
+    await refresh_course_progress(db, user_ids, [course_id])
+
+
+async def get_user_course_progress(
+    db: AsyncSession,
+    user_id: UUID,
+    course_ids: Iterable[UUID],
+    published_only: bool = False,
+) -> Dict[UUID, dict]:
+    """
+    Fortschritt eines Benutzers für mehrere Kurse.
+
+    Liest aus course_progress (Primärschlüssel-Lookups). Fehlende Zeilen
+    werden einmalig berechnet und gespeichert (in Read-Only Sessions nur
+    live berechnet). Mit published_only=True wird live berechnet, da die
+    Tabelle alle Lektionen zählt.
+
+    Returns:
+        Dict {course_id: progress}, jeder angefragte Kurs ist enthalten.
+    """
+    course_ids = [c if isinstance(c, UUID) else UUID(str(c)) for c in course_ids]
+    user_uuid = user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+    if not course_ids:
+        return {}
+
+    if published_only:
+        progress_map = await get_course_progress_map(
+            db, [user_uuid], course_ids, published_only=True
+        )
+        return {
+            cid: progress_map.get((user_uuid, cid), empty_progress())
+            for cid in course_ids
+        }
+
+    async def load() -> Dict[UUID, dict]:
+        result = await db.execute(
+            select(CourseProgress, Lesson.slug)
+            .outerjoin(Lesson, Lesson.id == CourseProgress.next_lesson_id)
+            .where(CourseProgress.user_id == user_uuid)
+            .where(CourseProgress.course_id.in_(course_ids))
+        )
+        return {
+            cp.course_id: _format_progress(cp.total_count, cp.completed_count, slug)
+            for cp, slug in result.all()
+        }
+
+    progress_by_course = await load()
+
+    missing = [cid for cid in course_ids if cid not in progress_by_course]
+    if missing and db.info.get("read_only"):
+        # GET-Route: nicht speichern, nur live berechnen
+        progress_map = await get_course_progress_map(db, [user_uuid], missing)
+        for cid in missing:
+            if (user_uuid, cid) in progress_map:
+                progress_by_course[cid] = progress_map[(user_uuid, cid)]
+    elif missing:
+        await refresh_course_progress(db, [user_uuid], missing)
+        progress_by_course = await load()
+
+    return {
+        cid: progress_by_course.get(cid, empty_progress())
+        for cid in course_ids
+    }
@@ -0,0 +1,297 @@
+# ===========================================
+# WARIZMY EDUCATION - Progress Heartbeat Buffer
+# ===========================================
+# Sammelt Video-Heartbeats (watched_seconds) im Speicher und schreibt sie
+# gebündelt per INSERT ... ON CONFLICT (user_id, lesson_id) DO UPDATE.
+#
+# - Pro (User, Lektion) wird nur der höchste Wert behalten
+# - Ein Hintergrund-Task flusht alle PROGRESS_FLUSH_INTERVAL_SECONDS
+# - Bei PROGRESS_BUFFER_MAX_ENTRIES wird sofort geflusht
+# - Abschlüsse laufen NICHT über den Puffer, sondern werden direkt
+#   geschrieben (siehe upsert_lesson_progress)
+
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, func, case, literal, Boolean, DateTime, Integer
+from sqlalchemy.dialects.postgresql import insert, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import User, Lesson, LessonProgress
+
+settings = get_settings()
+
+
+def _upsert_statement(rows: list, update_fields=("watched_seconds",)):
+    """
+    Multi-Row Upsert für lesson_progress.
+
+    watched_seconds wird nie verkleinert (GREATEST mit bestehendem Wert).
+    completed_at wird nur bei Abschluss übernommen. Nur Felder aus
+    update_fields werden bei Konflikt überschrieben.
+    """
+    stmt = insert(LessonProgress).values(rows)
+    excluded = stmt.excluded
+
+    set_ = {"updated_at": excluded.updated_at}
+    if "watched_seconds" in update_fields:
+        set_["watched_seconds"] = func.greatest(
+            func.coalesce(LessonProgress.watched_seconds, 0),
+            excluded.watched_seconds,
+        )
+    if "completed" in update_fields:
+        set_["completed"] = excluded.completed
+        set_["completed_at"] = case(
+            (excluded.completed == True, excluded.completed_at),
+            else_=LessonProgress.completed_at,
+        )
+    if "quiz" in update_fields:
+        set_["quiz_score"] = excluded.quiz_score
+        set_["quiz_passed"] = excluded.quiz_passed
+
+    return stmt.on_conflict_do_update(
+        index_elements=[LessonProgress.user_id, LessonProgress.lesson_id],
+        set_=set_,
+    )
+
+
+async def upsert_lesson_progress(
+    db: AsyncSession,
+    user_id: UUID,
+    lesson_id: UUID,
+    watched_seconds: Optional[int] = None,
+    completed: Optional[bool] = None,
+) -> Optional[LessonProgress]:
+    """
+    Fortschritt einer Lektion sofort schreiben (ein Statement, kein SELECT vorab).
+
+    Die Zeile wird nur angelegt, wenn die Lektion existiert
+    (INSERT ... SELECT FROM lessons). Gibt None zurück, wenn die Lektion
+    nicht existiert.
+    """
+    now = datetime.utcnow()
+
+    source = select(
+        literal(uuid.uuid4(), PG_UUID(as_uuid=True)).label("id"),
+        literal(user_id, PG_UUID(as_uuid=True)).label("user_id"),
+        Lesson.id.label("lesson_id"),
+        literal(watched_seconds or 0, Integer).label("watched_seconds"),
+        literal(bool(completed), Boolean).label("completed"),
+        literal(now if completed else None, DateTime).label("completed_at"),
+        literal(now, DateTime).label("created_at"),
+        literal(now, DateTime).label("updated_at"),
+    ).where(Lesson.id == lesson_id)
+    columns = [c.name for c in source.selected_columns]
+
+    stmt = insert(LessonProgress).from_select(columns, source, include_defaults=False)
+
+    set_ = {"updated_at": stmt.excluded.updated_at}
+    if watched_seconds is not None:
+        set_["watched_seconds"] = func.greatest(
+            func.coalesce(LessonProgress.watched_seconds, 0),
+            stmt.excluded.watched_seconds,
+        )
+    if completed is not None:
+        set_["completed"] = stmt.excluded.completed
+        if completed:
+            set_["completed_at"] = stmt.excluded.completed_at
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LessonProgress.user_id, LessonProgress.lesson_id],
+        set_=set_,
+    ).returning(LessonProgress)
+
+    result = await db.execute(
+        select(LessonProgress)
+        .from_statement(stmt)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def upsert_lesson_progress_batch(
+    db: AsyncSession,
+    user_id: UUID,
+    items: Dict[UUID, dict],
+) -> Dict[UUID, LessonProgress]:
+    """
+    Mehrere Lektions-Fortschritte eines Users auf einmal schreiben.
+
+    items: {lesson_id: {"watched_seconds": int, "completed": bool|None,
+    "quiz_score": int|None, "quiz_passed": bool|None}} für bereits
+    validierte Lektionen, Quiz-Werte vom Server bewertet (grade_quiz).
+    Einträge mit denselben gesetzten Feldern laufen in einem gemeinsamen
+    Multi-Row Upsert (im Normalfall genau einer).
+
+    Returns:
+        Dict {lesson_id: LessonProgress} mit dem gespeicherten Stand
+    """
+    now = datetime.utcnow()
+    groups: Dict[tuple, list] = {}
+
+    for lesson_id, item in items.items():
+        completed = item.get("completed")
+        has_quiz = item.get("quiz_score") is not None
+        row = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "lesson_id": lesson_id,
+            "watched_seconds": item.get("watched_seconds") or 0,
+            "completed": bool(completed),
+            "completed_at": now if completed else None,
+            "quiz_score": item.get("quiz_score"),
+            "quiz_passed": item.get("quiz_passed"),
+            "created_at": now,
+            "updated_at": now,
+        }
+        update_fields = ["watched_seconds"]
+        if completed is not None:
+            update_fields.append("completed")
+        if has_quiz:
+            update_fields.append("quiz")
+        groups.setdefault(tuple(update_fields), []).append(row)
+
+    saved: Dict[UUID, LessonProgress] = {}
+    for update_fields, rows in groups.items():
+        stmt = _upsert_statement(rows, update_fields).returning(LessonProgress)
+        result = await db.execute(
+            select(LessonProgress)
+            .from_statement(stmt)
+            .execution_options(populate_existing=True)
+        )
+        for progress in result.scalars().all():
+            saved[progress.lesson_id] = progress
+
+    return saved
+
+
+# =========================================
+# Heartbeat-Puffer
+# =========================================
+class ProgressBuffer:
+    """
+    Prozesslokaler Puffer für watched_seconds Heartbeats.
+
+    Jeder Worker puffert für sich; durch GREATEST im Upsert ist die
+    Reihenfolge der Flushes verschiedener Worker egal.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._pending: Dict[Tuple[UUID, UUID], int] = {}
+        self._lock = asyncio.Lock()
+        # Zähler für Benchmark / Monitoring
+        self.heartbeats_received = 0
+        self.rows_written = 0
+        self.flushes = 0
+
+    def add(self, user_id: UUID, lesson_id: UUID, watched_seconds: int) -> bool:
+        """
+        Heartbeat aufnehmen. Gibt True zurück, wenn der Puffer voll ist
+        und geflusht werden sollte.
+        """
+        key = (user_id, lesson_id)
+        self._pending[key] = max(self._pending.get(key, 0), watched_seconds)
+        self.heartbeats_received += 1
+        return len(self._pending) >= self.max_entries
+
+    def get(self, user_id: UUID, lesson_id: UUID) -> Optional[int]:
+        """Gepufferter Wert (noch nicht geschrieben) oder None"""
+        return self._pending.get((user_id, lesson_id))
+
+    def pop(self, user_id: UUID, lesson_id: UUID) -> Optional[int]:
+        """Gepufferten Wert entnehmen (z.B. wenn direkt geschrieben wird)"""
+        return self._pending.pop((user_id, lesson_id), None)
+
+    def clear(self) -> None:
+        """Puffer verwerfen ohne zu schreiben"""
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Alle gepufferten Heartbeats in einem Upsert schreiben.
+        Unbekannte Lektionen/User (gelöscht) werden vorher aussortiert.
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            lesson_ids = {lesson_id for _, lesson_id in pending}
+            user_ids = {user_id for user_id, _ in pending}
+            valid_lessons = set((await db.execute(
+                select(Lesson.id).where(Lesson.id.in_(lesson_ids))
+            )).scalars().all())
+            valid_users = set((await db.execute(
+                select(User.id).where(User.id.in_(user_ids))
+            )).scalars().all())
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "lesson_id": lesson_id,
+                    "watched_seconds": seconds,
+                    "completed": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for (user_id, lesson_id), seconds in pending.items()
+                if user_id in valid_users and lesson_id in valid_lessons
+            ]
+            try:
+                if rows:
+                    await db.execute(_upsert_statement(rows))
+                await db.commit()
+            except Exception:
+                # Werte zurücklegen, damit sie beim nächsten Flush mitgehen
+                for key, seconds in pending.items():
+                    self._pending[key] = max(self._pending.get(key, 0), seconds)
+                raise
+
+            self.rows_written += len(rows)
+            self.flushes += 1
+            return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "heartbeats_received": self.heartbeats_received,
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+        }
+
+
+progress_buffer = ProgressBuffer(settings.PROGRESS_BUFFER_MAX_ENTRIES)
+
+
+async def flush_progress_buffer() -> int:
+    """Puffer mit eigener Session flushen (Fehler werden geloggt)"""
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        try:
+            return await progress_buffer.flush(db)
+        except Exception as e:
+            await db.rollback()
+            print(f"[ProgressBuffer] Flush fehlgeschlagen: {e}")
+            return 0
+
+
+async def run_progress_flusher(stop_event: asyncio.Event) -> None:
+    """Hintergrund-Task: periodisch flushen, beim Stoppen ein letztes Mal"""
+    interval = settings.PROGRESS_FLUSH_INTERVAL_SECONDS
+    while not stop_event.is_set():
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        await flush_progress_buffer()
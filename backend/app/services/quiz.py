@@ -0,0 +1,52 @@
+# ===========================================
+# WARIZMY EDUCATION - Quiz-Bewertung
+# ===========================================
+# Bewertet Quiz-Antworten gegen die Fragen einer Lektion
+# (lessons.quiz_questions). Wird von der einzelnen Quiz-Abgabe und vom
+# Fortschritts-Batch (Offline-Sync) gemeinsam genutzt – Punktzahlen
+# kommen nie vom Client.
+#
+# - Antworten: {Frage-ID: Antwort}; Frage-ID ist "id" der Frage, sonst
+#   ihre Position (0, 1, ...)
+# - Antwort und correct_answer werden als Text verglichen (Index oder
+#   Antworttext, je nach Frage)
+
+from typing import Optional
+
+DEFAULT_PASSING_SCORE = 70
+
+
+def _question_key(question: dict, index: int) -> str:
+    return str(question.get("id", index))
+
+
+def _normalize(value) -> str:
+    return str(value).strip().casefold()
+
+
+def grade_quiz(questions: Optional[list], passing_score: Optional[int], answers: dict) -> dict:
+    """
+    Antworten bewerten.
+
+    Returns:
+        {"score": int, "passed": bool, "correct_answers": int,
+         "total_questions": int} (Felder wie QuizResult)
+    """
+    questions = questions or []
+    given = {str(key): value for key, value in (answers or {}).items()}
+
+    correct_answers = 0
+    for index, question in enumerate(questions):
+        answer = given.get(_question_key(question, index))
+        expected = question.get("correct_answer")
+        if answer is not None and expected is not None and _normalize(answer) == _normalize(expected):
+            correct_answers += 1
+
+    total_questions = len(questions)
+    score = int((correct_answers / total_questions) * 100) if total_questions else 0
+    return {
+        "score": score,
+        "passed": score >= (passing_score or DEFAULT_PASSING_SCORE),
+        "correct_answers": correct_answers,
+        "total_questions": total_questions,
+    }
@@ -0,0 +1,402 @@
+# ===========================================
+# WARIZMY EDUCATION - Stundenplan: Wiederkehrende Termine
+# ===========================================
+# Rechnet ClassSchedule-Einträge in konkrete Termine um und hält sie als
+# LiveSessions für die nächsten SCHEDULE_MATERIALIZE_WEEKS Wochen vor.
+#
+# Termine (expand_schedules):
+# - Arithmetisch: erster passender Wochentag ab Class.start_date, dann
+#   alle 7 * frequency Tage – kein Durchlaufen Tag für Tag
+# - Uhrzeiten sind Ortszeit (SCHEDULE_TIMEZONE) und werden wie bei manuell
+#   angelegten Sessions ohne Zeitzone gespeichert. Eine Uhrzeit, die es
+#   wegen der Sommerzeit-Umstellung nicht gibt (02:30 Ende März), wird auf
+#   die tatsächliche Uhrzeit verschoben (03:30)
+# - Ferien (Holiday) über einen sortierten Intervall-Index (bisect)
+# - Duplikate über ein Set auf (Klasse, Datum, Uhrzeit)
+# - Ergebnis: ein nach Zeit sortierter, lazy zusammengeführter Strom
+#   (heapq.merge), der beim Limit aufhört
+#
+# Materialisieren (run_schedule_materializer):
+# - Hintergrund-Task: beim Start, periodisch und nach Änderungen an
+#   Stundenplan oder Ferien (request_materialization)
+# - Fehlende Termine per mehrzeiligem INSERT ... ON CONFLICT DO NOTHING
+#   (uq_live_sessions_class_scheduled), mehrfaches Laufen ist harmlos
+# - Gibt es zu einem Termin schon eine manuelle Session, wird er nicht
+#   angelegt
+# - Erzeugte zukünftige Sessions, die nicht mehr passen (Stundenplan
+#   geändert, Ferien eingetragen, Klasse beendet), werden mit
+#   SCHEDULE_CHANGED_REASON abgesagt statt gelöscht (Bestätigungen bleiben);
+#   passen sie wieder, wird die Absage zurückgenommen
+# - Mehrere Worker: nur einer rechnet gleichzeitig (Advisory Lock)
+
+import asyncio
+import heapq
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import get_settings
+from app.models import Class, ClassSchedule, Holiday, LiveSession, LiveSessionType
+from app.services.http_cache import purge_cache_keys
+
+settings = get_settings()
+
+TZ = ZoneInfo(settings.SCHEDULE_TIMEZONE)
+
+# Schlüssel für pg_try_advisory_xact_lock (beliebig, aber fest)
+MATERIALIZE_LOCK_ID = 716_002
+
+INSERT_BATCH_SIZE = 1000
+
+# Absagegrund für Sessions, die der Stundenplan nicht mehr vorsieht
+SCHEDULE_CHANGED_REASON = "Stundenplan geändert"
+
+
+def local_now() -> datetime:
+    """Aktuelle Ortszeit ohne Zeitzone (wie scheduled_at gespeichert wird)"""
+    return datetime.now(TZ).replace(tzinfo=None)
+
+
+def wall_clock(day: date, at: time) -> datetime:
+    """Datum + Uhrzeit als gültige Ortszeit (Lücke der Zeitumstellung wird übersprungen)"""
+    local = datetime.combine(day, at, tzinfo=TZ)
+    return local.astimezone(timezone.utc).astimezone(TZ).replace(tzinfo=None)
+
+
+# =========================================
+# Ferien-Index
+# =========================================
+class HolidayIndex:
+    """Ferien als sortierte, zusammengeführte Datumsintervalle pro Klasse"""
+
+    def __init__(self, holidays: Iterable[Holiday] = ()):
+        ranges = defaultdict(list)
+        for holiday in holidays:
+            # None = gilt für alle Klassen
+            key = None if holiday.applies_to_all or holiday.class_id is None else holiday.class_id
+            ranges[key].append((holiday.start_date, holiday.end_date))
+        self._index = {key: self._merge(values) for key, values in ranges.items()}
+
+    @staticmethod
+    def _merge(ranges: List[Tuple[date, date]]) -> Tuple[List[date], List[date]]:
+        starts, ends = [], []
+        for start, end in sorted(ranges):
+            if ends and start <= ends[-1] + timedelta(days=1):
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return starts, ends
+
+    def _covers(self, key, day: date) -> bool:
+        entry = self._index.get(key)
+        if not entry:
+            return False
+        starts, ends = entry
+        i = bisect_right(starts, day) - 1
+        return i >= 0 and day <= ends[i]
+
+    def contains(self, class_id, day: date) -> bool:
+        """Fällt der Tag für diese Klasse in Ferien?"""
+        return self._covers(None, day) or self._covers(class_id, day)
+
+
+async def load_holiday_index(db: AsyncSession, start: date, end: date) -> HolidayIndex:
+    """Nur Ferien laden, die den Zeitraum berühren"""
+    result = await db.execute(
+        select(Holiday)
+        .where(Holiday.end_date >= start)
+        .where(Holiday.start_date <= end)
+    )
+    return HolidayIndex(result.scalars().all())
+
+
+# =========================================
+# Termine berechnen
+# =========================================
+class Occurrence(NamedTuple):
+    """Ein Termin eines Stundenplan-Eintrags"""
+    start: datetime
+    end: datetime
+    class_: Class
+    schedule: ClassSchedule
+
+    @property
+    def class_id(self) -> uuid.UUID:
+        return self.class_.id
+
+    @property
+    def key(self) -> Tuple[uuid.UUID, date, time]:
+        return (self.class_.id, self.start.date(), self.start.time())
+
+    @property
+    def duration_minutes(self) -> int:
+        return int((self.end - self.start).total_seconds() // 60)
+
+
+def expand_schedule(
+    class_: Class,
+    schedule: ClassSchedule,
+    start: datetime,
+    end: datetime,
+    holidays: HolidayIndex,
+) -> Iterator[Occurrence]:
+    """Termine eines Eintrags in [start, end], aufsteigend"""
+    period = 7 * max(schedule.frequency or 1, 1)
+    step = timedelta(days=period)
+
+    # Erster Termin: passender Wochentag ab Klassenstart (0 = Montag)
+    anchor = class_.start_date + timedelta(days=(schedule.day_of_week - class_.start_date.weekday()) % 7)
+    last_day = end.date() if class_.end_date is None else min(end.date(), class_.end_date)
+
+    # Direkt zum ersten Termin ab start springen (Aufrunden auf die Periode)
+    first_day = max(start.date(), anchor)
+    day = anchor + timedelta(days=-(-(first_day - anchor).days // period) * period)
+
+    while day <= last_day:
+        if not holidays.contains(class_.id, day):
+            begin = wall_clock(day, schedule.start_time)
+            if start <= begin <= end:
+                finish = wall_clock(day, schedule.end_time)
+                if finish <= begin:
+                    finish += timedelta(days=1)  # über Mitternacht
+                yield Occurrence(begin, finish, class_, schedule)
+        day += step
+
+
+def expand_schedules(
+    classes: Iterable[Class],
+    start: datetime,
+    end: datetime,
+    holidays: HolidayIndex,
+    limit: Optional[int] = None,
+    exclude: Iterable[Tuple[uuid.UUID, date, time]] = (),
+) -> Iterator[Occurrence]:
+    """
+    Alle Termine der Klassen (mit geladenen schedules) nach Zeit sortiert.
+
+    Lazy: es wird nur so weit gerechnet, wie gelesen wird (höchstens limit).
+    exclude: bereits vorhandene Termine als (Klasse, Datum, Uhrzeit).
+    """
+    streams = [
+        expand_schedule(class_, schedule, start, end, holidays)
+        for class_ in classes
+        for schedule in class_.schedules
+    ]
+    seen = set(exclude)
+
+    def unique() -> Iterator[Occurrence]:
+        for occurrence in heapq.merge(*streams, key=attrgetter("start")):
+            if occurrence.key in seen:
+                continue
+            seen.add(occurrence.key)
+            yield occurrence
+
+    return islice(unique(), limit)
+
+
+async def load_schedule_classes(db: AsyncSession, start: date, end: date) -> List[Class]:
+    """Aktive Klassen mit Stundenplan, die im Zeitraum laufen"""
+    result = await db.execute(
+        select(Class)
+        .options(selectinload(Class.schedules), selectinload(Class.course))
+        .where(Class.is_active == True)
+        .where(Class.start_date <= end)
+        .where((Class.end_date == None) | (Class.end_date >= start))
+    )
+    return [c for c in result.scalars().all() if c.schedules]
+
+
+# =========================================
+# Materialisieren
+# =========================================
+def _session_fields(occurrence: Occurrence) -> dict:
+    schedule = occurrence.schedule
+    return {
+        "session_type": LiveSessionType(schedule.session_type.value),
+        "location": schedule.location,
+        "duration_minutes": occurrence.duration_minutes,
+        "zoom_meeting_id": schedule.zoom_meeting_id,
+        "zoom_join_url": schedule.zoom_join_url,
+    }
+
+
+async def materialize_sessions(
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    weeks: Optional[int] = None,
+) -> dict:
+    """
+    LiveSessions für [now, now + weeks] mit dem Stundenplan abgleichen (kein Commit).
+
+    Returns:
+        {"created", "updated", "cancelled", "restored"}
+    """
+    now = now or local_now()
+    horizon = now + timedelta(weeks=weeks or settings.SCHEDULE_MATERIALIZE_WEEKS)
+
+    classes = await load_schedule_classes(db, now.date(), horizon.date())
+    holidays = await load_holiday_index(db, now.date(), horizon.date())
+    expected: Dict[Tuple[uuid.UUID, datetime], Occurrence] = {
+        (o.class_id, o.start): o
+        for o in expand_schedules(classes, now, horizon, holidays)
+    }
+
+    # Vorhandene Sessions im Zeitraum (ein Range-Scan auf scheduled_at)
+    result = await db.execute(
+        select(LiveSession)
+        .where(LiveSession.scheduled_at >= now)
+        .where(LiveSession.scheduled_at <= horizon)
+    )
+    existing = result.scalars().all()
+    # Manuelle Sessions belegen ihren Termin nur, solange sie stattfinden
+    manual = {
+        (s.class_id, s.scheduled_at)
+        for s in existing
+        if not s.is_generated and not s.is_cancelled
+    }
+
+    changes: List[dict] = []
+    stats = {"created": 0, "updated": 0, "cancelled": 0, "restored": 0}
+    materialized = set()
+    for session in existing:
+        # is_generated statt class_schedule_id: nach dem Löschen eines
+        # Eintrags (ON DELETE SET NULL) bleiben seine Sessions erkennbar
+        if not session.is_generated:
+            continue
+        key = (session.class_id, session.scheduled_at)
+        materialized.add(key)
+        occurrence = expected.get(key)
+
+        if occurrence is None or key in manual:
+            if not session.is_cancelled:
+                changes.append({"id": session.id, "is_cancelled": True, "cancel_reason": SCHEDULE_CHANGED_REASON})
+                stats["cancelled"] += 1
+            continue
+
+        change = {
+            field: value
+            for field, value in _session_fields(occurrence).items()
+            if getattr(session, field) != value
+        }
+        if session.class_schedule_id != occurrence.schedule.id:
+            change["class_schedule_id"] = occurrence.schedule.id
+        if session.is_cancelled and session.cancel_reason == SCHEDULE_CHANGED_REASON:
+            change.update(is_cancelled=False, cancel_reason=None)
+            stats["restored"] += 1
+        elif change:
+            stats["updated"] += 1
+        if change:
+            changes.append({"id": session.id, **change})
+
+    if changes:
+        # ORM-Bulk-UPDATE per Primärschlüssel
+        await db.execute(update(LiveSession), changes)
+
+    created_at = datetime.utcnow()
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "class_id": o.class_id,
+            "course_id": o.class_.course_id,
+            "class_schedule_id": o.schedule.id,
+            "is_generated": True,
+            "title": o.class_.name,
+            "description": o.class_.description,
+            "scheduled_at": o.start,
+            "is_cancelled": False,
+            "created_at": created_at,
+            **_session_fields(o),
+        }
+        for key, o in expected.items()
+        if key not in manual and key not in materialized
+    ]
+    # Ein Statement pro Block (Parameter-Limit von asyncpg)
+    for offset in range(0, len(values), INSERT_BATCH_SIZE):
+        result = await db.execute(
+            insert(LiveSession)
+            .values(values[offset:offset + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(
+                index_elements=[LiveSession.class_id, LiveSession.scheduled_at],
+                index_where=LiveSession.is_generated,
+            )
+            .returning(LiveSession.id)
+        )
+        stats["created"] += len(result.scalars().all())
+
+    return stats
+
+
+async def cancel_schedule_sessions(db: AsyncSession, schedule_id) -> None:
+    """Zukünftige Sessions eines Eintrags absagen, bevor er gelöscht wird (kein Commit)"""
+    await db.execute(
+        update(LiveSession)
+        .where(LiveSession.class_schedule_id == schedule_id)
+        .where(LiveSession.scheduled_at >= local_now())
+        .where(LiveSession.is_cancelled == False)
+        .values(is_cancelled=True, cancel_reason=SCHEDULE_CHANGED_REASON)
+    )
+
+
+# =========================================
+# Hintergrund-Task
+# =========================================
+_wakeup = asyncio.Event()
+
+
+def request_materialization() -> None:
+    """Nach Änderungen an Stundenplan/Ferien: sofort neu abgleichen (dieser Worker)"""
+    _wakeup.set()
+
+
+async def run_materialize_job() -> Optional[dict]:
+    """Abgleich mit eigener Session; übersprungen, wenn ein anderer Worker rechnet"""
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        try:
+            locked = (await db.execute(
+                select(func.pg_try_advisory_xact_lock(MATERIALIZE_LOCK_ID))
+            )).scalar()
+            if not locked:
+                await db.rollback()
+                return None
+            stats = await materialize_sessions(db)
+            await db.commit()
+            if any(stats.values()):
+                purge_cache_keys("sessions")
+                print(
+                    f"[Stundenplan] {stats['created']} Sessions angelegt, {stats['updated']} aktualisiert, "
+                    f"{stats['cancelled']} abgesagt, {stats['restored']} wiederhergestellt"
+                )
+            return stats
+        except Exception as e:
+            await db.rollback()
+            print(f"[Stundenplan] Materialisieren fehlgeschlagen: {e}")
+            return None
+
+
+async def run_schedule_materializer(stop_event: asyncio.Event) -> None:
+    """Hintergrund-Task: sofort, periodisch und auf request_materialization()"""
+    interval = settings.SCHEDULE_MATERIALIZE_INTERVAL_SECONDS
+    while not stop_event.is_set():
+        _wakeup.clear()
+        await run_materialize_job()
+
+        waiters = [
+            asyncio.create_task(stop_event.wait()),
+            asyncio.create_task(_wakeup.wait()),
+        ]
+        await asyncio.wait(waiters, timeout=interval, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
@@ -0,0 +1,153 @@
+# ===========================================
+# WARIZMY EDUCATION - Suche (Volltext + Trigramme)
+# ===========================================
+# Kurse und Lektionen haben eine generierte tsvector-Spalte mit GIN-Index
+# (Migration 0006). Beide Sprachen stecken im selben Vektor:
+#
+# - Deutsch: 'german' (Stemming, Stoppwörter)
+# - Arabisch: 'arabic' auf normalisiertem Text – ohne Tashkeel/Tatweel,
+#   أ إ آ ٱ -> ا; "كِتَاب" findet also auch "كتاب" und umgekehrt
+# - HTML-Tags in Beschreibung/Text werden vorher entfernt
+#
+# Die Normalisierung passiert in SQL (warizmy_normalize_arabic), damit
+# Index und Suchbegriff garantiert gleich behandelt werden.
+#
+# Benutzer (Admin) werden über pg_trgm-Indizes gesucht: ILIKE '%x%'
+# nutzt sie direkt, die Schnellsuche zusätzlich Wort-Ähnlichkeit (<%)
+# für Tippfehler.
+
+from sqlalchemy import select, func, literal, literal_column, or_, union_all
+
+from app.models import Course, Lesson, User
+
+# Lektionstreffer zählen weniger als Treffer im Kurs selbst
+LESSON_RANK_WEIGHT = 0.5
+
+# ts_headline: Ausschnitte mit <mark> um die Treffer
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, "
+    'MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=" … "'
+)
+HEADLINE_CONFIG = literal_column("'german'::regconfig")
+
+
+def search_query(term: str):
+    """Suchbegriff (websearch-Syntax: "Phrase", -ausschließen, or) als tsquery"""
+    return func.warizmy_search_query(term)
+
+
+def matches(vector, query):
+    return vector.op("@@")(query)
+
+
+def plain_text(column):
+    """HTML-Tags entfernen (für Ausschnitte)"""
+    return func.regexp_replace(func.coalesce(column, ""), "<[^>]+>", " ", "g")
+
+
+def headline(column, query):
+    """Hervorgehobener Ausschnitt (nur für die ausgelieferte Seite berechnen)"""
+    return func.ts_headline(HEADLINE_CONFIG, plain_text(column), query, HEADLINE_OPTIONS)
+
+
+# =========================================
+# Kurse
+# =========================================
+def course_ranks(query):
+    """
+    Kurs-IDs mit Relevanz: Treffer im Kurs oder in einer veröffentlichten
+    Lektion (beide über den GIN-Index), bester Treffer zählt.
+    """
+    hits = union_all(
+        select(
+            Course.id.label("course_id"),
+            func.ts_rank_cd(Course.search_vector, query).label("rank"),
+        ).where(matches(Course.search_vector, query)),
+        select(
+            Lesson.course_id.label("course_id"),
+            (func.ts_rank_cd(Lesson.search_vector, query) * LESSON_RANK_WEIGHT).label("rank"),
+        )
+        .where(Lesson.is_published == True)
+        .where(matches(Lesson.search_vector, query)),
+    ).subquery()
+    return (
+        select(hits.c.course_id, func.max(hits.c.rank).label("rank"))
+        .group_by(hits.c.course_id)
+        .subquery("course_ranks")
+    )
+
+
+def course_headline(query):
+    """Ausschnitt aus Kurzbeschreibung, sonst Beschreibung"""
+    return headline(func.coalesce(Course.short_description, Course.description), query)
+
+
+# =========================================
+# Lektionen
+# =========================================
+def lesson_search(query, limit: int):
+    """Veröffentlichte Lektionen aktiver Kurse, nach Relevanz"""
+    rank = func.ts_rank_cd(Lesson.search_vector, query)
+    hits = (
+        select(Lesson.id, rank.label("rank"))
+        .join(Course, Course.id == Lesson.course_id)
+        .where(Lesson.is_published == True)
+        .where(Course.is_published == True)
+        .where(Course.is_active == True)
+        .where(matches(Lesson.search_vector, query))
+        .order_by(rank.desc())
+        .limit(limit)
+        .subquery()
+    )
+    # Ausschnitte nur für die Treffer der Seite
+    return (
+        select(
+            Lesson.id,
+            Lesson.title,
+            Lesson.slug,
+            Lesson.section_title,
+            Lesson.is_free_preview,
+            Course.title.label("course_title"),
+            Course.slug.label("course_slug"),
+            hits.c.rank,
+            headline(Lesson.title, query).label("title_headline"),
+            headline(func.concat_ws(" ", Lesson.description, Lesson.text_content), query).label("headline"),
+        )
+        .join(hits, hits.c.id == Lesson.id)
+        .join(Course, Course.id == Lesson.course_id)
+        .order_by(hits.c.rank.desc())
+    )
+
+
+# =========================================
+# Benutzer (Admin-Schnellsuche)
+# =========================================
+def user_typeahead(term: str, limit: int):
+    """
+    Benutzer nach Name/E-Mail, tolerant gegenüber Tippfehlern.
+
+    term <% spalte (Wort-Ähnlichkeit ≥ pg_trgm.word_similarity_threshold,
+    Standard 0.6) und ILIKE nutzen beide die Trigramm-Indizes.
+    """
+    term = term.strip()
+    pattern = f"%{term}%"
+    word = literal(term)
+    # Trigramme sind unabhängig von Groß-/Kleinschreibung
+    similarity = func.greatest(
+        func.word_similarity(word, User.email),
+        func.word_similarity(word, User.first_name),
+        func.word_similarity(word, User.last_name),
+    )
+    return (
+        select(User, similarity.label("similarity"))
+        .where(or_(
+            User.email.ilike(pattern),
+            User.first_name.ilike(pattern),
+            User.last_name.ilike(pattern),
+            word.op("<%")(User.email),
+            word.op("<%")(User.first_name),
+            word.op("<%")(User.last_name),
+        ))
+        .order_by(similarity.desc(), User.last_name, User.first_name)
+        .limit(limit)
+    )
@@ -0,0 +1,319 @@
+# ===========================================
+# WARIZMY EDUCATION - Benutzer-Import (CSV)
+# ===========================================
+# Legt viele Studenten auf einmal an, z.B. einen neuen Jahrgang.
+#
+# - Spalten: email, first_name, last_name, optional password, phone, role
+#   (oder die deutschen Überschriften des Benutzer-Exports)
+# - Trennzeichen , oder ; (wird erkannt), UTF-8 mit oder ohne BOM
+# - prepare_import validiert und hasht VOR der ersten Datenbank-Abfrage
+#   (bcrypt dauert, die Transaktion soll nur kurz offen sein); ohne
+#   password-Spalte wird ein Startpasswort erzeugt und im Bericht
+#   zurückgegeben
+# - Bereits vorhandene E-Mails: EINE Abfrage für alle Zeilen
+# - Einfügen per mehrzeiligem INSERT ... ON CONFLICT (email) DO NOTHING,
+#   optional Einschreibung in eine Klasse in derselben Transaktion
+#   (über enroll_in_class, max_students wird eingehalten)
+# - Ergebnis: ein Bericht pro CSV-Zeile
+
+import csv
+import io
+import secrets
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, EmailStr, ValidationError, field_validator
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.security import hash_passwords_bulk
+from app.models import User, UserRole
+from app.services.class_enrollment import enroll_in_class
+
+settings = get_settings()
+
+INSERT_BATCH_SIZE = 1000
+
+# CSV-Überschrift (klein geschrieben) -> Feld
+COLUMN_ALIASES = {
+    "email": "email",
+    "e-mail": "email",
+    "first_name": "first_name",
+    "vorname": "first_name",
+    "last_name": "last_name",
+    "nachname": "last_name",
+    "password": "password",
+    "passwort": "password",
+    "phone": "phone",
+    "telefon": "phone",
+    "role": "role",
+    "rolle": "role",
+}
+
+CLASS_FULL_DETAIL = "Klasse ist voll, nicht eingeschrieben"
+
+# Per Import anlegbare Rollen (Admins nur einzeln)
+IMPORT_ROLES = {UserRole.STUDENT.value, UserRole.TEACHER.value}
+
+
+class ImportRow(BaseModel):
+    """Eine CSV-Zeile nach Validierung"""
+    email: EmailStr
+    first_name: str
+    last_name: str
+    password: Optional[str] = None
+    phone: Optional[str] = None
+    role: str = UserRole.STUDENT.value
+
+    @field_validator("first_name", "last_name")
+    @classmethod
+    def not_blank(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("darf nicht leer sein")
+        return value
+
+    @field_validator("password", "phone", mode="before")
+    @classmethod
+    def empty_to_none(cls, value):
+        return value.strip() or None if isinstance(value, str) else value
+
+    @field_validator("password")
+    @classmethod
+    def min_length(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and len(value) < 8:
+            raise ValueError("mindestens 8 Zeichen")
+        return value
+
+    @field_validator("role", mode="before")
+    @classmethod
+    def import_role(cls, value) -> str:
+        value = (value or UserRole.STUDENT.value).strip().lower()
+        if value not in IMPORT_ROLES:
+            raise ValueError("nur student oder teacher")
+        return value
+
+
+# =========================================
+# CSV lesen
+# =========================================
+def parse_user_csv(content: bytes) -> List[Tuple[int, dict]]:
+    """
+    CSV in (Zeilennummer, Felder) zerlegen.
+
+    Raises:
+        ValueError: Nicht lesbar oder Pflichtspalten fehlen
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("Datei ist nicht UTF-8 kodiert")
+
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(io.StringIO(text), dialect)
+    header = next(reader, None)
+    if not header:
+        raise ValueError("Datei ist leer")
+
+    fields = [COLUMN_ALIASES.get(name.strip().lower()) for name in header]
+    missing = {"email", "first_name", "last_name"} - set(fields)
+    if missing:
+        raise ValueError(f"Pflichtspalten fehlen: {', '.join(sorted(missing))}")
+
+    rows = []
+    # Zeile 1 ist die Überschrift
+    for line_number, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        rows.append((line_number, {
+            field: value.strip()
+            for field, value in zip(fields, values)
+            if field
+        }))
+    return rows
+
+
+def _error_text(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+# =========================================
+# Import
+# =========================================
+class PreparedImport:
+    """Validierte Zeilen mit fertigen Passwort-Hashes (ohne Datenbank)"""
+
+    def __init__(self, report: List[dict], valid: List[Tuple[dict, ImportRow, str]]):
+        self.report = report
+        self.valid = valid
+
+
+async def prepare_import(rows: List[Tuple[int, dict]]) -> PreparedImport:
+    """
+    Zeilen validieren, Duplikate der Datei markieren und Passwörter hashen.
+
+    Läuft vor der ersten Datenbank-Abfrage, damit die Transaktion des
+    Imports nicht für die Dauer des Hashings offen bleibt. Hashes von
+    Zeilen, deren E-Mail schon existiert, werden später verworfen.
+    """
+    report: List[dict] = []
+    valid: List[Tuple[dict, ImportRow]] = []
+    seen: Dict[str, int] = {}
+
+    # === Validieren + Duplikate in der Datei ===
+    for line_number, fields in rows:
+        entry = {
+            "row": line_number,
+            "email": fields.get("email", ""),
+            "status": None,
+            "detail": None,
+            "user_id": None,
+            "password": None,
+            "enrolled": False,
+        }
+        report.append(entry)
+        try:
+            row = ImportRow(**fields)
+        except ValidationError as e:
+            entry["status"] = "invalid"
+            entry["detail"] = _error_text(e)
+            continue
+
+        email = row.email.lower()
+        entry["email"] = email
+        if email in seen:
+            entry["status"] = "duplicate"
+            entry["detail"] = f"Bereits in Zeile {seen[email]}"
+            continue
+        seen[email] = line_number
+        valid.append((entry, row))
+
+    # === Passwörter hashen (begrenzte Threads im Login-Pool) ===
+    passwords = []
+    for entry, row in valid:
+        if row.password is None:
+            entry["password"] = secrets.token_urlsafe(9)
+        passwords.append(row.password or entry["password"])
+    hashes = await hash_passwords_bulk(passwords) if passwords else []
+
+    return PreparedImport(
+        report,
+        [(entry, row, password_hash) for (entry, row), password_hash in zip(valid, hashes)],
+    )
+
+
+async def import_users(
+    db: AsyncSession,
+    prepared: PreparedImport,
+    class_id: Optional[uuid.UUID] = None,
+    enrollment_type: str = "one_time",
+) -> dict:
+    """
+    Vorbereitete Benutzer anlegen und optional in eine Klasse einschreiben.
+
+    Schreibt nur in die Session (kein Commit), der Aufrufer committet
+    alles gemeinsam.
+
+    Returns:
+        {"rows": [...Bericht pro Zeile...], "summary": {...}}
+    """
+    report = prepared.report
+
+    # === Vorhandene Benutzer (eine Abfrage) ===
+    existing: Dict[str, uuid.UUID] = {}
+    if prepared.valid:
+        result = await db.execute(
+            select(User.email, User.id).where(
+                User.email.in_([e["email"] for e, _, _ in prepared.valid])
+            )
+        )
+        existing = {email: user_id for email, user_id in result.all()}
+
+    new_rows = []
+    for entry, row, password_hash in prepared.valid:
+        if entry["email"] in existing:
+            entry["status"] = "exists"
+            entry["user_id"] = existing[entry["email"]]
+            entry["password"] = None
+        else:
+            new_rows.append((entry, row, password_hash))
+
+    # === Mehrzeiliges INSERT ... ON CONFLICT DO NOTHING ===
+    now = datetime.utcnow()
+    values = []
+    for entry, row, password_hash in new_rows:
+        values.append({
+            "id": uuid.uuid4(),
+            "email": entry["email"],
+            "password_hash": password_hash,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "phone": row.phone,
+            "role": UserRole(row.role),
+            "is_active": True,
+            "email_verified": True,  # Admin importiert → automatisch verifiziert
+            "newsletter_opt_in": False,
+            "whatsapp_opt_in": False,
+            "whatsapp_channel_opt_in": False,
+            "onboarding_completed": False,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    created: Dict[str, uuid.UUID] = {}
+    for offset in range(0, len(values), INSERT_BATCH_SIZE):
+        result = await db.execute(
+            insert(User)
+            .values(values[offset:offset + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email, User.id)
+        )
+        created.update({email: user_id for email, user_id in result.all()})
+
+    for entry, _, _ in new_rows:
+        if entry["email"] in created:
+            entry["status"] = "created"
+            entry["user_id"] = created[entry["email"]]
+        else:
+            # Zwischenzeitlich von anderer Stelle angelegt
+            entry["status"] = "exists"
+            entry["password"] = None
+            entry["detail"] = "Gleichzeitig angelegt"
+
+    # === Optional: alle in die Klasse einschreiben (max_students gilt) ===
+    if class_id is not None:
+        enrollment = await enroll_in_class(
+            db,
+            class_id,
+            [e["user_id"] for e in report if e["user_id"] is not None],
+            enrollment_type,
+        )
+        enrolled = set(enrollment["enrolled"])
+        full = set(enrollment["class_full"])
+        for entry in report:
+            user_id = str(entry["user_id"]) if entry["user_id"] is not None else None
+            entry["enrolled"] = user_id in enrolled
+            if user_id in full:
+                entry["detail"] = CLASS_FULL_DETAIL
+
+    for entry in report:
+        if entry["user_id"] is not None:
+            entry["user_id"] = str(entry["user_id"])
+
+    summary = {"total": len(report)}
+    for status in ("created", "exists", "duplicate", "invalid"):
+        summary[status] = sum(1 for e in report if e["status"] == status)
+    summary["enrolled"] = sum(1 for e in report if e["enrolled"])
+    summary["class_full"] = sum(1 for e in report if e["detail"] == CLASS_FULL_DETAIL)
+
+    return {"summary": summary, "rows": report}
@@ -0,0 +1,150 @@
+# ===========================================
+# WARIZMY EDUCATION - Testdaten
+# ===========================================
+# Realistischer Datensatz für die Tests gegen Postgres: Studenten mit
+# Klassen (Legacy-Kurs + class_courses), direkten Einschreibungen,
+# Lektionen, Fortschritt und kommenden Sessions.
+#
+# Alle E-Mails/Slugs beginnen mit "test-", cleanup() löscht wieder alles.
+
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, insert
+
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from app.models import (
+    User,
+    UserRole,
+    Course,
+    CourseCategory,
+    Lesson,
+    Class,
+    ClassEnrollment,
+    Enrollment,
+    EnrollmentType,
+    LessonProgress,
+    LiveSession,
+)
+from app.models.class_.class_model import class_courses
+from app.services.progress import refresh_course_progress
+
+# Datenmengen (wenige vs. viele Kurse)
+SMALL = {"classes": 1, "courses_per_class": 1, "direct": 1}
+LARGE = {"classes": 6, "courses_per_class": 3, "direct": 6}
+LESSONS_PER_COURSE = 6
+
+
+async def seed_student(db, tag: str, size: dict) -> dict:
+    """Student mit Klassen, Kursen, Lektionen, Fortschritt und Sessions"""
+    now = datetime.utcnow()
+    student = User(
+        email=f"test-{tag}-{uuid.uuid4().hex[:8]}@example.com",
+        password_hash="!",
+        first_name="Test",
+        last_name=tag,
+        role=UserRole.STUDENT,
+    )
+    db.add(student)
+
+    courses = []
+
+    def new_course(index: int) -> Course:
+        suffix = uuid.uuid4().hex[:8]
+        course = Course(
+            title=f"Test {tag} {index}",
+            slug=f"test-{tag}-{index}-{suffix}",
+            category=CourseCategory.ARABIC,
+            is_published=True,
+            is_featured=True,
+        )
+        db.add(course)
+        courses.append(course)
+        return course
+
+    classes = []
+    for c in range(size["classes"]):
+        class_courses_list = [new_course(c * 10 + i) for i in range(size["courses_per_class"])]
+        klass = Class(
+            name=f"Test {tag} Klasse {c}",
+            course=class_courses_list[0],
+            start_date=date.today(),
+        )
+        db.add(klass)
+        classes.append((klass, class_courses_list))
+
+    direct_courses = [new_course(100 + i) for i in range(size["direct"])]
+    await db.flush()
+
+    for klass, class_courses_list in classes:
+        await db.execute(insert(class_courses), [
+            {"class_id": klass.id, "course_id": course.id} for course in class_courses_list
+        ])
+        db.add(ClassEnrollment(user_id=student.id, class_id=klass.id, enrollment_type="one_time"))
+        for day in range(1, 4):
+            db.add(LiveSession(
+                class_id=klass.id,
+                title=f"Session {day}",
+                scheduled_at=now + timedelta(days=day),
+            ))
+
+    for course in direct_courses:
+        db.add(Enrollment(
+            user_id=student.id,
+            course_id=course.id,
+            enrollment_type=EnrollmentType.ONE_TIME,
+        ))
+
+    for course in courses:
+        for i in range(LESSONS_PER_COURSE):
+            lesson = Lesson(
+                course_id=course.id,
+                title=f"Lektion {i}",
+                slug=f"lektion-{i}",
+                order=i,
+                is_published=True,
+            )
+            db.add(lesson)
+            if i < LESSONS_PER_COURSE // 2:
+                db.add(LessonProgress(user_id=student.id, lesson=lesson, completed=True, completed_at=now))
+
+    await db.flush()
+    await refresh_course_progress(db, [student.id], [c.id for c in courses])
+    await db.commit()
+
+    return {
+        "user_id": student.id,
+        "token": create_access_token({"sub": str(student.id)}),
+        "slug": courses[-1].slug,
+        "course_ids": [c.id for c in courses],
+        "class_ids": [k.id for k, _ in classes],
+    }
+
+
+async def seed_admin(db) -> dict:
+    admin = User(
+        email=f"test-admin-{uuid.uuid4().hex[:8]}@example.com",
+        password_hash="!",
+        first_name="Test",
+        last_name="Admin",
+        role=UserRole.ADMIN,
+    )
+    db.add(admin)
+    await db.commit()
+    return {
+        "user_id": admin.id,
+        "token": create_access_token({"sub": str(admin.id)}),
+        "course_ids": [],
+        "class_ids": [],
+    }
+
+
+async def cleanup(datasets) -> None:
+    async with AsyncSessionLocal() as db:
+        for data in datasets:
+            await db.execute(delete(LiveSession).where(LiveSession.class_id.in_(data["class_ids"])))
+            await db.execute(delete(Class).where(Class.id.in_(data["class_ids"])))
+            await db.execute(delete(Course).where(Course.id.in_(data["course_ids"])))
+            await db.execute(delete(User).where(User.id == data["user_id"]))
+        await db.commit()
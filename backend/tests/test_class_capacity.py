@@ -0,0 +1,149 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Klassen-Kapazität unter Last
+# ===========================================
+# Legt eine fast volle Klasse an (max_students = CAPACITY, bereits
+# CAPACITY - FREE_SEATS aktive Studenten) und feuert viele gleichzeitige
+# Einschreibungen darauf ab – einzeln und als Sammel-Einschreibung, jede
+# in ihrer eigenen Session/Transaktion wie parallele Requests.
+#
+# Geprüft wird (in mehreren Runden):
+#   - Es sind danach genau CAPACITY aktive Studenten in der Klasse
+#   - Die Summe der gemeldeten Einschreibungen == FREE_SEATS
+
+import asyncio
+import uuid
+from datetime import date
+
+import pytest_asyncio
+from sqlalchemy import delete, func, select
+
+from app.db.session import AsyncSessionLocal
+from app.models import (
+    User,
+    UserRole,
+    Course,
+    CourseCategory,
+    Class,
+    ClassEnrollment,
+    ClassEnrollmentStatus,
+)
+from app.services.class_enrollment import enroll_in_class
+
+CAPACITY = 20
+FREE_SEATS = 3
+SINGLE_REQUESTS = 30
+BULK_REQUESTS = 5
+BULK_SIZE = 4
+ROUNDS = 5
+
+
+@pytest_asyncio.fixture(scope="session")
+async def almost_full_class(database):
+    """Klasse mit CAPACITY - FREE_SEATS Studenten + Bewerber"""
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        course = Course(
+            title=f"Test Kapazität {tag}",
+            slug=f"test-capacity-{tag}",
+            category=CourseCategory.ARABIC,
+        )
+        db.add(course)
+        await db.flush()
+
+        klass = Class(
+            course_id=course.id,
+            name=f"Test Kapazität {tag}",
+            start_date=date.today(),
+            max_students=CAPACITY,
+        )
+        db.add(klass)
+
+        applicants = SINGLE_REQUESTS + BULK_REQUESTS * BULK_SIZE
+        users = [
+            User(
+                email=f"test-capacity-{tag}-{i}@example.com",
+                password_hash="!",
+                first_name="Test",
+                last_name=str(i),
+                role=UserRole.STUDENT,
+            )
+            for i in range(CAPACITY - FREE_SEATS + applicants)
+        ]
+        db.add_all(users)
+        await db.flush()
+
+        members = users[:CAPACITY - FREE_SEATS]
+        db.add_all([
+            ClassEnrollment(user_id=u.id, class_id=klass.id, enrollment_type="one_time")
+            for u in members
+        ])
+        await db.commit()
+
+        data = {
+            "course_id": course.id,
+            "class_id": klass.id,
+            "applicants": [u.id for u in users[CAPACITY - FREE_SEATS:]],
+        }
+
+    yield data
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Class).where(Class.id == data["class_id"]))
+        await db.execute(delete(Course).where(Course.id == data["course_id"]))
+        await db.execute(delete(User).where(User.email.like(f"test-capacity-{tag}-%")))
+        await db.commit()
+
+
+async def enroll(class_id, user_ids, start: asyncio.Event) -> int:
+    """Eine Einschreibung in eigener Transaktion (wie ein Request)"""
+    await start.wait()
+    async with AsyncSessionLocal() as db:
+        result = await enroll_in_class(db, class_id, user_ids)
+        await db.commit()
+        return len(result["enrolled"])
+
+
+async def reset(data: dict) -> None:
+    """Bewerber wieder austragen, Klasse ist wieder fast voll"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(ClassEnrollment)
+            .where(ClassEnrollment.class_id == data["class_id"])
+            .where(ClassEnrollment.user_id.in_(data["applicants"]))
+        )
+        await db.commit()
+
+
+async def active_students(class_id) -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.count())
+            .select_from(ClassEnrollment)
+            .where(ClassEnrollment.class_id == class_id)
+            .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE)
+        )).scalar()
+
+
+async def test_concurrent_enrollments_never_overfill_class(almost_full_class):
+    data = almost_full_class
+    applicants = data["applicants"]
+    singles = [[user_id] for user_id in applicants[:SINGLE_REQUESTS]]
+    rest = applicants[SINGLE_REQUESTS:]
+    bulks = [rest[i:i + BULK_SIZE] for i in range(0, len(rest), BULK_SIZE)]
+
+    for round_number in range(1, ROUNDS + 1):
+        start = asyncio.Event()
+        tasks = [
+            asyncio.create_task(enroll(data["class_id"], ids, start))
+            for ids in singles + bulks
+        ]
+        await asyncio.sleep(0.1)
+        start.set()
+        reported = sum(await asyncio.gather(*tasks))
+        active = await active_students(data["class_id"])
+        await reset(data)
+
+        assert (active, reported) == (CAPACITY, FREE_SEATS), (
+            f"Runde {round_number}: {len(tasks)} parallele Einschreibungen, "
+            f"{reported} angenommen, {active}/{CAPACITY} aktiv"
+        )
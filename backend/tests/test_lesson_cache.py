@@ -0,0 +1,60 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Lektions-Cache (Slug-Index)
+# ===========================================
+# Nach dem ersten Aufruf findet der Slug-Index die Lektion per
+# Primärschlüssel (eine Abfrage ohne Slug-Suche). Ein veralteter Eintrag
+# (Lektion umbenannt) fällt auf die Slug-Suche zurück.
+
+from sqlalchemy import update
+
+from app.db.instrumentation import start_request_stats, stop_request_stats
+from app.db.session import AsyncSessionLocal
+from app.models import Lesson
+from app.services.lesson_cache import LessonReadCache
+
+
+async def find(cache, course_slug, lesson_slug):
+    stats, token = start_request_stats()
+    try:
+        async with AsyncSessionLocal() as db:
+            row = await cache.find(db, course_slug, lesson_slug)
+    finally:
+        stop_request_stats(token)
+    return row, stats
+
+
+async def test_slug_index_hit_looks_up_by_id(seeded):
+    course_slug = seeded["small"]["slug"]
+    cache = LessonReadCache(max_slugs=10, max_entries=10)
+
+    first, _ = await find(cache, course_slug, "lektion-1")
+    second, stats = await find(cache, course_slug, "lektion-1")
+
+    assert second.lesson_id == first.lesson_id
+    assert second.next_lesson_slug == "lektion-2"
+    assert stats.query_count == 1
+    (shape,) = stats.shapes
+    assert "courses.slug = ?" not in shape and "lessons.id = ?" in shape
+
+
+async def test_stale_slug_index_falls_back_to_slug_lookup(seeded):
+    course_slug = seeded["small"]["slug"]
+    cache = LessonReadCache(max_slugs=10, max_entries=10)
+    row, _ = await find(cache, course_slug, "lektion-2")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Lesson).where(Lesson.id == row.lesson_id).values(slug="lektion-2-neu"))
+        await db.commit()
+    try:
+        stale, stats = await find(cache, course_slug, "lektion-2")
+        renamed, _ = await find(cache, course_slug, "lektion-2-neu")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Lesson).where(Lesson.id == row.lesson_id).values(slug="lektion-2"))
+            await db.commit()
+
+    # Kurs gefunden, Lektion unter altem Slug nicht mehr
+    assert stale is not None and stale.lesson_id is None
+    assert stats.query_count == 2
+    assert cache.stale_slugs == 1
+    assert renamed.lesson_id == row.lesson_id
@@ -0,0 +1,96 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Query-Budgets
+# ===========================================
+# Zählt die SQL-Statements pro Request (Engine-Events, siehe
+# app/db/instrumentation.py) für zwei Studenten mit wenigen bzw. vielen
+# Kursen. Geprüft wird:
+#   - Anzahl <= @query_budget(n) am Router-Handler
+#   - Anzahl ist unabhängig von der Datenmenge (klein == groß)
+#   - jedes deklarierte Budget hat ein Szenario
+# Bei Verstößen stehen die Statement-Formen in der Fehlermeldung.
+
+import pytest
+
+from app.main import app
+from app.db.instrumentation import query_metrics
+
+# Geprüfte Requests: (Methode, Route, Query-String, Login als)
+# {slug}/{course_slug} wird durch einen Kurs des jeweiligen Datensatzes ersetzt
+SCENARIOS = [
+    ("GET", "/api/users/me", "", "student"),
+    ("GET", "/api/users/me/enrollments", "", "student"),
+    ("GET", "/api/users/me/dashboard", "", "student"),
+    ("GET", "/api/courses", "", None),
+    ("GET", "/api/courses/featured", "", None),
+    ("GET", "/api/courses/search/lessons", "?q=Lektion", None),
+    ("GET", "/api/courses/{slug}", "", None),
+    ("GET", "/api/courses/{course_slug}/lessons/{lesson_slug}", "", None),
+    ("GET", "/api/admin/users", "", "admin"),
+    ("GET", "/api/admin/users/typeahead", "?q=Test", "admin"),
+]
+
+
+def endpoint_budgets() -> dict:
+    """{'GET /api/users/me': budget} aus den @query_budget Dekoratoren"""
+    budgets = {}
+    for route in app.routes:
+        budget = getattr(getattr(route, "endpoint", None), "__query_budget__", None)
+        if budget is None:
+            continue
+        for method in getattr(route, "methods", ()):
+            budgets[f"{method} {route.path}"] = budget
+    return budgets
+
+
+async def measure(client, method: str, path: str, token=None):
+    """Request zweimal ausführen (Caches warm), Statements des zweiten zählen"""
+    captured = {}
+
+    def listener(route, stats):
+        captured["stats"] = stats
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    query_metrics.listeners.append(listener)
+    try:
+        await client.request(method, path, headers=headers)
+        captured.clear()
+        response = await client.request(method, path, headers=headers)
+    finally:
+        query_metrics.listeners.remove(listener)
+
+    stats = captured.get("stats")
+    return response.status_code, (stats.query_count if stats else 0), (stats.shapes if stats else {})
+
+
+def format_shapes(shapes) -> str:
+    return "\n".join(
+        f"  {count}x {shape[:240]}"
+        for shape, count in sorted(shapes.items(), key=lambda item: -item[1])
+    )
+
+
+@pytest.mark.parametrize("method,route,query,login", SCENARIOS, ids=[f"{m} {r}" for m, r, _, _ in SCENARIOS])
+async def test_query_budget(client, seeded, method, route, query, login):
+    budget = endpoint_budgets().get(f"{method} {route}")
+    assert budget is not None, f"{method} {route}: kein @query_budget"
+
+    results = []
+    for tag in ("small", "large"):
+        data = seeded[tag]
+        path = route.format(slug=data["slug"], course_slug=data["slug"], lesson_slug="lektion-0") + query
+        token = seeded[tag if login == "student" else login]["token"] if login else None
+        results.append(await measure(client, method, path, token))
+
+    (status_s, count_s, _), (status_l, count_l, shapes_l) = results
+    assert status_s < 400 and status_l < 400, f"HTTP {status_s}/{status_l}"
+    assert max(count_s, count_l) <= budget, (
+        f"Budget {budget} überschritten: klein={count_s} groß={count_l}\n{format_shapes(shapes_l)}"
+    )
+    assert count_s == count_l, (
+        f"wächst mit der Datenmenge: klein={count_s} groß={count_l}\n{format_shapes(shapes_l)}"
+    )
+
+
+def test_every_budget_has_scenario():
+    covered = {f"{m} {r}" for m, r, _, _ in SCENARIOS}
+    assert sorted(set(endpoint_budgets()) - covered) == []
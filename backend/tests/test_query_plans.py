@@ -0,0 +1,213 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Query-Pläne (EXPLAIN)
+# ===========================================
+# Führt EXPLAIN für die Abfragen der wichtigsten Endpoints aus und
+# schlägt fehl, wenn eine große Tabelle sequenziell gelesen wird.
+#
+# Damit das auch auf kleinen Test-Datenbanken aussagekräftig ist, läuft
+# EXPLAIN mit enable_seqscan = off: ein Seq Scan bleibt dann nur übrig,
+# wenn KEIN passender Index existiert.
+#
+# Ebenso ein Fehler: ein Index-Scan, dessen Bedingung die erste Spalte
+# des Index nicht enthält (z.B. class_id über uq_user_class(user_id,
+# class_id)) – das ist ein kompletter Durchlauf des Index.
+
+import json
+import re
+from datetime import datetime
+
+import pytest_asyncio
+from sqlalchemy import select, func, text
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models import (
+    Attendance,
+    AttendanceConfirmation,
+    ClassEnrollment,
+    ClassEnrollmentStatus,
+    CourseProgress,
+    Enrollment,
+    EnrollmentStatus,
+    Lesson,
+    LessonProgress,
+    LiveSession,
+    Payment,
+    PaymentStatus,
+)
+from app.services.auth_context import accessible_course_ids_query
+from app.services.lesson_cache import lesson_version_by_id_query
+from app.services.search import search_query, course_ranks, lesson_search, user_typeahead
+from tests.seed import LARGE, seed_student, cleanup
+
+# Tabellen, die in Produktion groß werden (Seq Scan = Fehler)
+LARGE_TABLES = {
+    "lesson_progress",
+    "course_progress",
+    "attendance",
+    "attendance_confirmations",
+    "live_sessions",
+    "class_enrollments",
+    "enrollments",
+    "payments",
+    "lessons",
+    "users",
+}
+
+
+def endpoint_queries(data: dict) -> list:
+    """(Name, Statement) der Hot-Path-Abfragen mit echten IDs"""
+    user_id = data["user_id"]
+    class_id = data["class_ids"][0]
+    now = datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    accessible = accessible_course_ids_query(user_id)
+
+    return [
+        ("Zugriffsprüfung (Kurse eines Users)",
+         select(accessible.c.course_id)),
+        ("Kurs-Fortschritt",
+         select(CourseProgress)
+         .where(CourseProgress.user_id == user_id)
+         .where(CourseProgress.course_id.in_(data["course_ids"]))),
+        ("Lektions-Fortschritt",
+         select(LessonProgress)
+         .where(LessonProgress.user_id == user_id)
+         .where(LessonProgress.lesson_id.in_(data["lesson_ids"]))),
+        ("Lektion per ID (Slug-Index-Treffer)",
+         lesson_version_by_id_query(data["lesson_ids"][0])),
+        ("Lektionen eines Kurses",
+         select(Lesson)
+         .where(Lesson.course_id == data["course_ids"][0])
+         .order_by(Lesson.order)),
+        ("Aktive Klassen eines Users",
+         select(ClassEnrollment.class_id)
+         .where(ClassEnrollment.user_id == user_id)
+         .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE)),
+        ("Aktive Studenten einer Klasse",
+         select(func.count(ClassEnrollment.id))
+         .where(ClassEnrollment.class_id == class_id)
+         .where(ClassEnrollment.status == ClassEnrollmentStatus.ACTIVE)),
+        # Ohne Status-Filter: Admin-/Lehrer-Listen, Entfernen, Anwesenheit
+        ("Alle Studenten einer Klasse",
+         select(ClassEnrollment)
+         .where(ClassEnrollment.class_id == class_id)),
+        ("Einschreibung eines Users in einer Klasse",
+         select(ClassEnrollment)
+         .where(ClassEnrollment.class_id == class_id)
+         .where(ClassEnrollment.user_id == user_id)),
+        ("Alle Klassen eines Users",
+         select(ClassEnrollment)
+         .where(ClassEnrollment.user_id == user_id)),
+        ("Direkte Einschreibungen",
+         select(Enrollment)
+         .where(Enrollment.user_id == user_id)
+         .where(Enrollment.status == EnrollmentStatus.ACTIVE)),
+        ("Kommende Sessions (Dashboard)",
+         select(LiveSession)
+         .where(LiveSession.class_id.in_(data["class_ids"]))
+         .where(LiveSession.scheduled_at >= now)
+         .where(LiveSession.is_cancelled == False)
+         .order_by(LiveSession.scheduled_at)
+         .limit(5)),
+        ("Anwesenheitsliste einer Session",
+         select(Attendance)
+         .where(Attendance.live_session_id == data["session_ids"][0])),
+        ("Anwesenheit eines Users in einer Session",
+         select(Attendance)
+         .where(Attendance.live_session_id == data["session_ids"][0])
+         .where(Attendance.user_id == user_id)),
+        ("Teilnahme-Bestätigungen",
+         select(AttendanceConfirmation)
+         .where(AttendanceConfirmation.user_id == user_id)
+         .where(AttendanceConfirmation.live_session_id.in_(data["session_ids"]))),
+        ("Umsatz im Monat",
+         select(func.sum(Payment.amount))
+         .where(Payment.payment_status == PaymentStatus.COMPLETED)
+         .where(Payment.paid_at >= month_start)),
+        ("Kurssuche (Volltext)",
+         select(course_ranks(search_query("arabisch grammatik")))),
+        ("Lektionssuche (Volltext)",
+         lesson_search(search_query("كتاب"), 20)),
+        ("Benutzer-Schnellsuche (Trigramme)",
+         user_typeahead("mustermann", 10)),
+    ]
+
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def full_scans(plan: dict, leading: dict) -> list:
+    """
+    Seq Scans auf großen Tabellen und Index-Scans ohne Bedingung auf der
+    ersten Index-Spalte im Plan-Baum
+    """
+    found = []
+    node = plan.get("Node Type")
+    if node == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        found.append(f"Seq Scan auf {plan['Relation Name']}")
+    elif node in INDEX_SCANS and plan.get("Index Name") in leading:
+        column = leading[plan["Index Name"]]
+        condition = plan.get("Index Cond", "")
+        if column and not re.search(rf"\b{column}\b", condition):
+            found.append(f"{plan['Index Name']} ohne Bedingung auf {column}")
+    for child in plan.get("Plans", []):
+        found.extend(full_scans(child, leading))
+    return found
+
+
+async def leading_columns(conn) -> dict:
+    """{Index-Name: erste Spalte} der Indizes großer Tabellen (None = Ausdruck)"""
+    result = await conn.execute(
+        text(
+            "SELECT i.relname, a.attname "
+            "FROM pg_index x "
+            "JOIN pg_class i ON i.oid = x.indexrelid "
+            "JOIN pg_class t ON t.oid = x.indrelid "
+            "LEFT JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0] "
+            "WHERE t.relname = ANY(:tables)"
+        ),
+        {"tables": sorted(LARGE_TABLES)},
+    )
+    return dict(result.all())
+
+
+async def explain(conn, statement) -> dict:
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    # exec_driver_sql: Literale wie '12:00:00' nicht als Bind-Parameter lesen
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    raw = result.scalar()
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    return plan[0]["Plan"]
+
+
+@pytest_asyncio.fixture(scope="session")
+async def plan_data(database):
+    async with AsyncSessionLocal() as db:
+        data = await seed_student(db, "plans", LARGE)
+        data["lesson_ids"] = (await db.execute(
+            select(Lesson.id).where(Lesson.course_id.in_(data["course_ids"]))
+        )).scalars().all()
+        data["session_ids"] = (await db.execute(
+            select(LiveSession.id).where(LiveSession.class_id.in_(data["class_ids"]))
+        )).scalars().all()
+    async with engine.connect() as conn:
+        async with conn.begin():
+            await conn.execute(text(f"ANALYZE {', '.join(sorted(LARGE_TABLES))}"))
+    yield data
+    await cleanup([data])
+
+
+async def test_no_full_scans_on_large_tables(plan_data):
+    failures = []
+    async with engine.connect() as conn:
+        async with conn.begin():
+            leading = await leading_columns(conn)
+            await conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, statement in endpoint_queries(plan_data):
+                scans = full_scans(await explain(conn, statement), leading)
+                if scans:
+                    failures.append(
+                        f"{name}: {', '.join(sorted(set(scans)))}\n"
+                        f"  {str(statement.compile(dialect=conn.dialect))[:300]}"
+                    )
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,34 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Quiz-Bewertung
+# ===========================================
+# grade_quiz bewertet submit_quiz und den Fortschritts-Batch gleich
+# (ohne Datenbank).
+
+from app.services.quiz import grade_quiz
+
+QUESTIONS = [
+    {"question_text": "1", "options": ["a", "b"], "correct_answer": 1},
+    {"question_text": "2", "options": ["a", "b"], "correct_answer": 0},
+    {"id": "q3", "question_text": "3", "correct_answer": "Kitab"},
+    {"question_text": "4", "options": ["a", "b"], "correct_answer": 1},
+]
+
+
+def test_counts_correct_answers_by_position_and_id():
+    grade = grade_quiz(QUESTIONS, 70, {"0": 1, "1": 1, "q3": " kitab ", "3": "1"})
+    assert grade == {"score": 75, "passed": True, "correct_answers": 3, "total_questions": 4}
+
+
+def test_passing_score_and_default():
+    answers = {"0": 1, "1": 0}
+    assert grade_quiz(QUESTIONS, 60, answers)["passed"] is False
+    assert grade_quiz(QUESTIONS, 50, answers)["passed"] is True
+    # Ohne Bestehensgrenze: 70 %
+    assert grade_quiz(QUESTIONS, None, answers)["passed"] is False
+
+
+def test_missing_answers_and_empty_quiz():
+    assert grade_quiz(QUESTIONS, 70, {})["correct_answers"] == 0
+    assert grade_quiz([], 70, {"0": 1}) == {
+        "score": 0, "passed": False, "correct_answers": 0, "total_questions": 0,
+    }
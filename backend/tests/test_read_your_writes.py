@@ -0,0 +1,29 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Schreibzugriffe erkennen (Read-your-writes)
+# ===========================================
+# get_db markiert den User nach einem Schreibzugriff als "sticky" (liest
+# danach vom Primary). Dafür muss session.info["wrote"] bei jeder Form
+# von DML gesetzt werden, auch wenn sie in from_statement() steckt.
+
+from sqlalchemy import select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models import User
+
+
+async def test_from_statement_dml_marks_session_as_written(seeded):
+    user_id = seeded["admin"]["user_id"]
+    async with AsyncSessionLocal() as db:
+        await db.execute(select(User).where(User.id == user_id))
+        assert not db.info.get("wrote")
+
+        await db.execute(
+            select(User).from_statement(
+                update(User)
+                .where(User.id == user_id)
+                .values(last_name="Admin")
+                .returning(User)
+            )
+        )
+        assert db.info.get("wrote")
+        await db.rollback()
@@ -0,0 +1,167 @@
+# ===========================================
+# WARIZMY EDUCATION - Test: Wiederkehrende Termine
+# ===========================================
+# Reine Datumsrechnung aus app/services/schedule_recurrence.py, ohne
+# Datenbank (Modelle nur als transiente Objekte).
+# Zeitzone: SCHEDULE_TIMEZONE (Standard Europe/Berlin), Sommerzeit 2026
+# beginnt am Sonntag, 29.03. um 02:00.
+
+import uuid
+from datetime import date, datetime, time
+
+from app.models import Class, ClassSchedule, Holiday
+from app.services.schedule_recurrence import (
+    HolidayIndex,
+    expand_schedule,
+    expand_schedules,
+    wall_clock,
+)
+
+MONDAY, SUNDAY = 0, 6
+
+
+def make_class(start_date: date, *schedules, end_date=None) -> Class:
+    return Class(
+        id=uuid.uuid4(),
+        name="Test",
+        start_date=start_date,
+        end_date=end_date,
+        schedules=list(schedules),
+    )
+
+
+def make_schedule(day_of_week: int, start: time, end: time, frequency: int = 1) -> ClassSchedule:
+    return ClassSchedule(
+        id=uuid.uuid4(),
+        day_of_week=day_of_week,
+        start_time=start,
+        end_time=end,
+        frequency=frequency,
+    )
+
+
+def make_holiday(start: date, end: date, class_id=None) -> Holiday:
+    return Holiday(
+        name="Ferien",
+        start_date=start,
+        end_date=end,
+        class_id=class_id,
+        applies_to_all=class_id is None,
+    )
+
+
+def days(occurrences) -> list:
+    return [o.start.date() for o in occurrences]
+
+
+def test_frequency_is_anchored_to_class_start():
+    # Start Mittwoch 04.03. → erster Montag 09.03., dann alle 14 Tage
+    schedule = make_schedule(MONDAY, time(18, 0), time(19, 30), frequency=2)
+    class_ = make_class(date(2026, 3, 4), schedule)
+
+    result = expand_schedule(
+        class_, schedule, datetime(2026, 3, 16), datetime(2026, 4, 30, 23, 59), HolidayIndex()
+    )
+    # 16.03. liegt zwischen zwei Terminen und wird übersprungen
+    assert days(result) == [date(2026, 3, 23), date(2026, 4, 6), date(2026, 4, 20)]
+
+
+def test_class_end_date_limits_occurrences():
+    schedule = make_schedule(MONDAY, time(18, 0), time(19, 0))
+    class_ = make_class(date(2026, 3, 2), schedule, end_date=date(2026, 3, 16))
+
+    result = expand_schedule(class_, schedule, datetime(2026, 3, 1), datetime(2026, 4, 30), HolidayIndex())
+    assert days(result) == [date(2026, 3, 2), date(2026, 3, 9), date(2026, 3, 16)]
+
+
+def test_dst_gap_moves_to_real_wall_clock_time():
+    assert wall_clock(date(2026, 3, 29), time(2, 30)) == datetime(2026, 3, 29, 3, 30)
+    assert wall_clock(date(2026, 3, 22), time(2, 30)) == datetime(2026, 3, 22, 2, 30)
+
+    schedule = make_schedule(SUNDAY, time(2, 30), time(4, 0))
+    class_ = make_class(date(2026, 3, 1), schedule)
+    result = list(expand_schedule(
+        class_, schedule, datetime(2026, 3, 20), datetime(2026, 4, 6), HolidayIndex()
+    ))
+
+    assert [(o.start, o.end) for o in result] == [
+        (datetime(2026, 3, 22, 2, 30), datetime(2026, 3, 22, 4, 0)),
+        (datetime(2026, 3, 29, 3, 30), datetime(2026, 3, 29, 4, 0)),
+        (datetime(2026, 4, 5, 2, 30), datetime(2026, 4, 5, 4, 0)),
+    ]
+
+
+def test_overlapping_and_adjacent_holidays_are_merged():
+    index = HolidayIndex([
+        make_holiday(date(2026, 7, 6), date(2026, 7, 10)),
+        # direkt anschließend
+        make_holiday(date(2026, 7, 11), date(2026, 7, 15)),
+        # überlappend
+        make_holiday(date(2026, 7, 13), date(2026, 7, 20)),
+        # getrennt
+        make_holiday(date(2026, 8, 1), date(2026, 8, 2)),
+    ])
+
+    assert index._index[None] == (
+        [date(2026, 7, 6), date(2026, 8, 1)],
+        [date(2026, 7, 20), date(2026, 8, 2)],
+    )
+    class_id = uuid.uuid4()
+    assert not index.contains(class_id, date(2026, 7, 5))
+    assert all(index.contains(class_id, date(2026, 7, d)) for d in range(6, 21))
+    assert not index.contains(class_id, date(2026, 7, 21))
+    assert index.contains(class_id, date(2026, 8, 2))
+
+
+def test_class_holidays_only_apply_to_their_class():
+    own, other = uuid.uuid4(), uuid.uuid4()
+    index = HolidayIndex([
+        make_holiday(date(2026, 5, 4), date(2026, 5, 8), class_id=own),
+        make_holiday(date(2026, 5, 25), date(2026, 5, 25)),
+    ])
+
+    assert index.contains(own, date(2026, 5, 4))
+    assert not index.contains(other, date(2026, 5, 4))
+    # Globale Ferien gelten für alle Klassen
+    assert index.contains(own, date(2026, 5, 25))
+    assert index.contains(other, date(2026, 5, 25))
+
+    schedule = make_schedule(MONDAY, time(18, 0), time(19, 0))
+    class_ = make_class(date(2026, 4, 27), schedule)
+    class_.id = own
+    result = expand_schedule(class_, schedule, datetime(2026, 4, 27), datetime(2026, 5, 31), index)
+    assert days(result) == [date(2026, 4, 27), date(2026, 5, 11), date(2026, 5, 18)]
+
+
+def test_exclude_and_duplicates_are_skipped():
+    schedule = make_schedule(MONDAY, time(18, 0), time(19, 0))
+    duplicate = make_schedule(MONDAY, time(18, 0), time(19, 30))
+    class_ = make_class(date(2026, 3, 2), schedule, duplicate)
+
+    result = list(expand_schedules(
+        [class_],
+        datetime(2026, 3, 1),
+        datetime(2026, 3, 31),
+        HolidayIndex(),
+        exclude=[(class_.id, date(2026, 3, 9), time(18, 0))],
+    ))
+
+    assert days(result) == [date(2026, 3, 2), date(2026, 3, 16), date(2026, 3, 23), date(2026, 3, 30)]
+    assert len({o.key for o in result}) == len(result)
+
+
+def test_limit_returns_earliest_across_classes():
+    monday = make_class(date(2026, 3, 2), make_schedule(MONDAY, time(18, 0), time(19, 0)))
+    sunday = make_class(date(2026, 3, 1), make_schedule(SUNDAY, time(10, 0), time(11, 0)))
+
+    result = list(expand_schedules(
+        [monday, sunday], datetime(2026, 3, 1), datetime(2026, 12, 31), HolidayIndex(), limit=4
+    ))
+
+    assert [o.start for o in result] == [
+        datetime(2026, 3, 1, 10, 0),
+        datetime(2026, 3, 2, 18, 0),
+        datetime(2026, 3, 8, 10, 0),
+        datetime(2026, 3, 9, 18, 0),
+    ]
+    assert [o.class_id for o in result] == [sunday.id, monday.id, sunday.id, monday.id]
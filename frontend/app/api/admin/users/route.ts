@@ -88,11 +88,15 @@ export async function GET(request: NextRequest) {
     const { searchParams } = new URL(request.url);
     const role = searchParams.get('role');
     const search = searchParams.get('search');
+    const cursor = searchParams.get('cursor');
+    const limit = searchParams.get('limit');
     
     let url = `${API_URL}/admin/users`;
     const params = new URLSearchParams();
     if (role && role !== 'all') params.append('role', role);
     if (search) params.append('search', search);
+    if (cursor) params.append('cursor', cursor);
+    if (limit) params.append('limit', limit);
     if (params.toString()) url += `?${params.toString()}`;
 
     const authHeaders = await getAuthHeaders();
@@ -131,7 +135,11 @@ export async function GET(request: NextRequest) {
     }
 
     const data = await res.json();
-    return NextResponse.json(data);
+    const nextRes = NextResponse.json(data);
+    // Keyset-Pagination: Cursor der nächsten Seite durchreichen
+    const nextCursor = res.headers.get('X-Next-Cursor');
+    if (nextCursor) nextRes.headers.set('X-Next-Cursor', nextCursor);
+    return nextRes;
   } catch (error) {
     console.error('Error fetching users:', error);
     return NextResponse.json(